@@ -0,0 +1,325 @@
+"""
+End-to-end latency and throughput benchmark of /api/ask.
+
+The real FastAPI app is served by uvicorn on a local port, with a RagService wired to
+deterministic stand-ins: feature-hashing embeddings, an in-memory vector store and a chat
+model that streams a fixed answer with a configurable per-token delay. Requests are sent
+at a fixed concurrency over a pooled HTTP client; the report has client-side
+time-to-first-token, latency and requests/sec, plus the time spent in each pipeline stage.
+
+Usage (from api-service):
+    PYTHONPATH=src:../lib_utils/src python -m benchmarks.bench_ask --concurrency 16 \\
+        --requests 400 --output benchmarks/results/ask.json --baseline previous.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import socket
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import httpx
+import numpy as np
+import uvicorn
+from langchain_core.documents import Document
+
+from app.configs.config import Settings, get_settings
+from app.main import app
+from app.services.rag_service import RagService
+from benchmarks.fakes import (
+    FakeEmbeddings,
+    FakeStreamingChatModel,
+    InMemoryVectorStore,
+    StageTimer,
+)
+
+logger = logging.getLogger(__name__)
+
+TOPICS = [
+    "extorsión",
+    "robo agravado",
+    "homicidio culposo",
+    "responsabilidad civil extracontractual",
+    "nulidad del acto jurídico",
+    "prescripción adquisitiva",
+    "lavado de activos",
+    "colusión",
+    "usurpación",
+    "estafa",
+]
+
+
+def build_corpus(size: int, seed: int) -> list[Document]:
+    """
+    Synthetic code articles, spread over two sources and a few topics per article.
+    """
+    rng = random.Random(seed)
+    documents = []
+    for i in range(size):
+        source = "codigo_penal.pdf" if i % 2 else "codigo_civil.pdf"
+        topics = rng.sample(TOPICS, 3)
+        text = (
+            f"Artículo {i + 1}. El que incurra en {topics[0]} será reprimido con pena "
+            f"privativa de libertad. Si concurre {topics[1]}, la pena se agrava; en los casos "
+            f"de {topics[2]} se aplica la reparación civil que corresponda."
+        )
+        documents.append(
+            Document(
+                id=f"chunk-{i}",
+                page_content=text,
+                metadata={
+                    "source": source,
+                    "page": i // 4,
+                    "total_pages": size // 4 + 1,
+                    "articles": [str(i + 1)],
+                },
+            )
+        )
+    return documents
+
+
+def build_queries(count: int, pool: int, seed: int) -> list[str]:
+    """
+    `count` questions drawn from `pool` distinct ones; a small pool exercises the caches.
+    """
+    rng = random.Random(seed)
+    distinct = [
+        f"¿Qué pena corresponde por {rng.choice(TOPICS)} cuando hay {rng.choice(TOPICS)}? ({i})"
+        for i in range(pool)
+    ]
+    return [distinct[i % pool] for i in range(count)]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """
+    Percentiles of durations given in seconds, reported in milliseconds.
+    """
+    if not samples:
+        return {}
+    values = np.asarray(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p90": round(float(np.percentile(values, 90)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+async def build_rag_service(args: argparse.Namespace, timer: StageTimer) -> RagService:
+    settings = Settings()
+    settings.llm.provider = "fake"
+    settings.answer_cache.enabled = args.caches
+    settings.query_cache.enabled = args.caches
+    settings.single_flight.enabled = args.caches
+    settings.article_lookup.enabled = False
+    settings.vector_store.search_type = "similarity"
+    settings.vector_store.reranker = "provider"
+
+    embedding = FakeEmbeddings(size=args.dimension, delay_ms=args.embed_delay_ms, timer=timer)
+    vs_client = InMemoryVectorStore(
+        embedding, rerank_top_n=args.top_n, latency_ms=args.store_latency_ms, timer=timer
+    )
+    await vs_client.store_documents(build_corpus(args.corpus_size, args.seed))
+    chat_llm = FakeStreamingChatModel(
+        answer_tokens=args.answer_tokens,
+        first_token_delay_ms=args.first_token_delay_ms,
+        token_delay_ms=args.token_delay_ms,
+        timer=timer,
+    )
+    rag = RagService(settings, embedding=embedding, vs_client=vs_client, chat_llm=chat_llm)
+
+    pack = rag.context_packer.pack
+
+    def timed_pack(contexts):
+        with timer.measure("pack"):
+            return pack(contexts)
+
+    rag.context_packer.pack = timed_pack  # type: ignore[method-assign]
+    app.dependency_overrides[get_settings] = lambda: settings
+    return rag
+
+
+class Server(threading.Thread):
+    """
+    Uvicorn serving the app on a free local port, in a thread with its own event loop.
+    The lifespan is off: the benchmark publishes its own RagService on app.state.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(daemon=True)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        config = uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, lifespan="off", log_level="warning"
+        )
+        self.server = uvicorn.Server(config)
+
+    def run(self) -> None:
+        self.server.run()
+
+    def __enter__(self) -> "Server":
+        self.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.server.should_exit = True
+        self.join()
+
+
+async def ask(client: httpx.AsyncClient, query: str) -> dict[str, float]:
+    """
+    Send one question and time its first token and its end, as seen by the client.
+    """
+    started = time.perf_counter()
+    first_token = None
+    tokens = 0
+    async with client.stream("POST", "/api/ask/", json={"query": query}) as response:
+        response.raise_for_status()
+        buffer = ""
+        async for text in response.aiter_text():
+            buffer += text
+            *frames, buffer = buffer.split("\n\n")
+            for frame in frames:
+                event = json.loads(frame.split("data: ", 1)[1])
+                if event["stage"] == "tok":
+                    tokens += 1
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                elif event["stage"] == "error":
+                    raise RuntimeError(event["data"])
+    return {
+        "ttft": first_token if first_token is not None else float("nan"),
+        "latency": time.perf_counter() - started,
+        "events": tokens,
+    }
+
+
+async def run_load(url: str, queries: list[str], concurrency: int) -> dict[str, Any]:
+    results: list[dict[str, float]] = []
+    errors: list[str] = []
+    pending = iter(queries)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+
+        async def worker() -> None:
+            for query in pending:
+                try:
+                    results.append(await ask(client, query))
+                except Exception as e:
+                    errors.append(repr(e))
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    return {"results": results, "errors": errors, "elapsed": elapsed}
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """
+    Lines describing the change of each p50/p99 timing and of throughput against a baseline.
+    """
+    lines = [f"Compared with {baseline.get('commit')} ({baseline.get('timestamp')}):"]
+    for section in ("client", "stages"):
+        for name, stats in report[section].items():
+            before = baseline.get(section, {}).get(name)
+            if not before or not stats:
+                continue
+            for key in ("p50", "p99"):
+                change = (stats[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+                lines.append(
+                    f"  {name:16} {key}: {before[key]:9.2f} -> {stats[key]:9.2f} ms "
+                    f"({change:+.1f}%)"
+                )
+    before_rps = baseline.get("throughput_rps", 0)
+    lines.append(f"  throughput: {before_rps:.1f} -> {report['throughput_rps']:.1f} req/s")
+    return lines
+
+
+async def main(args: argparse.Namespace) -> dict[str, Any]:
+    timer = StageTimer()
+    rag = await build_rag_service(args, timer)
+    queries = build_queries(args.requests, args.query_pool or args.requests, args.seed)
+
+    with Server() as server:
+        app.state.rag = rag
+        url = f"http://127.0.0.1:{server.port}"
+        if args.warmup:
+            await run_load(url, queries[: args.warmup], args.concurrency)
+            timer.samples.clear()
+        load = await run_load(url, queries, args.concurrency)
+
+    results = load["results"]
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": vars(args),
+        "requests": len(results),
+        "errors": len(load["errors"]),
+        "error_samples": load["errors"][:5],
+        "elapsed_s": round(load["elapsed"], 3),
+        "throughput_rps": round(len(results) / load["elapsed"], 3),
+        "events_per_request": round(float(np.mean([r["events"] for r in results])), 2),
+        "client": {
+            "ttft": summarize([r["ttft"] for r in results]),
+            "latency": summarize([r["latency"] for r in results]),
+        },
+        "stages": {stage: summarize(samples) for stage, samples in timer.samples.items()},
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=16, help="Unmeasured warm-up requests")
+    parser.add_argument("--query-pool", type=int, default=0, help="Distinct questions, 0 = all")
+    parser.add_argument("--caches", action="store_true", help="Enable query/answer caches")
+    parser.add_argument("--corpus-size", type=int, default=5000)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--embed-delay-ms", type=float, default=5.0)
+    parser.add_argument("--store-latency-ms", type=float, default=10.0)
+    parser.add_argument("--first-token-delay-ms", type=float, default=200.0)
+    parser.add_argument("--token-delay-ms", type=float, default=10.0)
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("benchmarks/results/ask.json"))
+    parser.add_argument("--baseline", type=Path, help="Previous report to compare against")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main(args))
+    report["config"] = {key: str(value) for key, value in report["config"].items()}
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(json.dumps({key: report[key] for key in ("client", "stages")}, indent=2))
+    print(f"{report['throughput_rps']:.1f} req/s, {report['errors']} errors -> {args.output}")
+    if args.baseline:
+        print("\n".join(compare(report, json.loads(args.baseline.read_text()))))
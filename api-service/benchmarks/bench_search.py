@@ -0,0 +1,168 @@
+"""
+Recall versus latency of the local vector store's search modes against exact search.
+
+For each corpus size, synthetic embeddings (topics drawn as cluster centers on the unit
+sphere, chunks scattered around them) are ingested batch by batch into a LocalVectorStore,
+the way document_processing_flow feeds it, so an IVF index is trained and extended
+incrementally. The store is then reopened from disk like the API does at startup, and a
+fixed query set is searched exactly and with every nprobe value: the report has recall@k
+against the exact results, per-query latency and the build time of each mode.
+
+Usage (from api-service):
+    PYTHONPATH=src:../lib_utils/src python -m benchmarks.bench_search \\
+        --sizes 50000 200000 --nprobe 4 8 16 32 --output benchmarks/results/search.json
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+from lib_utils.vector_database.ivf import IVFIndex
+from lib_utils.vector_database.local import LocalVectorStore
+
+from benchmarks.bench_ask import git_commit, summarize
+
+
+def synthetic_vectors(
+    rng: np.random.Generator, centers: np.ndarray, count: int, spread: float
+) -> np.ndarray:
+    topics = rng.integers(0, centers.shape[0], count)
+    noise = rng.standard_normal((count, centers.shape[1]), dtype=np.float32)
+    vectors = centers[topics] + spread * noise / np.sqrt(centers.shape[1])
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32, copy=False)
+
+
+async def build_store(
+    args: argparse.Namespace, index_path: Path, size: int, ann_index: IVFIndex | None
+) -> float:
+    """
+    Ingest `size` vectors in batches and return the wall time.
+    """
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((args.topics, args.dimension), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    store = LocalVectorStore(
+        None,  # type: ignore[arg-type]
+        index_path,
+        args.dimension,
+        rerank_top_n=args.k,
+        quantization=args.quantization,
+        ann_index=ann_index,
+    )
+    started = time.perf_counter()
+    for start in range(0, size, args.batch_size):
+        count = min(args.batch_size, size - start)
+        documents = [Document(id=f"chunk-{start + i}", page_content="") for i in range(count)]
+        await store.store_embeddings(
+            documents, synthetic_vectors(rng, centers, count, args.spread).tolist()
+        )
+    return time.perf_counter() - started
+
+
+def measure(store: LocalVectorStore, queries: np.ndarray, k: int) -> tuple[list, list[float]]:
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        rows, _ = store._similarity(query, k)
+        latencies.append(time.perf_counter() - started)
+        results.append(set(rows.tolist()))
+    return results, latencies
+
+
+async def run_size(args: argparse.Namespace, size: int, workdir: Path) -> dict[str, Any]:
+    rng = np.random.default_rng(args.seed + 1)
+    centers = np.random.default_rng(args.seed).standard_normal(
+        (args.topics, args.dimension), dtype=np.float32
+    )
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    queries = synthetic_vectors(rng, centers, args.queries, args.spread)
+
+    exact_path, ivf_path = workdir / f"exact_{size}", workdir / f"ivf_{size}"
+    exact_build = await build_store(args, exact_path, size, None)
+    ivf_build = await build_store(
+        args, ivf_path, size, IVFIndex(ivf_path, args.dimension, nlist=args.nlist)
+    )
+
+    exact_store = LocalVectorStore(
+        None,  # type: ignore[arg-type]
+        exact_path,
+        args.dimension,
+        args.k,
+        quantization=args.quantization,
+        read_only=True,
+    )
+    truth, latencies = measure(exact_store, queries, args.k)
+    report: dict[str, Any] = {
+        "exact": {"build_s": round(exact_build, 2), "latency_ms": summarize(latencies)}
+    }
+    print(
+        f"{size:>9} exact        recall 1.000  p50 {report['exact']['latency_ms']['p50']:8.3f} ms"
+    )
+
+    ivf_index = IVFIndex(ivf_path, args.dimension, nlist=args.nlist)
+    ivf_store = LocalVectorStore(
+        None,  # type: ignore[arg-type]
+        ivf_path,
+        args.dimension,
+        args.k,
+        quantization=args.quantization,
+        ann_index=ivf_index,
+        read_only=True,
+    )
+    report["ivf"] = {"build_s": round(ivf_build, 2), "nlist": ivf_index.list_count}
+    for nprobe in args.nprobe:
+        ivf_index.nprobe = nprobe
+        found, latencies = measure(ivf_store, queries, args.k)
+        recall = float(np.mean([len(a & b) / args.k for a, b in zip(found, truth)]))
+        stats = {"recall": round(recall, 4), "latency_ms": summarize(latencies)}
+        report["ivf"][f"nprobe_{nprobe}"] = stats
+        print(
+            f"{size:>9} nprobe {nprobe:<5} recall {recall:.3f}  "
+            f"p50 {stats['latency_ms']['p50']:8.3f} ms"
+        )
+    return report
+
+
+async def main(args: argparse.Namespace) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        sizes = {str(size): await run_size(args, size, Path(tmp)) for size in args.sizes}
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {key: str(value) for key, value in vars(args).items()},
+        "sizes": sizes,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25000, 100000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    parser.add_argument("--nlist", type=int, help="IVF centroids, default 2 * sqrt(rows)")
+    parser.add_argument("--quantization", choices=["none", "int8", "binary"], default="none")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=2000, help="Cluster centers")
+    parser.add_argument("--spread", type=float, default=1.0, help="Noise around each topic")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Vectors per upsert")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("benchmarks/results/search.json"))
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main(args))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"-> {args.output}")
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from lib_utils.interfaces.vector_store import VectorStoreClient
+from lib_utils.lexical.bm25 import tokenize
+
+
+class StageTimer:
+    """
+    Collects wall-clock durations, in seconds, per pipeline stage.
+    """
+
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.samples[stage].append(seconds)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic feature-hashing embeddings: every token adds ±1 to a hashed dimension,
+    then the vector is L2-normalized. Texts sharing words are similar, so retrieval
+    behaves like a real (if weak) model, and `delay_ms` stands in for model latency.
+    """
+
+    def __init__(self, size: int = 256, delay_ms: float = 0.0, timer: StageTimer | None = None):
+        self.size = size
+        self.delay_ms = delay_ms
+        self.timer = timer
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for token in tokenize(text):
+            digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest())
+            vector[digest % self.size] += 1.0 if digest & (1 << 63) else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        started = time.perf_counter()
+        if self.delay_ms:
+            await asyncio.sleep(self.delay_ms / 1000)
+        vector = self._embed(text)
+        if self.timer is not None:
+            self.timer.record("embed", time.perf_counter() - started)
+        return vector
+
+
+class InMemoryVectorStore(VectorStoreClient):
+    """
+    Exact cosine search over an in-memory matrix, with optional per-call latency to stand
+    in for a remote vector database. Every search type is served as similarity search.
+    """
+
+    def __init__(
+        self,
+        embedding_function: Embeddings,
+        rerank_top_n: int = 5,
+        latency_ms: float = 0.0,
+        timer: StageTimer | None = None,
+    ):
+        self.embedding = embedding_function
+        self.rerank_top_n = rerank_top_n
+        self.latency_ms = latency_ms
+        self.timer = timer
+        self._documents: list[Document] = []
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+
+    async def _network(self) -> None:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    @contextmanager
+    def _measure(self, stage: str) -> Iterator[None]:
+        if self.timer is None:
+            yield
+        else:
+            with self.timer.measure(stage):
+                yield
+
+    async def store_documents(self, documents: list[Document]) -> list[str]:
+        embeddings = self.embedding.embed_documents([doc.page_content for doc in documents])
+        return await self.store_embeddings(documents, embeddings)
+
+    async def store_embeddings(
+        self, documents: list[Document], embeddings: list[list[float]]
+    ) -> list[str]:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        self._vectors = vectors if not self._documents else np.vstack([self._vectors, vectors])
+        self._documents.extend(documents)
+        return [doc.id or str(i) for i, doc in enumerate(documents)]
+
+    async def delete_documents(self, ids: list[str]) -> None:
+        drop = set(ids)
+        keep = [i for i, doc in enumerate(self._documents) if doc.id not in drop]
+        self._documents = [self._documents[i] for i in keep]
+        self._vectors = self._vectors[keep]
+
+    async def fetch_documents(self, ids: list[str]) -> list[Document]:
+        by_id = {doc.id: doc for doc in self._documents}
+        return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+    async def retrieve(
+        self,
+        query: str,
+        search_type: str,
+        k: int,
+        fetch_k: int | None = None,
+        lambda_mult: float = 0.5,
+    ) -> list[Document]:
+        query_vector = np.asarray(await self.embedding.aembed_query(query), dtype=np.float32)
+        with self._measure("retrieve"):
+            await self._network()
+            scores = self._vectors @ query_vector
+            top = np.argsort(-scores)[:k]
+        return [
+            Document(
+                id=self._documents[i].id,
+                page_content=self._documents[i].page_content,
+                metadata={**self._documents[i].metadata, "score": float(scores[i])},
+            )
+            for i in top
+        ]
+
+    async def rerank_context(self, documents: list[Document], query: str) -> list[dict]:
+        with self._measure("rerank"):
+            await self._network()
+            ranked = sorted(documents, key=lambda doc: doc.metadata["score"], reverse=True)
+            return [
+                {
+                    "id": doc.id,
+                    "index": i,
+                    "score": doc.metadata["score"],
+                    "document": {"id": doc.id, "text": doc.page_content, **doc.metadata},
+                }
+                for i, doc in enumerate(ranked[: self.rerank_top_n])
+            ]
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """
+    Chat model that streams a fixed answer word by word, waiting `token_delay_ms` before
+    each token and `first_token_delay_ms` before the first, like a remote LLM would.
+    """
+
+    answer: str = (
+        "Según el contexto recuperado, la conducta descrita se sanciona con pena privativa."
+    )
+    answer_tokens: int = 60
+    first_token_delay_ms: float = 0.0
+    token_delay_ms: float = 0.0
+    timer: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def _tokens(self) -> list[str]:
+        words = self.answer.split()
+        return [f"{words[i % len(words)]} " for i in range(self.answer_tokens)]
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = AIMessage(content="".join(self._tokens()))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        started = time.perf_counter()
+        await asyncio.sleep(self.first_token_delay_ms / 1000)
+        for i, token in enumerate(self._tokens()):
+            if i:
+                await asyncio.sleep(self.token_delay_ms / 1000)
+            elif self.timer is not None:
+                self.timer.record("llm_first_token", time.perf_counter() - started)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager is not None:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        if self.timer is not None:
+            self.timer.record("llm_total", time.perf_counter() - started)
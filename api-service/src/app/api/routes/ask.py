@@ -1,24 +1,67 @@
 import logging
-from typing import Any
+from typing import Any, AsyncIterator
 from fastapi import APIRouter, HTTPException, status
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
-from app.deps import RagDep
+from app.deps import AdmissionDep, RagDep, SettingsDep
 from app.schemas.ask import AskRequest, AskResponse
+from app.services.admission import Rejected, Slot
+from app.services.event_stream import sse_stream
 
 router = APIRouter(prefix="/ask", tags=["ask"])
 
 logger = logging.getLogger(__name__)
 
+# Status code answered for each shed reason: a full queue is the client's cue to back off,
+# a timed out wait means the service itself is saturated
+SHED_STATUS = {
+    "queue_full": status.HTTP_429_TOO_MANY_REQUESTS,
+    "queue_timeout": status.HTTP_503_SERVICE_UNAVAILABLE,
+}
+
+
+async def _release_when_done(stream: AsyncIterator[bytes], slot: Slot) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        slot.release()
+
 
 @router.post("/", response_model=AskResponse)
-async def ask(request: AskRequest, rag: RagDep) -> Any:
+async def ask(
+    request: AskRequest, rag: RagDep, settings: SettingsDep, admission: AdmissionDep
+) -> Any:
+    slot = None
+    if admission is not None:
+        try:
+            slot = await admission.acquire()
+        except Rejected as e:
+            raise HTTPException(
+                status_code=SHED_STATUS[e.reason],
+                detail=f"Service saturated ({e.reason}), retry later",
+                headers={"Retry-After": str(e.retry_after)},
+            )
     try:
+        responses = rag.run_rag_pipeline_stream(request, settings.vector_store.search_type)
+        stream = sse_stream(
+            responses,
+            interval_ms=settings.stream.flush_interval_ms,
+            max_tokens=settings.stream.flush_max_tokens,
+        )
         return StreamingResponse(
-            rag.run_rag_pipeline_stream(request, "mmr"),
+            _release_when_done(stream, slot) if slot is not None else stream,
             media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            # Also released here in case the client leaves before the stream starts
+            background=BackgroundTask(slot.release) if slot is not None else None,
         )
     except ValueError as e:
+        if slot is not None:
+            slot.release()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
     except Exception as e:
+        if slot is not None:
+            slot.release()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
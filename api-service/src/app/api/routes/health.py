@@ -1,5 +1,5 @@
 import logging
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Request, Response, status
 
 router = APIRouter(prefix="/health")
 
@@ -10,3 +10,14 @@ logger = logging.getLogger(__name__)
 async def get_health():
     logger.info("status ok")
     return status.HTTP_200_OK
+
+
+@router.get("/ready", include_in_schema=False)
+async def get_readiness(request: Request, response: Response):
+    """
+    Readiness probe: 200 once the RagService is built and warmed up, 503 before.
+    """
+    ready = getattr(request.app.state, "rag", None) is not None
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"ready": ready}
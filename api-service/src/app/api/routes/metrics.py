@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.metrics import REGISTRY
+
+router = APIRouter(prefix="/metrics")
+
+
+@router.get("/", include_in_schema=False, response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Stage latency histograms and cache counters in the Prometheus text format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
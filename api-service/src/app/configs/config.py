@@ -18,6 +18,34 @@ class VectorStoreConfig(BaseModel):
     index_name: str = "02-project-index"
     provider: str = "pinecone"
     rerank_top_n: int = 5
+    # Directory of the in-process index used by the "local" provider
+    index_path: str = "vector_index"
+    # "similarity", "mmr" or "hybrid" (dense + BM25 fused with reciprocal rank fusion)
+    search_type: str = "mmr"
+    # Directory of the BM25 index built by the ingest pipeline, used by hybrid search
+    lexical_index_path: str = "lexical_index"
+    # Article number to chunk IDs map built by the ingest pipeline
+    article_index_path: str = "article_index.json"
+    # "provider" uses the vector store's own reranking, "local" the offline CPU reranker
+    reranker: str = "provider"
+    # Weight of the BM25 score in the local reranker, the rest is embedding similarity
+    rerank_lexical_weight: float = 0.3
+    rerank_cache_size: int = 4096
+    # Chunk vectors kept in memory for MMR, so Pinecone queries skip `include_values`
+    vector_cache_size: int = 4096
+    # Local first-pass encoding: "none" (float32), "int8" (4x smaller) or "binary" (32x)
+    quantization: str = "none"
+    # Quantized candidates rescored at full precision as a multiple of k, None picks the
+    # encoding's default (4 for int8, 10 for binary)
+    rescore_factor: int | None = None
+    # Local approximate nearest-neighbor index: "none" (full scan) or "ivf"
+    ann_index: str = "none"
+    # IVF centroids, None for 2 * sqrt(rows) at training time
+    ivf_nlist: int | None = None
+    # IVF centroids scanned per query: higher means better recall, slower search
+    ivf_nprobe: int = 16
+    # Rows needed before the IVF index is trained, smaller corpora are scanned exactly
+    ivf_min_train_rows: int = 20000
 
 
 class EmbeddingConfig(BaseModel):
@@ -27,6 +55,72 @@ class EmbeddingConfig(BaseModel):
     size: int = 1536
 
 
+class QueryCacheConfig(BaseModel):
+    enabled: bool = True
+    max_size: int = 1024
+    ttl_seconds: float = 3600
+
+
+class AnswerCacheConfig(BaseModel):
+    enabled: bool = True
+    max_size: int = 256
+    ttl_seconds: float = 3600
+    similarity_threshold: float = 0.97
+    temperature_band: float = 0.5
+
+
+class ArticleLookupConfig(BaseModel):
+    enabled: bool = True
+    max_chunks: int = 8
+
+
+class ContextConfig(BaseModel):
+    # Token budget of the context block sent to the LLM
+    max_tokens: int = 3000
+    # Used to estimate tokens when the LLM has no local tokenizer
+    chars_per_token: float = 3.5
+    # Longest chunk overlap, in characters, stripped when merging chunks
+    max_overlap: int = 300
+
+
+class SingleFlightConfig(BaseModel):
+    # Identical concurrent questions share one running pipeline
+    enabled: bool = True
+
+
+class StreamConfig(BaseModel):
+    # Tokens are buffered and sent together at most this often
+    flush_interval_ms: int = 50
+    # Buffered tokens are sent early once there are this many
+    flush_max_tokens: int = 16
+
+
+class AdmissionConfig(BaseModel):
+    # Cap concurrent /ask streams, queue a few more and shed the rest
+    enabled: bool = True
+    # Streams running at once, each holds its contexts and an open LLM stream
+    max_concurrent: int = 32
+    # Requests waiting for a slot; beyond this they get 429 at once
+    max_queue: int = 64
+    # Longest wait for a slot before answering 503
+    queue_timeout_seconds: float = 5.0
+    # Retry-After sent with 429 and 503 answers
+    retry_after_seconds: int = 2
+
+
+class TelemetryConfig(BaseModel):
+    # Emit an OpenTelemetry span per pipeline stage, requires opentelemetry-api
+    otel_tracing: bool = False
+
+
+class StartupConfig(BaseModel):
+    # Load models in the background while the server already answers health checks
+    background_preload: bool = True
+    # A failed background preload is retried after this delay, doubled on every failure
+    preload_retry_seconds: float = 1.0
+    preload_max_retry_seconds: float = 60.0
+
+
 class Settings(BaseYamlSettings):
     # LLM configs
     llm: LLMConfig = LLMConfig()
@@ -37,6 +131,33 @@ class Settings(BaseYamlSettings):
     # Embedding config
     embedding: EmbeddingConfig = EmbeddingConfig()
 
+    # Query embedding cache config
+    query_cache: QueryCacheConfig = QueryCacheConfig()
+
+    # Semantic answer cache config
+    answer_cache: AnswerCacheConfig = AnswerCacheConfig()
+
+    # Exact article lookup config
+    article_lookup: ArticleLookupConfig = ArticleLookupConfig()
+
+    # Prompt context packing config
+    context: ContextConfig = ContextConfig()
+
+    # In-flight request coalescing config
+    single_flight: SingleFlightConfig = SingleFlightConfig()
+
+    # Answer streaming config
+    stream: StreamConfig = StreamConfig()
+
+    # Admission control config
+    admission: AdmissionConfig = AdmissionConfig()
+
+    # Stage metrics and tracing config
+    telemetry: TelemetryConfig = TelemetryConfig()
+
+    # Startup config
+    startup: StartupConfig = StartupConfig()
+
     # LangSmith config
     langsmith_api_key: str | None = Field(default=None)
 
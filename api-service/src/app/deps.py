@@ -1,27 +1,47 @@
-from typing import Annotated
-from fastapi import Depends
+from functools import lru_cache
+from typing import TYPE_CHECKING, Annotated
+from fastapi import Depends, HTTPException, Request, status
 
 from app.configs.config import Settings, get_settings
-from app.services.rag_service import RagService
+from app.services.admission import AdmissionController
+
+if TYPE_CHECKING:
+    # Imported lazily: RagService pulls in langchain and the model providers.
+    from app.services.rag_service import RagService
 
 
 SettingsDep = Annotated[Settings, Depends(get_settings)]
 
 
-class RagServiceSingleton:
-    _instance = None
-    _settings = None
+def get_rag_service(request: Request) -> "RagService":
+    """
+    Return the RagService built and warmed up by the application lifespan.
+    """
+    rag = getattr(request.app.state, "rag", None)
+    if rag is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Service is starting up"
+        )
+    return rag
+
 
-    @classmethod
-    def get_instance(cls, settings: SettingsDep):
-        if cls._instance is None or cls._settings != settings:
-            cls._instance = RagService(settings)
-            cls._settings = settings
-        return cls._instance
+RagDep = Annotated["RagService", Depends(get_rag_service)]
 
 
-def get_rag_service(settings: SettingsDep):
-    return RagServiceSingleton.get_instance(settings)
+@lru_cache
+def get_admission_controller() -> AdmissionController | None:
+    """
+    Return the process-wide admission controller, or None when admission control is off.
+    """
+    config = get_settings().admission
+    if not config.enabled:
+        return None
+    return AdmissionController(
+        max_concurrent=config.max_concurrent,
+        max_queue=config.max_queue,
+        queue_timeout_seconds=config.queue_timeout_seconds,
+        retry_after_seconds=config.retry_after_seconds,
+    )
 
 
-RagDep = Annotated[RagService, Depends(get_rag_service)]
+AdmissionDep = Annotated[AdmissionController | None, Depends(get_admission_controller)]
@@ -1,11 +1,102 @@
+import asyncio
+import contextlib
+import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from app.configs.config import Settings, get_settings
 from app.logging_config import setup_logging
-from app.api.routes import health, ask
+from app.api.routes import health, ask, metrics
 from fastapi.middleware.cors import CORSMiddleware
 
 
 setup_logging()
-app = FastAPI(title="API Law Services")
+logger = logging.getLogger(__name__)
+
+
+def _build_rag_service(settings: Settings):
+    # Imported here: RagService pulls in langchain, the model providers and possibly torch.
+    from app.services.rag_service import RagService
+
+    return RagService(settings)
+
+
+async def _start_rag_service(settings: Settings):
+    """
+    Build the RagService in a worker thread, since construction does blocking I/O and model
+    loading, then verify the vector index and run a warm-up query. Whatever was built is
+    closed when starting fails or is cancelled.
+    """
+    build = asyncio.ensure_future(asyncio.to_thread(_build_rag_service, settings))
+    try:
+        rag = await asyncio.shield(build)
+    except asyncio.CancelledError:
+        # The worker thread cannot be interrupted: close the service once it is built
+        with contextlib.suppress(Exception):
+            await (await build).aclose()
+        raise
+    try:
+        await rag.start()
+    except BaseException:
+        await rag.aclose()
+        raise
+    return rag
+
+
+async def _preload(app: FastAPI, settings: Settings, retry: bool) -> None:
+    """
+    Start the RagService and publish it. With `retry`, failures are retried with
+    exponential backoff until it starts or the task is cancelled.
+    """
+    delay = settings.startup.preload_retry_seconds
+    while True:
+        started = time.perf_counter()
+        try:
+            rag = await _start_rag_service(settings)
+            break
+        except Exception as e:
+            logger.exception(f"RagService failed to start: {e}")
+            if not retry:
+                return
+        logger.info(f"Retrying RagService start in {delay:.1f}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, settings.startup.preload_max_retry_seconds)
+    app.state.rag = rag
+    logger.info(f"RagService ready in {time.perf_counter() - started:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Prepare the RagService so no request pays construction cost. The service is only
+    exposed once it is ready; until then /api/health/ready and /api/ask answer 503.
+
+    In background mode the server starts listening right away and /api/health answers
+    while the models load, retrying until they do; otherwise startup waits for the preload
+    to finish and fails with it.
+    """
+    settings = get_settings()
+    background = settings.startup.background_preload
+    app.state.rag = None
+    preload = asyncio.create_task(_preload(app, settings, retry=background))
+    if not background:
+        await preload
+        if app.state.rag is None:
+            raise RuntimeError("RagService failed to start")
+    try:
+        yield
+    finally:
+        preload.cancel()
+        # Lets the preload close a service it was still starting
+        with contextlib.suppress(asyncio.CancelledError):
+            await preload
+        rag = app.state.rag
+        app.state.rag = None
+        if rag is not None:
+            await rag.aclose()
+
+
+app = FastAPI(title="API Law Services", lifespan=lifespan)
 
 origins = [
     "http://localhost:8501",
@@ -24,3 +115,4 @@ app.add_middleware(
 
 app.include_router(router=health.router, prefix="/api")
 app.include_router(router=ask.router, prefix="/api")
+app.include_router(router=metrics.router, prefix="/api")
@@ -1,15 +1,23 @@
 from typing import Any, Literal
 from pydantic import BaseModel, Field
 
+# Version of the /ask event stream format, bumped on incompatible changes
+STREAM_SCHEMA_VERSION = 1
+
 
 class AskRequest(BaseModel):
     query: str
     k: int = Field(default=12)
     temperature: float = Field(default=1.0)
     language: Literal["auto", "spanish", "english"] = Field(default="spanish")
+    # MMR candidates considered before selecting k, None for the vector store's default
+    fetch_k: int | None = Field(default=None, ge=1, le=200)
+    # MMR trade-off: 1 ranks by relevance only, 0 by diversity only
+    lambda_mult: float = Field(default=0.5, ge=0.0, le=1.0)
 
 
 class AskResponse(BaseModel):
     stage: str
     data: str
     contexts: list[dict[str, Any]] | None = Field(default=None)
+    version: int = Field(default=STREAM_SCHEMA_VERSION)
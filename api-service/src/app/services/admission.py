@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from app.services.metrics import ADMISSION_QUEUE_SECONDS, ADMISSION_REQUESTS, ADMISSION_SLOTS
+
+logger = logging.getLogger(__name__)
+
+
+class Rejected(Exception):
+    """
+    Raised when a request is shed instead of admitted.
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Slot:
+    """
+    One admitted request. Releasing it more than once has no effect, so every path that
+    ends a stream can release it without double counting.
+    """
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release()
+
+
+class AdmissionController:
+    """
+    Concurrency limiter with a bounded FIFO wait queue.
+
+    Up to `max_concurrent` requests run at once. Further requests wait in a queue of at most
+    `max_queue` entries for up to `queue_timeout_seconds`; a request finding the queue full is
+    rejected at once ("queue_full"), one that waits too long is rejected when its budget runs
+    out ("queue_timeout"). A released slot is handed directly to the oldest waiter, so queued
+    requests are admitted in arrival order and never overtaken by new arrivals.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout_seconds: float,
+        retry_after_seconds: int = 1,
+    ):
+        """
+        Args:
+            max_concurrent (int): Requests allowed to run at the same time.
+            max_queue (int): Requests allowed to wait for a slot.
+            queue_timeout_seconds (float): Longest a request may wait for a slot.
+            retry_after_seconds (int): Retry-After hint sent with rejections.
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        ADMISSION_SLOTS.source = lambda: {("active",): self.active, ("queued",): self.queued}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _shed(self, reason: str) -> Rejected:
+        ADMISSION_REQUESTS.inc(reason)
+        logger.warning(
+            f"Request shed ({reason}): {self.active} active, {len(self._waiters)} queued"
+        )
+        return Rejected(reason, self.retry_after_seconds)
+
+    async def acquire(self) -> Slot:
+        """
+        Wait for a slot. Raises Rejected when the queue is full or the wait budget runs out.
+        """
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            ADMISSION_REQUESTS.inc("admitted")
+            ADMISSION_QUEUE_SECONDS.observe(0.0)
+            return Slot(self)
+        if len(self._waiters) >= self.max_queue:
+            raise self._shed("queue_full")
+
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_seconds)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended: give it back
+                self._release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._shed("queue_timeout") from None
+            raise
+        ADMISSION_REQUESTS.inc("admitted")
+        ADMISSION_QUEUE_SECONDS.observe(time.perf_counter() - started)
+        return Slot(self)
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot passes to the waiter, so `active` does not change
+                waiter.set_result(None)
+                return
+        self.active -= 1
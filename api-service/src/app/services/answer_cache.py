@@ -0,0 +1,174 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from app.services.embedding_cache import normalize_query
+
+_NUMBERS = re.compile(r"\d+")
+_REPLAY_PIECES = re.compile(r"\S+\s*|\s+")
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    contexts: list[dict[str, Any]]
+    vector: np.ndarray
+    language: str
+    temperature_band: int
+    numbers: frozenset[str]
+    expires_at: float = 0.0
+
+
+def replay_tokens(answer: str) -> list[str]:
+    """
+    Split a cached answer into word-sized pieces to replay it as a token stream.
+    """
+    return _REPLAY_PIECES.findall(answer)
+
+
+class SemanticAnswerCache:
+    """
+    Bounded cache of final RAG answers, matched by query-embedding similarity.
+
+    A lookup hits when the cosine similarity with a cached query is above the threshold,
+    the language matches and the temperature falls in the same band. Queries must also
+    mention the same numbers: "artículo 200" and "artículo 201" embed almost identically
+    but ask for different articles. Every entry belongs to an index version; when the
+    vector store reports a new version the whole cache is dropped. The local store bumps it
+    on every write and Pinecone whenever the ingest pipeline stored or deleted chunks; a
+    store that reports no version only ages entries out with the TTL.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        similarity_threshold: float,
+        temperature_band: float,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.temperature_band = temperature_band
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, CachedAnswer] = OrderedDict()
+        self._next_key = 0
+        self._index_version: str | None = None
+        self._matrix: np.ndarray | None = None
+        self._matrix_keys: list[int] = []
+        self._lock = threading.Lock()
+
+    def _band(self, temperature: float) -> int:
+        if self.temperature_band <= 0:
+            return 0
+        return int(temperature // self.temperature_band)
+
+    @staticmethod
+    def _normalize(vector: list[float] | np.ndarray) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _check_version(self, index_version: str | None) -> None:
+        if index_version != self._index_version:
+            self._entries.clear()
+            self._matrix = None
+            self._index_version = index_version
+
+    def _candidates(self) -> tuple[np.ndarray, list[int]]:
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries)
+            if self._matrix_keys:
+                self._matrix = np.stack([self._entries[k].vector for k in self._matrix_keys])
+            else:
+                self._matrix = np.empty((0, 0), dtype=np.float32)
+        return self._matrix, self._matrix_keys
+
+    def lookup(
+        self,
+        query: str,
+        vector: list[float],
+        language: str,
+        temperature: float,
+        index_version: str | None,
+    ) -> CachedAnswer | None:
+        """
+        Return the best cached answer for a query, or None on a miss.
+        """
+        with self._lock:
+            self._check_version(index_version)
+            now = time.monotonic()
+            matrix, keys = self._candidates()
+            if not keys:
+                self.misses += 1
+                return None
+
+            numbers = frozenset(_NUMBERS.findall(normalize_query(query)))
+            band = self._band(temperature)
+            scores = matrix @ self._normalize(vector)
+            for row in np.argsort(-scores):
+                if scores[row] < self.similarity_threshold:
+                    break
+                entry = self._entries[keys[row]]
+                if entry.expires_at <= now:
+                    continue
+                if (entry.language, entry.temperature_band, entry.numbers) == (
+                    language,
+                    band,
+                    numbers,
+                ):
+                    self._entries.move_to_end(keys[row])
+                    self.hits += 1
+                    return entry
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        query: str,
+        vector: list[float],
+        language: str,
+        temperature: float,
+        index_version: str | None,
+        answer: str,
+        contexts: list[dict[str, Any]],
+    ) -> None:
+        """
+        Cache the final answer and contexts produced for a query.
+        """
+        with self._lock:
+            self._check_version(index_version)
+            now = time.monotonic()
+            # Drop expired entries first, then the least recently used ones.
+            for key in [k for k, e in self._entries.items() if e.expires_at <= now]:
+                del self._entries[key]
+            self._entries[self._next_key] = CachedAnswer(
+                answer=answer,
+                contexts=contexts,
+                vector=self._normalize(vector),
+                language=language,
+                temperature_band=self._band(temperature),
+                numbers=frozenset(_NUMBERS.findall(normalize_query(query))),
+                expires_at=now + self.ttl_seconds,
+            )
+            self._next_key += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self) -> None:
+        """
+        Drop every cached answer.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,90 @@
+import re
+
+from lib_utils.lexical.articles import ArticleIndex
+from lib_utils.lexical.bm25 import tokenize
+
+# A number joined by ",", "y" or "e" is another article only when the reference ends or
+# continues after it: in "artículo 200 y 5 años" the 5 is a quantity
+_REFERENCE_CONTINUES = r"(?=\s*(?:$|[,;:.?!)]|(?:del?|y|e|o|u|en|que|sobre)\b))"
+# "artículo 200", "art. 200", "arts. 200 y 201", "artículos 200-A, 201"
+ARTICLE_REFERENCE = re.compile(
+    r"\bart(?:[íi]culos?|s?\.)\s*"
+    r"(?P<numbers>\d+(?:\s*-\s*[a-z]\b)?"
+    r"(?:\s*(?:,|y|e)\s*\d+(?:\s*-\s*[a-z]\b)?" + _REFERENCE_CONTINUES + r")*)",
+    re.IGNORECASE,
+)
+# "Código Tributario", "código de comercio": the query names a code
+_CODE_NAME = re.compile(
+    r"\bc[óo]digo\s+(?:del?\s+)?(?!(?:que|sobre|para|con|por)\b)[^\W\d_]{3,}", re.IGNORECASE
+)
+_ARTICLE_NUMBER = re.compile(r"(\d+)(?:\s*-\s*([a-z]))?", re.IGNORECASE)
+
+# Words of source file names that do not identify a code
+_GENERIC_SOURCE_WORDS = frozenset(
+    {"codigo", "de", "del", "la", "el", "los", "las", "y", "pdf", "peru", "nuevo", "ley"}
+)
+
+
+def article_references(query: str) -> list[str]:
+    """
+    Return the article numbers cited in a query, normalized like the ingest headings ("200-A").
+    """
+    articles: list[str] = []
+    for match in ARTICLE_REFERENCE.finditer(query):
+        for number, suffix in _ARTICLE_NUMBER.findall(match.group("numbers")):
+            article = f"{int(number)}-{suffix.upper()}" if suffix else str(int(number))
+            if article not in articles:
+                articles.append(article)
+    return articles
+
+
+class ArticleLookup:
+    """
+    Resolves explicit article references such as "artículo 200 del Código Penal" to chunk IDs.
+
+    The code is identified by the distinctive words of the source file names ("penal" for
+    codigo_penal.pdf). When the query names no code, the lookup only succeeds if the article
+    exists in a single source; ambiguous queries, and queries naming a code that is not
+    indexed, fall back to the regular search.
+    """
+
+    def __init__(self, index: ArticleIndex, max_chunks: int):
+        self.index = index
+        self.max_chunks = max_chunks
+
+    @staticmethod
+    def _source_words(source: str) -> set[str]:
+        stem = source.rsplit(".", 1)[0].replace("_", " ")
+        return set(tokenize(stem)) - _GENERIC_SOURCE_WORDS
+
+    def _candidate_sources(self, query: str) -> list[str]:
+        sources = self.index.sources()
+        query_words = set(tokenize(query))
+        overlap = {source: len(self._source_words(source) & query_words) for source in sources}
+        best = max(overlap.values(), default=0)
+        if best == 0:
+            # A named code that matches no source is not indexed, any article found is wrong
+            return [] if _CODE_NAME.search(query) else sources
+        return [source for source in sources if overlap[source] == best]
+
+    def match(self, query: str) -> list[str]:
+        """
+        Return the IDs of the chunks holding the cited articles, or [] when the query does
+        not cite an article unambiguously.
+        """
+        articles = article_references(query)
+        if not articles:
+            return []
+
+        sources = [
+            source
+            for source in self._candidate_sources(query)
+            if any(self.index.lookup(source, article) for article in articles)
+        ]
+        if len(sources) != 1:
+            return []
+
+        ids: list[str] = []
+        for article in articles:
+            ids.extend(i for i in self.index.lookup(sources[0], article) if i not in ids)
+        return ids[: self.max_chunks]
@@ -0,0 +1,134 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Overlaps shorter than this are treated as coincidences, not as split overlap
+_MIN_OVERLAP = 20
+
+
+@dataclass
+class _Passage:
+    source: str
+    page: Any
+    text: str
+    articles: list[str] = field(default_factory=list)
+
+
+def merge_overlap(first: str, second: str, max_overlap: int) -> str | None:
+    """
+    Join two chunks when the end of `first` repeats the start of `second`, as the splitter's
+    overlap does. Returns None when they do not overlap.
+    """
+    if second in first:
+        return first
+    probe = second[:_MIN_OVERLAP]
+    if len(probe) < _MIN_OVERLAP:
+        return None
+    start = first.find(probe, max(len(first) - max_overlap, 0))
+    while start != -1:
+        if second.startswith(first[start:]):
+            return first + second[len(first) - start :]
+        start = first.find(probe, start + 1)
+    return None
+
+
+class ContextPacker:
+    """
+    Turns reranked chunks into the compact context block given to the LLM.
+
+    Chunks of the same source and page are merged when they overlap (or one contains the
+    other), each passage gets a short citation header instead of its metadata repr, and
+    passages are added in rerank order until the token budget is spent. The last passage
+    that does not fit whole is truncated.
+    """
+
+    def __init__(self, count_tokens: Callable[[str], int], max_tokens: int, max_overlap: int = 300):
+        """
+        Args:
+            count_tokens (Callable[[str], int]): Token counter of the LLM.
+            max_tokens (int): Token budget of the packed context.
+            max_overlap (int): Longest chunk overlap, in characters, searched for when merging.
+        """
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.max_overlap = max_overlap
+
+    def _passages(self, contexts: list[dict[str, Any]]) -> list[_Passage]:
+        passages: list[_Passage] = []
+        for context in contexts:
+            document = context.get("document", {})
+            text = document.get("text", "").strip()
+            if not text:
+                continue
+            source = document.get("source", "")
+            page = document.get("page_label") or (
+                document["page"] + 1 if isinstance(document.get("page"), int) else ""
+            )
+            articles = [str(a) for a in document.get("articles") or []]
+
+            for passage in passages:
+                if (passage.source, passage.page) != (source, page):
+                    continue
+                merged = merge_overlap(passage.text, text, self.max_overlap) or merge_overlap(
+                    text, passage.text, self.max_overlap
+                )
+                if merged is not None:
+                    passage.text = merged
+                    passage.articles += [a for a in articles if a not in passage.articles]
+                    break
+            else:
+                passages.append(_Passage(source, page, text, articles))
+        return passages
+
+    @staticmethod
+    def _citation(number: int, passage: _Passage) -> str:
+        citation = f"[{number}] {passage.source}"
+        if passage.page != "":
+            citation += f", p. {passage.page}"
+        if len(passage.articles) == 1:
+            citation += f", art. {passage.articles[0]}"
+        elif passage.articles:
+            citation += f", arts. {', '.join(passage.articles)}"
+        return citation
+
+    def _truncate(self, header: str, text: str, budget: int) -> str | None:
+        """
+        Cut a passage at a word boundary so header and text fit in `budget` tokens.
+        """
+        low, high = 0, len(text)
+        best = None
+        while low < high:
+            middle = (low + high + 1) // 2
+            cut = text[:middle].rsplit(" ", 1)[0]
+            block = f"{header}\n{cut} …"
+            if self.count_tokens(block) <= budget:
+                best, low = block, middle
+            else:
+                high = middle - 1
+        return best
+
+    def pack(self, contexts: list[dict[str, Any]]) -> str:
+        """
+        Render reranked contexts, best first, as citation-headed passages within the budget.
+        """
+        blocks: list[str] = []
+        used = 0
+        passages = self._passages(contexts)
+        for number, passage in enumerate(passages, 1):
+            header = self._citation(number, passage)
+            block = f"{header}\n{passage.text}"
+            tokens = self.count_tokens(block)
+            if used + tokens > self.max_tokens:
+                truncated = self._truncate(header, passage.text, self.max_tokens - used)
+                if truncated is not None:
+                    blocks.append(truncated)
+                break
+            blocks.append(block)
+            used += tokens
+        logger.debug(
+            f"Packed {len(contexts)} chunks into {len(blocks)} passages of "
+            f"{len(passages)}, about {used} tokens"
+        )
+        return "\n\n".join(blocks)
@@ -0,0 +1,104 @@
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = "¿?¡!.,;: "
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query so trivially different spellings share a cache entry.
+    Applies NFKC, casefolding, whitespace collapsing and strips edge punctuation.
+    """
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = _WHITESPACE.sub(" ", text)
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with a bounded LRU + TTL cache for query embeddings.
+
+    Only `embed_query`/`aembed_query` are cached; document embeddings are delegated
+    untouched. Entries are keyed by the embedding model and the normalized query text.
+    """
+
+    def __init__(self, embedding: Embeddings, model: str, max_size: int, ttl_seconds: float):
+        """
+        Args:
+            embedding (Embeddings): The embedding model to wrap.
+            model (str): Model name, part of the cache key.
+            max_size (int): Maximum number of cached queries.
+            ttl_seconds (float): Time-to-live of each entry in seconds.
+        """
+        self.embedding = embedding
+        self.model = model
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str], tuple[float, list[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, text: str) -> tuple[str, str]:
+        return (self.model, normalize_query(text))
+
+    def _get(self, key: tuple[str, str]) -> list[float] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, vector = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def _put(self, key: tuple[str, str], vector: list[float]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return the cache size and hit/miss counters.
+        """
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embedding.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embedding.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = self.embedding.embed_query(text)
+            self._put(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = await self.embedding.aembed_query(text)
+            self._put(key, vector)
+        return vector
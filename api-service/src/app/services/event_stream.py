@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from typing import AsyncIterator
+
+from app.schemas.ask import AskResponse
+
+logger = logging.getLogger(__name__)
+
+# Sent in place of the exception text, which may expose internal details
+STREAM_ERROR_MESSAGE = "The answer could not be completed, please try again."
+
+
+def format_sse(response: AskResponse) -> bytes:
+    """
+    Frame a response as one Server-Sent Event: `event: <stage>`, `data: <json>`, blank line.
+    JSON never contains raw newlines, so the payload always fits in a single data line.
+    """
+    return f"event: {response.stage}\ndata: {response.model_dump_json()}\n\n".encode("utf-8")
+
+
+async def coalesce_tokens(
+    responses: AsyncIterator[AskResponse], interval_ms: int, max_tokens: int
+) -> AsyncIterator[AskResponse]:
+    """
+    Merge consecutive "tok" responses so a flush carries every token produced in the last
+    `interval_ms`, or `max_tokens` tokens, whichever comes first. Other stages flush the
+    pending tokens and pass through unchanged, so the order of the stream is kept.
+    """
+    loop = asyncio.get_running_loop()
+    interval = interval_ms / 1000
+    pending: list[str] = []
+    deadline = 0.0
+    next_response: asyncio.Future | None = None
+    try:
+        while True:
+            if next_response is None:
+                next_response = asyncio.ensure_future(anext(responses))
+            if pending:
+                done, _ = await asyncio.wait(
+                    {next_response}, timeout=max(deadline - loop.time(), 0)
+                )
+                if not done:
+                    yield AskResponse(stage="tok", data="".join(pending))
+                    pending = []
+                    continue
+            try:
+                response = await next_response
+            except StopAsyncIteration:
+                break
+            except Exception:
+                # Tokens produced before the failure still reach the client
+                if pending:
+                    yield AskResponse(stage="tok", data="".join(pending))
+                raise
+            finally:
+                next_response = None
+
+            if response.stage != "tok":
+                if pending:
+                    yield AskResponse(stage="tok", data="".join(pending))
+                    pending = []
+                yield response
+                continue
+            if not pending:
+                deadline = loop.time() + interval
+            pending.append(response.data)
+            if len(pending) >= max_tokens:
+                yield AskResponse(stage="tok", data="".join(pending))
+                pending = []
+        if pending:
+            yield AskResponse(stage="tok", data="".join(pending))
+    finally:
+        if next_response is not None:
+            next_response.cancel()
+            try:
+                await next_response
+            except (asyncio.CancelledError, Exception):
+                pass
+        aclose = getattr(responses, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def sse_stream(
+    responses: AsyncIterator[AskResponse], interval_ms: int, max_tokens: int
+) -> AsyncIterator[bytes]:
+    """
+    Coalesce and frame a response stream. A failure after streaming has started can no
+    longer change the status code, so it is sent as a final "error" event carrying a
+    generic message; the exception itself is only logged.
+    """
+    try:
+        async for response in coalesce_tokens(responses, interval_ms, max_tokens):
+            yield format_sse(response)
+    except Exception:
+        logger.exception("Streaming failed")
+        yield format_sse(AskResponse(stage="error", data=STREAM_ERROR_MESSAGE))
@@ -0,0 +1,235 @@
+import math
+from bisect import bisect_left
+from typing import Callable, TypeVar
+
+# Latency buckets in seconds, from a cache hit to a slow LLM answer
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+Labels = tuple[str, ...]
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(f"{line}\n" for line in self.samples())
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter. Values are either incremented with `inc` or, for counters kept by
+    another component, read at scrape time from `source`.
+    """
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        source: Callable[[], dict[Labels, float]] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.source = source
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> list[str]:
+        values = dict(self._values)
+        if self.source is not None:
+            values.update(self.source())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """
+    Current value read at scrape time from `source`.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        source: Callable[[], dict[Labels, float]] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.source = source
+
+    def samples(self) -> list[str]:
+        values = self.source() if self.source is not None else {}
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """
+    Cumulative histogram over fixed buckets. An observation costs a binary search and two
+    additions, cheap enough to record every stage of every request.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: count per bucket (last one is +Inf), then the sum
+        self._series: dict[Labels, list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self) -> list[str]:
+        lines = []
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} "
+                    f"{_format_value(cumulative)}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(cumulative)}")
+        return lines
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Registry:
+    """
+    Set of metrics rendered together in the Prometheus text exposition format.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: M) -> M:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self._metrics.values())
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "rag_stage_duration_seconds",
+        "Wall time of each RAG pipeline stage.",
+        ("stage",),
+    )
+)
+ANSWER_TOKENS = REGISTRY.register(
+    Histogram(
+        "rag_answer_tokens",
+        "Tokens generated per answer.",
+        buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096),
+    )
+)
+TOKENS_PER_SECOND = REGISTRY.register(
+    Histogram(
+        "rag_generation_tokens_per_second",
+        "LLM generation speed after the first token.",
+        buckets=(5, 10, 20, 40, 60, 80, 100, 150, 200, 400),
+    )
+)
+CACHE_LOOKUPS = REGISTRY.register(
+    Counter(
+        "rag_cache_lookups_total",
+        "Cache lookups of the RAG pipeline by cache and result.",
+        ("cache", "result"),
+    )
+)
+ADMISSION_REQUESTS = REGISTRY.register(
+    Counter(
+        "rag_admission_requests_total",
+        "Ask requests by admission outcome: admitted, queue_full or queue_timeout.",
+        ("outcome",),
+    )
+)
+ADMISSION_QUEUE_SECONDS = REGISTRY.register(
+    Histogram(
+        "rag_admission_queue_seconds",
+        "Time admitted ask requests waited for a slot.",
+    )
+)
+ADMISSION_SLOTS = REGISTRY.register(
+    Gauge(
+        "rag_admission_requests",
+        "Ask requests currently running (active) or waiting for a slot (queued).",
+        ("state",),
+    )
+)
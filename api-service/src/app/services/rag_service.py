@@ -1,13 +1,26 @@
 import logging
-from typing import Any, AsyncGenerator
+import math
+import time
+from typing import Any, AsyncGenerator, Callable
 from langchain_core.embeddings import Embeddings
+from lib_utils.interfaces.reranker import Reranker
 from lib_utils.interfaces.vector_store import VectorStoreClient
+from lib_utils.lexical.articles import ArticleIndex
+from lib_utils.lexical.bm25 import BM25Index
 from langchain.chat_models import init_chat_model
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 
 from app.configs.config import Settings
 from app.schemas.ask import AskRequest, AskResponse
 from app.prompts.ask import rag_prompt
+from app.services.answer_cache import SemanticAnswerCache, replay_tokens
+from app.services.article_lookup import ArticleLookup
+from app.services.context_packer import ContextPacker
+from app.services.embedding_cache import CachedQueryEmbeddings, normalize_query
+from app.services.metrics import ANSWER_TOKENS, CACHE_LOOKUPS, TOKENS_PER_SECOND
+from app.services.single_flight import SingleFlight
+from app.services.telemetry import PipelineTrace, TimedEmbeddings, get_tracer
 
 logger = logging.getLogger(__name__)
 
@@ -18,16 +31,30 @@ class RagService:
     This class initializes embedding and vector store services based on the provided settings.
     """
 
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        embedding: Embeddings | None = None,
+        vs_client: VectorStoreClient | None = None,
+        chat_llm: BaseChatModel | None = None,
+    ):
         """
         Initialize the RagService with the specified settings.
+
+        Args:
+            settings (Settings): Service settings.
+            embedding (Embeddings | None): Embedding model to use instead of the configured one.
+            vs_client (VectorStoreClient | None): Vector store to use instead of the configured one.
+            chat_llm (BaseChatModel | None): Chat model to use instead of the configured one.
         """
 
         # Embedding instance
-        if settings.embedding.provider == "huggingface":
+        if embedding is not None:
+            self.embedding: Embeddings = embedding
+        elif settings.embedding.provider == "huggingface":
             from langchain_huggingface import HuggingFaceEmbeddings
 
-            self.embedding: Embeddings = HuggingFaceEmbeddings(
+            self.embedding = HuggingFaceEmbeddings(
                 model_name=settings.embedding.model,
             )
         elif settings.embedding.provider == "openai":
@@ -39,23 +66,91 @@ class RagService:
                 api_key=settings.embedding.api_key,
             )
 
+        # Time spent in the embedding model is reported as the "embed" stage
+        self.embedding = TimedEmbeddings(self.embedding)
+
+        # Repeated queries skip the embedding model entirely
+        if settings.query_cache.enabled:
+            self.embedding = CachedQueryEmbeddings(
+                self.embedding,
+                model=settings.embedding.model,
+                max_size=settings.query_cache.max_size,
+                ttl_seconds=settings.query_cache.ttl_seconds,
+            )
+
+        # Reranker instance, None keeps the vector store's own reranking
+        self.reranker: Reranker | None = None
+        if settings.vector_store.reranker == "local":
+            from lib_utils.rerank.local import LocalReranker
+
+            self.reranker = LocalReranker(
+                self.embedding,
+                top_n=settings.vector_store.rerank_top_n,
+                lexical_weight=settings.vector_store.rerank_lexical_weight,
+                cache_size=settings.vector_store.rerank_cache_size,
+            )
+        elif settings.vector_store.reranker != "provider":
+            raise EnvironmentError(f"Unknown reranker {settings.vector_store.reranker}")
+
+        # BM25 index for hybrid search, built by the ingest pipeline
+        self.lexical_index: BM25Index | None = None
+        if settings.vector_store.search_type == "hybrid":
+            self.lexical_index = BM25Index(settings.vector_store.lexical_index_path)
+
         # VectorStore Client instance
-        if settings.vector_store.provider == "pinecone":
+        if vs_client is not None:
+            self.vs_client: VectorStoreClient = vs_client
+        elif settings.vector_store.provider == "pinecone":
             from lib_utils.vector_database.pinecone import PineconeService
 
             if settings.vector_store.api_key:
-                self.vs_client: VectorStoreClient = PineconeService(
+                self.vs_client = PineconeService(
                     self.embedding,
                     settings.vector_store.api_key.get_secret_value(),
                     settings.vector_store.index_name,
                     settings.embedding.size,
                     rerank_top_n=settings.vector_store.rerank_top_n,
+                    reranker=self.reranker,
+                    lexical_index=self.lexical_index,
+                    vector_cache_size=settings.vector_store.vector_cache_size,
                 )
             else:
                 raise EnvironmentError("Vector Store API KEY not found")
+        elif settings.vector_store.provider == "local":
+            from lib_utils.vector_database.ivf import IVFIndex
+            from lib_utils.vector_database.local import LocalVectorStore
+
+            # ANN index built by the ingest pipeline next to the vectors
+            ann_index = None
+            if settings.vector_store.ann_index == "ivf":
+                ann_index = IVFIndex(
+                    settings.vector_store.index_path,
+                    settings.embedding.size,
+                    nlist=settings.vector_store.ivf_nlist,
+                    nprobe=settings.vector_store.ivf_nprobe,
+                    min_train_rows=settings.vector_store.ivf_min_train_rows,
+                )
+            elif settings.vector_store.ann_index != "none":
+                raise EnvironmentError(f"Unknown ANN index {settings.vector_store.ann_index}")
+
+            self.vs_client = LocalVectorStore(
+                self.embedding,
+                settings.vector_store.index_path,
+                settings.embedding.size,
+                rerank_top_n=settings.vector_store.rerank_top_n,
+                reranker=self.reranker,
+                lexical_index=self.lexical_index,
+                quantization=settings.vector_store.quantization,
+                rescore_factor=settings.vector_store.rescore_factor,
+                ann_index=ann_index,
+                # The ingest pipeline is the only writer of the index files
+                read_only=True,
+            )
 
         # Chatmodel instance
-        if settings.llm.api_key:
+        if chat_llm is not None:
+            self.chat_llm = chat_llm
+        elif settings.llm.api_key:
             self.chat_llm = init_chat_model(
                 model=settings.llm.name,
                 model_provider=settings.llm.provider,
@@ -66,32 +161,208 @@ class RagService:
 
         self.rag_prompt: ChatPromptTemplate = rag_prompt
 
+        # Reranked chunks are merged, cited compactly and cut to a token budget
+        self.context_packer = ContextPacker(
+            self._token_counter(settings),
+            max_tokens=settings.context.max_tokens,
+            max_overlap=settings.context.max_overlap,
+        )
+
+        # Answers for popular questions are replayed instead of regenerated
+        self.answer_cache: SemanticAnswerCache | None = None
+        if settings.answer_cache.enabled:
+            self.answer_cache = SemanticAnswerCache(
+                max_size=settings.answer_cache.max_size,
+                ttl_seconds=settings.answer_cache.ttl_seconds,
+                similarity_threshold=settings.answer_cache.similarity_threshold,
+                temperature_band=settings.answer_cache.temperature_band,
+            )
+
+        # Questions citing an article are answered from the article index, without search
+        self.article_lookup: ArticleLookup | None = None
+        if settings.article_lookup.enabled:
+            self.article_lookup = ArticleLookup(
+                ArticleIndex(settings.vector_store.article_index_path),
+                max_chunks=settings.article_lookup.max_chunks,
+            )
+
+        # Identical concurrent requests attach to one running pipeline
+        self.single_flight: SingleFlight | None = None
+        if settings.single_flight.enabled:
+            self.single_flight = SingleFlight()
+
+        # Stage histograms are always recorded, spans only when tracing is enabled
+        self.tracer = get_tracer(settings.telemetry.otel_tracing)
+        CACHE_LOOKUPS.source = self._cache_lookups
+
+    def _cache_lookups(self) -> dict[tuple[str, ...], float]:
+        """
+        Hit and miss counts kept by the caches themselves, read when metrics are scraped.
+        Single-flight joins count as hits of the in-flight "cache".
+        """
+        counts: dict[tuple[str, ...], float] = {}
+        if isinstance(self.embedding, CachedQueryEmbeddings):
+            counts[("query_embedding", "hit")] = self.embedding.hits
+            counts[("query_embedding", "miss")] = self.embedding.misses
+        if self.answer_cache is not None:
+            counts[("answer", "hit")] = self.answer_cache.hits
+            counts[("answer", "miss")] = self.answer_cache.misses
+        if self.single_flight is not None:
+            counts[("single_flight", "hit")] = self.single_flight.joined
+            counts[("single_flight", "miss")] = self.single_flight.started
+        return counts
+
+    def _token_counter(self, settings: Settings) -> Callable[[str], int]:
+        """
+        Count prompt tokens with the LLM's own tokenizer when it is local (tiktoken for
+        OpenAI models). Other providers only count tokens remotely, so they are estimated.
+        """
+        if settings.llm.provider == "openai":
+            return self.chat_llm.get_num_tokens
+        chars_per_token = settings.context.chars_per_token
+        return lambda text: math.ceil(len(text) / chars_per_token)
+
+    async def start(self) -> None:
+        """
+        Open the vector store's pooled connections and run a warm-up query, so the embedding
+        model, the HTTP session and the index are all hot before the first request.
+        """
+        await self.vs_client.start()
+        try:
+            await self.vs_client.retrieve("warm-up", "similarity", 1)
+        except Exception as e:
+            logger.warning(f"Warm-up query failed: {e}")
+
+    async def aclose(self) -> None:
+        await self.vs_client.aclose()
+
+    async def _lookup_articles(self, ask_request: AskRequest) -> list[dict[str, Any]]:
+        """
+        Fetch the chunks of the articles cited in the query, skipping embedding, search and
+        rerank. Returns [] when the query cites no article or the lookup is ambiguous.
+        """
+        if self.article_lookup is None:
+            return []
+        ids = self.article_lookup.match(ask_request.query)
+        CACHE_LOOKUPS.inc("article_index", "hit" if ids else "miss")
+        if not ids:
+            return []
+        documents = await self.vs_client.fetch_documents(ids)
+        logger.debug(f"Article lookup matched {len(documents)} chunks")
+        return [
+            {
+                "id": doc.id,
+                "index": i,
+                "score": 1.0,
+                "document": {"id": doc.id, "text": doc.page_content, **doc.metadata},
+            }
+            for i, doc in enumerate(documents)
+        ]
+
     async def _retrieve_and_rerank(
-        self, ask_request: AskRequest, retrieval_type: str
+        self, ask_request: AskRequest, retrieval_type: str, trace: PipelineTrace
     ) -> list[dict[str, Any]]:
         """
         Retrieve documents using the vector store client and optionally rerank them.
+        The "retrieve" stage includes embedding the query when it is not cached.
         """
-        docs_retrieved = await self.vs_client.retrieve(
-            ask_request.query, retrieval_type, ask_request.k
-        )
-        docs_reranked = await self.vs_client.rerank_context(docs_retrieved, ask_request.query)
+        with trace.stage("retrieve", **{"rag.search_type": retrieval_type}):
+            docs_retrieved = await self.vs_client.retrieve(
+                ask_request.query,
+                retrieval_type,
+                ask_request.k,
+                fetch_k=ask_request.fetch_k,
+                lambda_mult=ask_request.lambda_mult,
+            )
+        with trace.stage("rerank", **{"rag.candidates": len(docs_retrieved)}):
+            docs_reranked = await self.vs_client.rerank_context(docs_retrieved, ask_request.query)
+        if isinstance(self.embedding, CachedQueryEmbeddings):
+            logger.debug(f"Query embedding cache: {self.embedding.stats()}")
 
         return docs_reranked
 
     async def run_rag_pipeline_stream(
         self, ask_request: AskRequest, retrieval_type: str
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[AskResponse, None]:
+        """
+        Executes a streaming RAG pipeline: yields LLM response chunks as AskResponse events.
+        Concurrent requests with the same normalized query and parameters share a single
+        pipeline run; late joiners first receive the chunks already produced.
+        """
+        if self.single_flight is None:
+            async for chunk in self._run_pipeline(ask_request, retrieval_type):
+                yield chunk
+            return
+
+        key = (
+            normalize_query(ask_request.query),
+            ask_request.k,
+            ask_request.language,
+            ask_request.temperature,
+            ask_request.fetch_k,
+            ask_request.lambda_mult,
+            retrieval_type,
+        )
+        async for chunk in self.single_flight.stream(
+            key, lambda: self._run_pipeline(ask_request, retrieval_type)
+        ):
+            yield chunk
+
+    async def _run_pipeline(
+        self, ask_request: AskRequest, retrieval_type: str
+    ) -> AsyncGenerator[AskResponse, None]:
         """
         Executes a streaming RAG pipeline: yields LLM response chunks.
+        Questions citing an article go straight to the prompt with the article's chunks.
+        Answers found in the semantic answer cache are replayed through the same stream.
+        Every stage is timed into the stage histograms, and traced when tracing is enabled.
         """
-        retrieved_docs = await self._retrieve_and_rerank(ask_request, retrieval_type)
-        if retrieved_docs:
+        trace = PipelineTrace(
+            self.tracer, **{"rag.k": ask_request.k, "rag.language": ask_request.language}
+        )
+        outcome = "error"
+        try:
+            query_vector: list[float] = []
+            index_version = None
+            retrieved_docs: list[dict[str, Any]] = []
+            if self.article_lookup is not None:
+                with trace.stage("article_lookup"):
+                    retrieved_docs = await self._lookup_articles(ask_request)
+            if not retrieved_docs and self.answer_cache is not None:
+                with trace.stage("answer_cache"):
+                    query_vector = await self.embedding.aembed_query(ask_request.query)
+                    index_version = await self.vs_client.index_version()
+                    cached = self.answer_cache.lookup(
+                        ask_request.query,
+                        query_vector,
+                        ask_request.language,
+                        ask_request.temperature,
+                        index_version,
+                    )
+                if cached is not None:
+                    logger.debug(f"Answer cache hit: {self.answer_cache.stats()}")
+                    for piece in replay_tokens(cached.answer):
+                        yield AskResponse(stage="tok", data=piece)
+                    yield AskResponse(stage="end", data=cached.answer, contexts=cached.contexts)
+                    outcome = "answer_cache"
+                    return
+
+            if not retrieved_docs:
+                retrieved_docs = await self._retrieve_and_rerank(ask_request, retrieval_type, trace)
+            if not retrieved_docs:
+                outcome = "no_context"
+                return
+
+            with trace.stage("pack", **{"rag.chunks": len(retrieved_docs)}):
+                context = self.context_packer.pack(retrieved_docs)
             chain = self.rag_prompt | self.chat_llm
+            llm_started = time.perf_counter()
+            first_token: float | None = None
+            chunks = 0
             async for event in chain.astream_events(
                 input={
                     "question": ask_request.query,
-                    "context": retrieved_docs,
+                    "context": context,
                     "language": ask_request.language,
                 },
                 version="v2",
@@ -101,12 +372,48 @@ class RagService:
                 if event["event"] == "on_chat_model_stream":
                     data = event["data"].get("chunk")
                     if data:
+                        if first_token is None:
+                            first_token = time.perf_counter()
+                            trace.record("llm_first_token", llm_started)
+                        chunks += 1
                         logger.debug(f"Yielding: {data.text()}")
-                        yield AskResponse(stage="tok", data=data.text()).model_dump_json()
+                        yield AskResponse(stage="tok", data=data.text())
                 elif event["event"] == "on_chat_model_end":
                     data = event["data"].get("output")
                     if data:
+                        trace.record("llm", llm_started)
+                        self._record_generation(data, chunks, first_token, trace)
                         logger.debug(f"Yielding data: {data.text()}\nContexts: {retrieved_docs}")
-                        yield AskResponse(
-                            stage="end", data=data.text(), contexts=retrieved_docs
-                        ).model_dump_json()
+                        if self.answer_cache is not None and query_vector:
+                            self.answer_cache.store(
+                                ask_request.query,
+                                query_vector,
+                                ask_request.language,
+                                ask_request.temperature,
+                                index_version,
+                                answer=data.text(),
+                                contexts=retrieved_docs,
+                            )
+                        yield AskResponse(stage="end", data=data.text(), contexts=retrieved_docs)
+            outcome = "answered"
+        finally:
+            trace.finish(outcome)
+
+    @staticmethod
+    def _record_generation(
+        output: Any, chunks: int, first_token: float | None, trace: PipelineTrace
+    ) -> None:
+        """
+        Record the answer's token count, from the provider's usage metadata when reported
+        or else the number of streamed chunks, and the generation speed after the first token.
+        """
+        usage = getattr(output, "usage_metadata", None) or {}
+        tokens = usage.get("output_tokens") or chunks
+        ANSWER_TOKENS.observe(tokens)
+        attributes: dict[str, Any] = {"rag.output_tokens": tokens}
+        if first_token is not None and tokens > 1:
+            elapsed = time.perf_counter() - first_token
+            if elapsed > 0:
+                TOKENS_PER_SECOND.observe((tokens - 1) / elapsed)
+                attributes["rag.tokens_per_second"] = (tokens - 1) / elapsed
+        trace.set_attributes(**attributes)
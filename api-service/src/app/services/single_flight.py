@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """
+    One running stream shared by every subscriber with the same key.
+    """
+
+    def __init__(self) -> None:
+        self.items: list[Any] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task: asyncio.Task | None = None
+
+
+class SingleFlight:
+    """
+    In-flight deduplication of identical streams.
+
+    The first caller for a key starts the source stream in a background task; callers that
+    arrive while it is running attach to it. Every subscriber receives every item from the
+    start, so late joiners first get the prefix produced so far and then follow live. Once
+    the stream ends the key is released and the next caller starts a new one. If every
+    subscriber disconnects before the end, the source is cancelled.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, _Flight] = {}
+        self.started = 0
+        self.joined = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def _produce(self, key: Hashable, flight: _Flight, source: AsyncIterator[Any]) -> None:
+        try:
+            async for item in source:
+                async with flight.changed:
+                    flight.items.append(item)
+                    flight.changed.notify_all()
+        except BaseException as e:
+            flight.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            async with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
+
+    async def stream(
+        self, key: Hashable, source: Callable[[], AsyncIterator[T]]
+    ) -> AsyncIterator[T]:
+        """
+        Yield the items of the stream running for `key`, starting `source()` if none is.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.create_task(self._produce(key, flight, source()))
+            self.started += 1
+        else:
+            self.joined += 1
+            logger.debug(f"Joined in-flight stream, {len(flight.items)} items already produced")
+
+        flight.subscribers += 1
+        position = 0
+        try:
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(
+                        lambda: position < len(flight.items) or flight.done
+                    )
+                    pending = flight.items[position:]
+                    finished = flight.done
+                for item in pending:
+                    yield item
+                position += len(pending)
+                if finished and position == len(flight.items):
+                    break
+            if flight.error is not None:
+                raise flight.error
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done and flight.task is not None:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
@@ -0,0 +1,136 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from langchain_core.embeddings import Embeddings
+
+from app.services.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Trace of the pipeline run executing in the current task, if any
+_current_trace: ContextVar["PipelineTrace | None"] = ContextVar("current_trace", default=None)
+
+
+def get_tracer(enabled: bool) -> Any:
+    """
+    Return an OpenTelemetry tracer when tracing is enabled, None otherwise.
+    Only the API package is needed here; the SDK and exporter are configured by the
+    deployment (e.g. `opentelemetry-instrument`).
+    """
+    if not enabled:
+        return None
+    try:
+        from opentelemetry import trace
+    except ImportError as e:
+        raise EnvironmentError("OpenTelemetry tracing enabled but opentelemetry-api missing") from e
+    return trace.get_tracer("app.services.rag_service")
+
+
+class PipelineTrace:
+    """
+    Times the stages of one pipeline run into the `rag_stage_duration_seconds` histogram
+    and, when a tracer is given, as child spans of a `rag.pipeline` span.
+    """
+
+    def __init__(self, tracer: Any = None, **attributes: Any):
+        self.started = time.perf_counter()
+        self._tracer = tracer
+        self._span = None
+        self._context = None
+        if tracer is not None:
+            from opentelemetry import trace
+
+            self._span = tracer.start_span("rag.pipeline", attributes=attributes)
+            self._context = trace.set_span_in_context(self._span)
+        self._token = _current_trace.set(self)
+
+    @staticmethod
+    def current() -> "PipelineTrace | None":
+        return _current_trace.get()
+
+    def record(self, stage: str, started: float, **attributes: Any) -> float:
+        """
+        Record a stage that ran from `started` (a perf_counter reading) until now.
+        Returns its duration in seconds.
+        """
+        now = time.perf_counter()
+        elapsed = now - started
+        STAGE_SECONDS.observe(elapsed, stage)
+        if self._tracer is not None:
+            end_ns = time.time_ns()
+            span = self._tracer.start_span(
+                f"rag.{stage}",
+                context=self._context,
+                start_time=end_ns - int(elapsed * 1e9),
+                attributes=attributes,
+            )
+            span.end(end_time=end_ns)
+        return elapsed
+
+    @contextmanager
+    def stage(self, stage: str, **attributes: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, started, **attributes)
+
+    def set_attributes(self, **attributes: Any) -> None:
+        if self._span is not None:
+            self._span.set_attributes(attributes)
+
+    def finish(self, outcome: str) -> None:
+        """
+        Record the whole run as the "pipeline" stage and end the root span.
+        """
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, "pipeline")
+        if self._span is not None:
+            self._span.set_attribute("rag.outcome", outcome)
+            self._span.end()
+        try:
+            _current_trace.reset(self._token)
+        except ValueError:
+            # Finished from another context than the one that started it
+            _current_trace.set(None)
+
+
+class TimedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that records the time spent in the embedding model as the "embed"
+    stage of the current pipeline run. Wraps the model itself, under the query cache, so
+    only real model calls are timed.
+    """
+
+    def __init__(self, embedding: Embeddings):
+        self.embedding = embedding
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embedding.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embedding.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        started = time.perf_counter()
+        try:
+            return self.embedding.embed_query(text)
+        finally:
+            self._record(started)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        started = time.perf_counter()
+        try:
+            return await self.embedding.aembed_query(text)
+        finally:
+            self._record(started)
+
+    @staticmethod
+    def _record(started: float) -> None:
+        trace = PipelineTrace.current()
+        if trace is not None:
+            trace.record("embed", started)
+        else:
+            STAGE_SECONDS.observe(time.perf_counter() - started, "embed")
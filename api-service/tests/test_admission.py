@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.deps import get_admission_controller, get_rag_service
+from app.main import app
+from app.services.admission import AdmissionController, Rejected
+from app.services.metrics import ADMISSION_REQUESTS
+from tests.test_ask import FakeRag, FakeRagException
+
+
+##############################################
+# Controller tests
+##############################################
+def test_limits_concurrency_and_admits_waiters_in_order():
+    async def main():
+        admission = AdmissionController(max_concurrent=2, max_queue=4, queue_timeout_seconds=1)
+        running, peak, order = 0, 0, []
+
+        async def request(i):
+            nonlocal running, peak
+            slot = await admission.acquire()
+            running += 1
+            peak = max(peak, running)
+            order.append(i)
+            await asyncio.sleep(0.01)
+            running -= 1
+            slot.release()
+
+        await asyncio.gather(*(request(i) for i in range(6)))
+        return admission, peak, order
+
+    admission, peak, order = asyncio.run(main())
+
+    assert peak == 2
+    assert order == list(range(6))
+    assert admission.active == 0 and admission.queued == 0
+
+
+def test_sheds_when_queue_is_full():
+    async def main():
+        admission = AdmissionController(
+            max_concurrent=1, max_queue=1, queue_timeout_seconds=1, retry_after_seconds=3
+        )
+        slot = await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        assert admission.queued == 1
+
+        with pytest.raises(Rejected) as info:
+            await admission.acquire()
+
+        slot.release()
+        (await waiter).release()
+        return admission, info.value
+
+    admission, rejected = asyncio.run(main())
+
+    assert (rejected.reason, rejected.retry_after) == ("queue_full", 3)
+    assert admission.active == 0 and admission.queued == 0
+
+
+def test_sheds_when_queue_time_budget_runs_out():
+    before = ADMISSION_REQUESTS.value("queue_timeout")
+
+    async def main():
+        admission = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout_seconds=0.01)
+        slot = await admission.acquire()
+        with pytest.raises(Rejected) as info:
+            await admission.acquire()
+        assert admission.queued == 0
+
+        # The slot goes back to the pool, not to the timed out waiter
+        slot.release()
+        assert admission.active == 0
+        return info.value
+
+    assert asyncio.run(main()).reason == "queue_timeout"
+    assert ADMISSION_REQUESTS.value("queue_timeout") == before + 1
+
+
+def test_release_is_idempotent():
+    async def main():
+        admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout_seconds=1)
+        slot = await admission.acquire()
+        slot.release()
+        slot.release()
+        return admission
+
+    assert asyncio.run(main()).active == 0
+
+
+##############################################
+# Route tests
+##############################################
+class SaturatedAdmission:
+    def __init__(self, reason):
+        self.reason = reason
+
+    async def acquire(self):
+        raise Rejected(self.reason, 7)
+
+
+@pytest.mark.parametrize("reason,status_code", [("queue_full", 429), ("queue_timeout", 503)])
+def test_shed_request_gets_retry_after(reason, status_code):
+    app.dependency_overrides[get_rag_service] = lambda: FakeRag()
+    app.dependency_overrides[get_admission_controller] = lambda: SaturatedAdmission(reason)
+    try:
+        resp = TestClient(app).post("/api/ask", json={"query": "hi"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == status_code
+    assert resp.headers["retry-after"] == "7"
+
+
+@pytest.mark.parametrize("fake", [FakeRag(), FakeRagException()])
+def test_slot_is_released_after_each_request(fake):
+    admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout_seconds=1)
+    app.dependency_overrides[get_rag_service] = lambda: fake
+    app.dependency_overrides[get_admission_controller] = lambda: admission
+    try:
+        client = TestClient(app)
+        for _ in range(3):
+            resp = client.post("/api/ask", json={"query": "hi"})
+            assert resp.status_code != 429
+    finally:
+        app.dependency_overrides.clear()
+
+    assert admission.active == 0
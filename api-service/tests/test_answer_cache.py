@@ -0,0 +1,55 @@
+import pytest
+
+from app.services.answer_cache import SemanticAnswerCache, replay_tokens
+
+
+def make_cache(**overrides):
+    params = dict(max_size=2, ttl_seconds=60, similarity_threshold=0.95, temperature_band=0.5)
+    params.update(overrides)
+    return SemanticAnswerCache(**params)
+
+
+def store(cache, query, vector, language="spanish", temperature=0.2, version="1"):
+    cache.store(
+        query, vector, language, temperature, version, answer=f"answer: {query}", contexts=[]
+    )
+
+
+##############################################
+# Lookup tests
+##############################################
+@pytest.mark.parametrize(
+    "query,vector,language,temperature,version,hit",
+    [
+        ("artículo 200 del código penal", [1.0, 0.01], "spanish", 0.3, "1", True),
+        ("artículo 200 del código penal", [0.0, 1.0], "spanish", 0.3, "1", False),  # dissimilar
+        ("artículo 200 del código penal", [1.0, 0.01], "english", 0.3, "1", False),  # language
+        ("artículo 200 del código penal", [1.0, 0.01], "spanish", 0.9, "1", False),  # band
+        ("artículo 201 del código penal", [1.0, 0.01], "spanish", 0.3, "1", False),  # numbers
+        ("artículo 200 del código penal", [1.0, 0.01], "spanish", 0.3, "2", False),  # re-ingest
+    ],
+)
+def test_lookup(query, vector, language, temperature, version, hit):
+    cache = make_cache()
+    store(cache, "Artículo 200 del Código Penal", [1.0, 0.0])
+
+    result = cache.lookup(query, vector, language, temperature, version)
+
+    assert (result is not None) == hit
+
+
+def test_size_bound_evicts_least_recently_used():
+    cache = make_cache(max_size=2)
+    store(cache, "a", [1.0, 0.0, 0.0])
+    store(cache, "b", [0.0, 1.0, 0.0])
+    assert cache.lookup("a", [1.0, 0.0, 0.0], "spanish", 0.2, "1") is not None
+    store(cache, "c", [0.0, 0.0, 1.0])
+
+    assert cache.lookup("b", [0.0, 1.0, 0.0], "spanish", 0.2, "1") is None
+    assert cache.lookup("a", [1.0, 0.0, 0.0], "spanish", 0.2, "1") is not None
+    assert cache.stats()["size"] == 2
+
+
+def test_replay_tokens_reassemble_answer():
+    answer = "El **artículo 200** sanciona\nla extorsión."
+    assert "".join(replay_tokens(answer)) == answer
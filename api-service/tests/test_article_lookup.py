@@ -0,0 +1,86 @@
+import pytest
+from langchain_core.documents import Document
+from lib_utils.lexical.articles import ArticleIndex
+
+from app.services.article_lookup import ArticleLookup, article_references
+
+
+def make_index(tmp_path) -> ArticleIndex:
+    index = ArticleIndex(tmp_path / "article_index.json")
+    index.add(
+        [
+            Document(
+                id="p200",
+                page_content="",
+                metadata={"source": "codigo_penal.pdf", "articles": ["200"]},
+            ),
+            Document(
+                id="p200b",
+                page_content="",
+                metadata={"source": "codigo_penal.pdf", "articles": ["200", "201"]},
+            ),
+            Document(
+                id="c200",
+                page_content="",
+                metadata={"source": "codigo_civil.pdf", "articles": ["200"]},
+            ),
+            Document(
+                id="c1969",
+                page_content="",
+                metadata={"source": "codigo_civil.pdf", "articles": ["1969"]},
+            ),
+        ]
+    )
+    index.save()
+    return ArticleIndex(tmp_path / "article_index.json")
+
+
+##############################################
+# Reference parsing tests
+##############################################
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("artículo 200 del Código Penal", ["200"]),
+        ("¿Qué dice el Art. 1969?", ["1969"]),
+        ("arts. 200 y 201 del código penal", ["200", "201"]),
+        ("Articulos 200-a, 201", ["200-A", "201"]),
+        ("artículo 200 y 5 años de prisión", ["200"]),
+        ("arts. 200, 201 y 3 días", ["200", "201"]),
+        ("¿Qué dicen los artículos 200 y 201?", ["200", "201"]),
+        ("¿Qué es la legítima defensa?", []),
+    ],
+)
+def test_article_references(query, expected):
+    assert article_references(query) == expected
+
+
+##############################################
+# Lookup tests
+##############################################
+def test_lookup_resolves_code_from_query(tmp_path):
+    lookup = ArticleLookup(make_index(tmp_path), max_chunks=8)
+
+    assert lookup.match("artículo 200 del Código Penal") == ["p200", "p200b"]
+    assert lookup.match("artículo 200 del Código Civil") == ["c200"]
+
+
+def test_lookup_without_code_needs_a_single_source(tmp_path):
+    lookup = ArticleLookup(make_index(tmp_path), max_chunks=8)
+
+    assert lookup.match("artículo 1969") == ["c1969"]
+    assert lookup.match("artículo 200") == []
+
+
+def test_lookup_misses_fall_back(tmp_path):
+    lookup = ArticleLookup(make_index(tmp_path), max_chunks=1)
+
+    assert lookup.match("artículo 999 del Código Penal") == []
+    assert lookup.match("arts. 200 y 201 del Código Penal") == ["p200"]
+
+
+def test_lookup_with_unindexed_code_falls_back(tmp_path):
+    lookup = ArticleLookup(make_index(tmp_path), max_chunks=8)
+
+    assert lookup.match("artículo 1969 del Código Tributario") == []
+    assert lookup.match("artículo 1969 del código sobre daños") == ["c1969"]
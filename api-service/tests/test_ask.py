@@ -6,8 +6,9 @@ from contextlib import contextmanager
 from fastapi.testclient import TestClient
 
 from app.deps import get_rag_service
-from app.schemas.ask import AskResponse
+from app.schemas.ask import STREAM_SCHEMA_VERSION, AskResponse
 from app.main import app
+from app.services.event_stream import STREAM_ERROR_MESSAGE
 
 
 class FakeRag:
@@ -15,42 +16,44 @@ class FakeRag:
         self.request = None
         self.retrieval_type = None
 
-    def run_rag_pipeline_stream(self, ask_request, retrieval_type) -> Any:
+    async def run_rag_pipeline_stream(self, ask_request, retrieval_type) -> Any:
         self.request = ask_request
         self.retrieval_type = retrieval_type
 
-        def sse(data: AskResponse) -> bytes:
-            return f"{json.dumps(data.model_dump())}\n\n".encode("utf-8")
-
-        yield sse(AskResponse(stage="tok", data=""))
-        yield sse(AskResponse(stage="tok", data="Hello"))
-        yield sse(AskResponse(stage="tok", data="Hello World"))
-        yield sse(
-            AskResponse(
-                stage="end",
-                data="Hello World!",
-                contexts=[
-                    {
-                        "document": "Document 1",
-                        "source": "hello_world.pdf",
-                        "page": 2,
-                        "total_pages": 40,
-                        "score": 0.9,
-                        "text": "Hello World!",
-                    },
-                    {
-                        "document": "Document 2",
-                        "source": "hello_world.pdf",
-                        "page": 9,
-                        "total_pages": 40,
-                        "score": 0.7,
-                        "text": "Hello Mini World!",
-                    },
-                ],
-            )
+        yield AskResponse(stage="tok", data="")
+        yield AskResponse(stage="tok", data="Hello")
+        yield AskResponse(stage="tok", data=" World")
+        yield AskResponse(
+            stage="end",
+            data="Hello World!",
+            contexts=[
+                {
+                    "document": "Document 1",
+                    "source": "hello_world.pdf",
+                    "page": 2,
+                    "total_pages": 40,
+                    "score": 0.9,
+                    "text": "Hello World!",
+                },
+                {
+                    "document": "Document 2",
+                    "source": "hello_world.pdf",
+                    "page": 9,
+                    "total_pages": 40,
+                    "score": 0.7,
+                    "text": "Hello Mini World!",
+                },
+            ],
         )
 
 
+class FakeRagMidStreamError:
+    async def run_rag_pipeline_stream(self, ask_request, retrieval_type):
+        _ = (ask_request, retrieval_type)
+        yield AskResponse(stage="tok", data="Hello")
+        raise RuntimeError("llm down")
+
+
 class FakeRagValueError:
     def run_rag_pipeline_stream(self, ask_request, retrieval_type):
         _ = (ask_request, retrieval_type)
@@ -74,28 +77,22 @@ def override_rag_dependencie(fake):
 
 def _iter_stream(resp):
     """
-    Iterate over a streaming HTTP response, yielding parsed JSON objects.
+    Iterate over a Server-Sent Events response, yielding the parsed JSON of each event.
+    Frames may be split across, or packed into, raw chunks.
     """
-    try:
-        raw_chunk = next(resp.iter_raw())
-    except StopIteration:
-        return
-    except Exception as exc:
-        raise RuntimeError(f"Failed to read from response stream: {exc}")
-
-    try:
-        decoded_data = raw_chunk.decode("utf-8")
-    except UnicodeDecodeError as exc:
-        raise ValueError(f"Failed to decode response chunk: {exc}")
-
-    for entry in decoded_data.split("\n\n"):
-        entry = entry.strip()
-        if not entry:
-            continue
-        try:
-            yield json.loads(entry)
-        except json.JSONDecodeError as exc:
-            raise ValueError(f"Failed to parse JSON from stream entry: {exc}\nEntry: {entry}")
+    buffer = ""
+    for raw_chunk in resp.iter_raw():
+        buffer += raw_chunk.decode("utf-8")
+        *frames, buffer = buffer.split("\n\n")
+        for frame in frames:
+            fields = dict(line.split(": ", 1) for line in frame.splitlines())
+            try:
+                event = json.loads(fields["data"])
+            except (KeyError, json.JSONDecodeError) as exc:
+                raise ValueError(f"Malformed event: {exc}\nFrame: {frame}")
+            assert fields["event"] == event["stage"]
+            yield event
+    assert buffer == "", f"Unterminated frame: {buffer}"
 
 
 ##############################################
@@ -107,6 +104,7 @@ def _iter_stream(resp):
         ({"query": "hola"}, 12, "spanish"),  # defaults
         ({"query": "hi", "k": 5, "temperature": 0.2, "language": "english"}, 5, "english"),
         ({"query": "auto lang", "language": "auto"}, 12, "auto"),
+        ({"query": "diverse", "fetch_k": 40, "lambda_mult": 0.2}, 12, "spanish"),
     ],
 )
 def test_streaming_happy_path(payload, expect_k, expect_lang):
@@ -115,19 +113,22 @@ def test_streaming_happy_path(payload, expect_k, expect_lang):
         client = TestClient(app)
         with client.stream("POST", "/api/ask", json=payload) as resp:
             assert resp.status_code == 200
+            assert resp.headers["content-type"].startswith("text/event-stream")
             events = [re for re in _iter_stream(resp)]
 
-            assert events[0]["stage"] == "tok"
-            assert events[1]["stage"] == "tok"
-            assert events[2]["stage"] == "tok"
-            assert events[3]["stage"] == "end"
-            assert events[3]["data"] == "Hello World!"
-            assert isinstance(events[3].get("contexts"), list)
+            # Tokens produced together are coalesced into one event
+            assert [event["stage"] for event in events] == ["tok", "end"]
+            assert events[0]["data"] == "Hello World"
+            assert events[1]["data"] == "Hello World!"
+            assert isinstance(events[1].get("contexts"), list)
+            assert all(event["version"] == STREAM_SCHEMA_VERSION for event in events)
 
             # Request validation
             assert fake_rag.retrieval_type == "mmr"
             assert getattr(fake_rag.request, "k", None) == expect_k
             assert getattr(fake_rag.request, "language", None) == expect_lang
+            assert fake_rag.request.fetch_k == payload.get("fetch_k")
+            assert fake_rag.request.lambda_mult == payload.get("lambda_mult", 0.5)
 
 
 ##############################################
@@ -140,6 +141,8 @@ def test_streaming_happy_path(payload, expect_k, expect_lang):
         {"query": None},  # invalid type
         {"query": "hi", "language": "german"},  # invalid name
         {"query": "hi", "k": "auto"},  # invalid k
+        {"query": "hi", "fetch_k": 0},  # fetch_k out of range
+        {"query": "hi", "lambda_mult": 1.5},  # lambda_mult out of range
     ],
 )
 def test_validation_errors_422(payload):
@@ -167,3 +170,15 @@ def test_internal_errors(payload, fake, expected_detail):
         assert resp.status_code == 500
         data = resp.json()
         assert data.get("detail") == expected_detail
+
+
+def test_error_after_streaming_started_is_sent_as_event():
+    with override_rag_dependencie(FakeRagMidStreamError()):
+        client = TestClient(app)
+        with client.stream("POST", "/api/ask", json={"query": "hi"}) as resp:
+            assert resp.status_code == 200
+            events = list(_iter_stream(resp))
+
+    assert [event["stage"] for event in events] == ["tok", "error"]
+    # Internal error text is not leaked to the client
+    assert events[-1]["data"] == STREAM_ERROR_MESSAGE
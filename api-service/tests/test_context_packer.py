@@ -0,0 +1,72 @@
+import pytest
+
+from app.services.context_packer import ContextPacker, merge_overlap
+
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+
+def ctx(text, source="codigo_penal.pdf", page=0, articles=None, score=0.5):
+    document = {"id": text[:8], "text": text, "source": source, "page": page}
+    if articles:
+        document["articles"] = articles
+    return {"id": text[:8], "index": 0, "score": score, "document": document}
+
+
+ARTICLE = " ".join(f"palabra{i}" for i in range(60))
+FIRST, SECOND = ARTICLE[:300], ARTICLE[240:]
+
+
+##############################################
+# Overlap merging tests
+##############################################
+@pytest.mark.parametrize(
+    "first, second, expected",
+    [
+        (FIRST, SECOND, ARTICLE),
+        (ARTICLE, SECOND, ARTICLE),  # contained
+        ("Artículo 1. Uno.", "Artículo 2. Dos.", None),
+    ],
+)
+def test_merge_overlap(first, second, expected):
+    assert merge_overlap(first, second, max_overlap=100) == expected
+
+
+##############################################
+# Packing tests
+##############################################
+def test_adjacent_chunks_of_same_page_are_merged_once():
+    packer = ContextPacker(word_count, max_tokens=1000, max_overlap=100)
+
+    packed = packer.pack([ctx(SECOND, articles=["200"]), ctx(FIRST, articles=["200"])])
+
+    assert packed == f"[1] codigo_penal.pdf, p. 1, art. 200\n{ARTICLE}"
+
+
+def test_different_pages_stay_separate_with_compact_citations():
+    packer = ContextPacker(word_count, max_tokens=1000)
+
+    packed = packer.pack(
+        [
+            ctx("Texto del artículo 200.", page=4, articles=["200"]),
+            ctx("Texto del artículo 1969.", source="codigo_civil.pdf", page=9),
+        ]
+    )
+
+    assert packed == (
+        "[1] codigo_penal.pdf, p. 5, art. 200\nTexto del artículo 200.\n\n"
+        "[2] codigo_civil.pdf, p. 10\nTexto del artículo 1969."
+    )
+    assert "metadata" not in packed and "score" not in packed
+
+
+def test_token_budget_truncates_last_passage():
+    packer = ContextPacker(word_count, max_tokens=30)
+
+    packed = packer.pack([ctx("uno dos tres", page=0), ctx(ARTICLE, page=1), ctx("fin", page=2)])
+
+    assert word_count(packed) <= 30
+    assert packed.startswith("[1] codigo_penal.pdf, p. 1\nuno dos tres\n\n[2]")
+    assert packed.endswith("…")
+    assert "[3]" not in packed
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from app.services.embedding_cache import CachedQueryEmbeddings, normalize_query
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [float(len(text))]
+
+
+##############################################
+# Normalization tests
+##############################################
+@pytest.mark.parametrize(
+    "query",
+    [
+        "¿Qué dice el artículo 1969 del Código Civil?",
+        "qué dice el   artículo 1969 del código civil",
+        "  QUÉ DICE EL ARTÍCULO 1969 DEL CÓDIGO CIVIL?  ",
+    ],
+)
+def test_normalize_query_equivalent_spellings(query):
+    assert normalize_query(query) == "qué dice el artículo 1969 del código civil"
+
+
+##############################################
+# Cache behaviour tests
+##############################################
+def test_repeated_queries_hit_cache():
+    inner = CountingEmbeddings()
+    cache = CachedQueryEmbeddings(inner, model="m", max_size=10, ttl_seconds=60)
+
+    cache.embed_query("¿Artículo 200?")
+    asyncio.run(cache.aembed_query("artículo 200"))
+
+    assert inner.calls == 1
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    inner = CountingEmbeddings()
+    cache = CachedQueryEmbeddings(inner, model="m", max_size=2, ttl_seconds=10)
+
+    cache.embed_query("a")
+    cache.embed_query("b")
+    cache.embed_query("a")  # refresh "a", "b" is now least recently used
+    cache.embed_query("c")  # evicts "b"
+    cache.embed_query("b")
+    assert inner.calls == 4
+
+    now = time.monotonic()
+    monkeypatch.setattr("app.services.embedding_cache.time.monotonic", lambda: now + 60)
+    cache.embed_query("c")
+    assert inner.calls == 5
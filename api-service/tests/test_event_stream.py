@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+import pytest
+
+from app.schemas.ask import STREAM_SCHEMA_VERSION, AskResponse
+from app.services.event_stream import coalesce_tokens, format_sse
+
+
+async def tokens(pieces, delays=None, end=True):
+    for i, piece in enumerate(pieces):
+        if delays:
+            await asyncio.sleep(delays[i])
+        yield AskResponse(stage="tok", data=piece)
+    if end:
+        yield AskResponse(stage="end", data="".join(pieces))
+
+
+def coalesced(source, interval_ms=50, max_tokens=16):
+    async def main():
+        return [r async for r in coalesce_tokens(source, interval_ms, max_tokens)]
+
+    return asyncio.run(main())
+
+
+##############################################
+# Framing tests
+##############################################
+def test_format_sse_frames_one_event():
+    frame = format_sse(AskResponse(stage="tok", data="línea 1\nlínea 2")).decode("utf-8")
+
+    assert frame.endswith("\n\n")
+    event, data = frame[:-2].split("\n")
+    assert event == "event: tok"
+    payload = json.loads(data.removeprefix("data: "))
+    assert payload["data"] == "línea 1\nlínea 2"
+    assert payload["version"] == STREAM_SCHEMA_VERSION
+
+
+##############################################
+# Coalescing tests
+##############################################
+@pytest.mark.parametrize(
+    "max_tokens, expected",
+    [
+        (16, ["abcde", "abcde"]),
+        (2, ["ab", "cd", "e", "abcde"]),
+    ],
+)
+def test_burst_is_coalesced_up_to_max_tokens(max_tokens, expected):
+    responses = coalesced(tokens(list("abcde")), max_tokens=max_tokens)
+
+    assert [r.data for r in responses] == expected
+    assert [r.stage for r in responses][-1] == "end"
+
+
+def test_slow_tokens_are_flushed_after_interval():
+    responses = coalesced(tokens(["a", "b", "c"], delays=[0, 0, 0.1]), interval_ms=30)
+
+    assert [r.data for r in responses] == ["ab", "c", "abc"]
+
+
+def test_pending_tokens_flushed_when_stream_ends():
+    responses = coalesced(tokens(["a", "b"], end=False))
+
+    assert [(r.stage, r.data) for r in responses] == [("tok", "ab")]
+
+
+def test_source_closed_when_consumer_leaves():
+    closed = []
+
+    async def source():
+        try:
+            for piece in "abcdef":
+                await asyncio.sleep(0.01)
+                yield AskResponse(stage="tok", data=piece)
+        finally:
+            closed.append(True)
+
+    async def main():
+        stream = coalesce_tokens(source(), interval_ms=5, max_tokens=16)
+        first = await anext(stream)
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(main()).stage == "tok"
+    assert closed == [True]
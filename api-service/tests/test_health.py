@@ -0,0 +1,120 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.configs.config import StartupConfig, get_settings
+from app.main import app
+
+
+##############################################
+# Liveness / readiness tests
+##############################################
+def test_liveness_answers_before_startup():
+    client = TestClient(app)
+    resp = client.get("/api/health/")
+    assert resp.status_code == 200
+
+
+def test_not_ready_until_rag_service_is_warm():
+    client = TestClient(app)
+    app.state.rag = None
+
+    resp = client.get("/api/health/ready")
+    assert resp.status_code == 503
+    assert resp.json() == {"ready": False}
+
+    resp = client.post("/api/ask", json={"query": "hola"})
+    assert resp.status_code == 503
+
+
+def test_ready_once_rag_service_is_set():
+    client = TestClient(app)
+    app.state.rag = object()
+    try:
+        resp = client.get("/api/health/ready")
+        assert resp.status_code == 200
+        assert resp.json() == {"ready": True}
+    finally:
+        app.state.rag = None
+
+
+##############################################
+# Preload tests
+##############################################
+class FakeRagService:
+    def __init__(self, fail_start: bool = False):
+        self.fail_start = fail_start
+        self.closed = False
+
+    async def start(self):
+        if self.fail_start:
+            raise RuntimeError("index unavailable")
+
+    async def aclose(self):
+        self.closed = True
+
+
+def preload_settings():
+    return get_settings().model_copy(
+        update={
+            "startup": StartupConfig(preload_retry_seconds=0.01, preload_max_retry_seconds=0.02)
+        }
+    )
+
+
+def test_preload_retries_with_backoff(monkeypatch):
+    built = [FakeRagService(fail_start=True), FakeRagService(fail_start=True), FakeRagService()]
+    monkeypatch.setattr(main, "_build_rag_service", lambda settings: built[len(attempts)])
+    attempts: list[None] = []
+
+    async def count_sleep(delay, sleep=asyncio.sleep):
+        attempts.append(None)
+        await sleep(delay)
+
+    monkeypatch.setattr(main.asyncio, "sleep", count_sleep)
+    fake_app = SimpleNamespace(state=SimpleNamespace(rag=None))
+
+    asyncio.run(main._preload(fake_app, preload_settings(), retry=True))
+
+    assert fake_app.state.rag is built[2]
+    assert built[0].closed and built[1].closed and not built[2].closed
+
+
+def test_preload_without_retry_gives_up(monkeypatch):
+    monkeypatch.setattr(main, "_build_rag_service", lambda settings: FakeRagService(True))
+    fake_app = SimpleNamespace(state=SimpleNamespace(rag=None))
+
+    asyncio.run(main._preload(fake_app, preload_settings(), retry=False))
+
+    assert fake_app.state.rag is None
+
+
+def test_cancelled_preload_closes_the_service_being_built(monkeypatch):
+    rag = FakeRagService()
+    building = threading.Event()
+    release = threading.Event()
+
+    def slow_build(settings):
+        building.set()
+        release.wait(5)
+        return rag
+
+    monkeypatch.setattr(main, "_build_rag_service", slow_build)
+    fake_app = SimpleNamespace(state=SimpleNamespace(rag=None))
+
+    async def cancel_while_building():
+        task = asyncio.create_task(main._preload(fake_app, preload_settings(), retry=True))
+        await asyncio.to_thread(building.wait, 5)
+        task.cancel()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_while_building())
+
+    assert rag.closed
+    assert fake_app.state.rag is None
@@ -0,0 +1,60 @@
+import logging
+import subprocess
+import sys
+
+import pytest
+
+# Modules that must only be imported by the background preload, never by `import app.main`
+HEAVY_MODULES = [
+    "langchain",
+    "langchain_core.runnables",
+    "langchain_huggingface",
+    "langchain_openai",
+    "langchain_pinecone",
+    "langsmith",
+    "numpy",
+    "torch",
+]
+
+logger = logging.getLogger(__name__)
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Import `module` in a fresh interpreter with `python -X importtime` and return the
+    cumulative import time in microseconds of every module it pulled in.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.fixture(scope="module")
+def app_import_times():
+    return import_times("app.main")
+
+
+##############################################
+# Import-time report tests
+##############################################
+@pytest.mark.parametrize("heavy", HEAVY_MODULES)
+def test_app_main_does_not_import_heavy_modules(app_import_times, heavy):
+    assert heavy not in app_import_times
+
+
+def test_import_time_report(app_import_times):
+    slowest = sorted(app_import_times.items(), key=lambda item: item[1], reverse=True)[:10]
+    report = "\n".join(f"  {micros / 1000:8.1f} ms  {name}" for name, micros in slowest)
+    # Shown with `pytest --log-cli-level=INFO`, and in the failure message otherwise
+    logger.info(f"Slowest imports of app.main (cumulative):\n{report}")
+    assert "app.main" in app_import_times, f"app.main was not imported:\n{report}"
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.metrics import STAGE_SECONDS, Counter, Histogram, Registry
+from app.services.telemetry import PipelineTrace
+
+
+##############################################
+# Exposition format tests
+##############################################
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "retrieve")
+
+    lines = histogram.render().splitlines()
+
+    assert lines[:2] == ["# HELP latency_seconds Latency.", "# TYPE latency_seconds histogram"]
+    assert lines[2:] == [
+        'latency_seconds_bucket{stage="retrieve",le="0.1"} 1',
+        'latency_seconds_bucket{stage="retrieve",le="1"} 3',
+        'latency_seconds_bucket{stage="retrieve",le="+Inf"} 4',
+        'latency_seconds_sum{stage="retrieve"} 4.05',
+        'latency_seconds_count{stage="retrieve"} 4',
+    ]
+
+
+def test_counter_merges_incremented_and_sourced_values():
+    counter = Counter(
+        "lookups_total",
+        "Lookups.",
+        ("cache", "result"),
+        source=lambda: {("answer", "hit"): 3},
+    )
+    counter.inc("article_index", "miss")
+    counter.inc("article_index", "miss")
+
+    registry = Registry()
+    registry.register(counter)
+
+    assert registry.render().splitlines()[2:] == [
+        'lookups_total{cache="answer",result="hit"} 3',
+        'lookups_total{cache="article_index",result="miss"} 2',
+    ]
+
+
+##############################################
+# Stage timing tests
+##############################################
+@pytest.mark.parametrize("stages", [["retrieve"], ["retrieve", "rerank", "pack"]])
+def test_pipeline_trace_records_every_stage(stages):
+    before = {stage: STAGE_SECONDS.count(stage) for stage in stages + ["pipeline"]}
+
+    trace = PipelineTrace()
+    assert PipelineTrace.current() is trace
+    for stage in stages:
+        with trace.stage(stage):
+            time.sleep(0.001)
+    trace.finish("answered")
+
+    assert PipelineTrace.current() is None
+    for stage, count in before.items():
+        assert STAGE_SECONDS.count(stage) == count + stages.count(stage) + (stage == "pipeline")
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    trace = PipelineTrace()
+    with trace.stage("retrieve"):
+        pass
+    trace.finish("answered")
+
+    resp = TestClient(app).get("/api/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "# TYPE rag_stage_duration_seconds histogram" in resp.text
+    assert 'rag_stage_duration_seconds_count{stage="retrieve"}' in resp.text
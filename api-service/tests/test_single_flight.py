@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+class SlowSource:
+    def __init__(self, items, delay=0.01, fail_at=None):
+        self.items = items
+        self.delay = delay
+        self.fail_at = fail_at
+        self.runs = 0
+        self.cancelled = False
+
+    async def __call__(self):
+        self.runs += 1
+        try:
+            for i, item in enumerate(self.items):
+                if i == self.fail_at:
+                    raise RuntimeError("llm down")
+                await asyncio.sleep(self.delay)
+                yield item
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def collect(flight, key, source, start_delay=0.0):
+    await asyncio.sleep(start_delay)
+    return [item async for item in flight.stream(key, source)]
+
+
+##############################################
+# Coalescing tests
+##############################################
+def test_concurrent_identical_requests_share_one_run():
+    source = SlowSource(["a", "b", "c", "d"])
+    flight = SingleFlight()
+
+    async def main():
+        return await asyncio.gather(*[collect(flight, "q", source) for _ in range(10)])
+
+    results = asyncio.run(main())
+    assert source.runs == 1
+    assert all(result == ["a", "b", "c", "d"] for result in results)
+    assert (flight.started, flight.joined) == (1, 9)
+    assert len(flight) == 0
+
+
+def test_late_joiner_receives_prefix():
+    source = SlowSource(["a", "b", "c", "d", "e"], delay=0.02)
+    flight = SingleFlight()
+
+    async def main():
+        return await asyncio.gather(
+            collect(flight, "q", source), collect(flight, "q", source, start_delay=0.05)
+        )
+
+    first, late = asyncio.run(main())
+    assert source.runs == 1
+    assert first == late == ["a", "b", "c", "d", "e"]
+
+
+def test_different_keys_and_finished_flights_run_again():
+    source = SlowSource(["a"])
+    flight = SingleFlight()
+
+    async def main():
+        await asyncio.gather(collect(flight, "q1", source), collect(flight, "q2", source))
+        await collect(flight, "q1", source)
+
+    asyncio.run(main())
+    assert source.runs == 3
+
+
+##############################################
+# Failure and cancellation tests
+##############################################
+def test_errors_reach_every_subscriber():
+    source = SlowSource(["a", "b", "c"], fail_at=2)
+    flight = SingleFlight()
+
+    async def main():
+        return await asyncio.gather(
+            collect(flight, "q", source), collect(flight, "q", source), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(flight) == 0
+
+
+def test_source_cancelled_when_every_subscriber_leaves():
+    source = SlowSource(["a", "b", "c", "d"], delay=0.05)
+    flight = SingleFlight()
+
+    async def main():
+        stream = flight.stream("q", source)
+        assert await anext(stream) == "a"
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert source.cancelled
+    assert len(flight) == 0
+
+
+@pytest.mark.parametrize("subscribers", [1, 5])
+def test_single_subscriber_is_transparent(subscribers):
+    source = SlowSource(["x", "y"], delay=0)
+    flight = SingleFlight()
+
+    async def main():
+        return await asyncio.gather(*[collect(flight, "q", source) for _ in range(subscribers)])
+
+    assert asyncio.run(main()) == [["x", "y"]] * subscribers
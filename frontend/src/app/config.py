@@ -12,9 +12,18 @@ class Retrieve(BaseModel):
     temperature: float = Field(default=0.5)
 
 
+class Client(BaseModel):
+    connect_timeout: float = Field(default=3.05, description="Seconds to open a connection")
+    read_timeout: float = Field(default=60.0, description="Seconds to wait between chunks")
+    pool_size: int = Field(default=10, description="Pooled connections kept to the API")
+    cache_size: int = Field(default=64, description="Recent answers kept client-side")
+    cache_ttl_seconds: float = Field(default=600.0, description="Lifetime of a cached answer")
+
+
 class Settings(BaseYamlSettings):
     api_url: str = "http://localhost:8000/api"
     retrieve: Retrieve = Retrieve()
+    client: Client = Client()
     log_level: str = "ERROR"
 
     model_config = YamlSettingsConfigDict(
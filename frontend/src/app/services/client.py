@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+@st.cache_resource
+def get_session(pool_size: int) -> requests.Session:
+    """
+    HTTP session shared by every rerun and every user of this Streamlit process, so
+    questions reuse pooled keep-alive connections to the API instead of opening new ones.
+    """
+    logger.info(f"Creating pooled HTTP session with {pool_size} connections")
+    session = requests.Session()
+    # Only failed connects are retried: a question may not be sent twice
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class RecentAnswers:
+    """
+    LRU cache of the answers to recently asked questions, keyed by the normalized
+    question and its retrieval parameters. Entries expire after `ttl_seconds`.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float, str, list[dict[str, Any]]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query: str, k: int, temperature: float) -> tuple:
+        return (" ".join(query.lower().split()), k, temperature)
+
+    def get(self, key: tuple) -> tuple[str, list[dict[str, Any]]] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, answer, contexts = entry
+            if time.monotonic() - created > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return answer, contexts
+
+    def put(self, key: tuple, answer: str, contexts: list[dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), answer, contexts)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@st.cache_resource
+def get_recent_answers(max_size: int, ttl_seconds: float) -> RecentAnswers:
+    return RecentAnswers(max_size, ttl_seconds)
@@ -1,41 +1,120 @@
+import codecs
 import logging
 import json
+from typing import Any, Iterable, Iterator
+
 import requests
 import streamlit as st
 
+from app.services.client import RecentAnswers, get_recent_answers, get_session
+
+# Version of the /ask event stream format this client understands
+STREAM_SCHEMA_VERSION = 1
+
+ERROR_MESSAGE = (
+    "Lo sentimos, hubo un problema al procesar la respuesta. Por favor, intenta nuevamente."
+)
+
+# Admission control answers these while the API is saturated or still warming up
+BUSY_STATUS_CODES = (429, 503)
+
+logger = logging.getLogger(__name__)
+
+
+def busy_message(retry_after: str | None) -> str:
+    """
+    Message shown when the API sheds the request, with the wait from its `Retry-After`
+    header when it is given in seconds.
+    """
+    if retry_after is not None and retry_after.strip().isdigit():
+        return (
+            "El servidor está ocupado. Por favor, intenta nuevamente en " f"{int(retry_after)} s."
+        )
+    return "El servidor está ocupado. Por favor, intenta nuevamente en unos segundos."
+
+
+def iter_events(chunks: Iterable[bytes]) -> Iterator[dict[str, Any]]:
+    """
+    Incrementally parse a Server-Sent Events byte stream into its JSON events.
+    Chunks may split a frame, or even a UTF-8 character, at any byte.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    for chunk in chunks:
+        buffer += decoder.decode(chunk).replace("\r\n", "\n")
+        *frames, buffer = buffer.split("\n\n")
+        for frame in frames:
+            data = [line[5:].lstrip() for line in frame.split("\n") if line.startswith("data:")]
+            if not data:
+                continue  # comments and keep-alives
+            try:
+                event = json.loads("\n".join(data))
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON decode error: {e}")
+                raise InterruptedError(ERROR_MESSAGE)
+            if event.get("version") != STREAM_SCHEMA_VERSION:
+                logger.warning(f"Unexpected stream schema version {event.get('version')}")
+            yield event
+    if buffer.strip():
+        logger.error(f"Stream ended inside an event: {buffer!r}")
+        raise InterruptedError(ERROR_MESSAGE)
+
 
 def stream_data(query, settings):
-    logger = logging.getLogger(__name__)
-    contexts = []
+    """
+    Stream the answer to `query` over the pooled session, yielding its tokens and storing
+    its contexts in the session state. Recently answered questions are served locally.
+    """
+    recent = get_recent_answers(settings.client.cache_size, settings.client.cache_ttl_seconds)
+    key = RecentAnswers.key(query, settings.retrieve.k, settings.retrieve.temperature)
+    cached = recent.get(key)
+    if cached is not None:
+        answer, contexts = cached
+        logger.info("Answer served from the recent questions cache")
+        st.session_state["contexts"] = contexts
+        yield answer
+        return
+
     payload = {
         "query": query,
         "k": settings.retrieve.k,
         "temperature": settings.retrieve.temperature,
     }
+    session = get_session(settings.client.pool_size)
+    timeout = (settings.client.connect_timeout, settings.client.read_timeout)
+    tokens = []
     logger.info(f"Sending POST request to {settings.api_url}/ask/ with payload: {payload}")
     try:
-        with requests.post(f"{settings.api_url}/ask/", json=payload, stream=True) as r:
+        with session.post(
+            f"{settings.api_url}/ask/", json=payload, stream=True, timeout=timeout
+        ) as r:
             logger.info(f"Received response with status code: {r.status_code}")
-            for chunk in r.iter_content(chunk_size=None):
-                if chunk:
-                    try:
-                        response = json.loads(chunk.decode("utf-8"))  # Deserialize JSON
-                        logger.debug(f"Received chunk: {response}")
-                    except json.JSONDecodeError as e:
-                        logger.error(f"JSON decode error: {e}")
-                        raise InterruptedError(
-                            "Lo sentimos, hubo un problema al procesar la respuesta. Por favor, intenta nuevamente."
-                        )
-
-                    stage = response.get("stage")
-                    data = response.get("data")
-                    if stage == "tok":
-                        logger.debug(f"Yielding data: {data}")
-                        yield data
-                    elif stage == "end":
-                        contexts = response.get("contexts", [])
-                        logger.debug(f"End of stream. Contexts: {contexts}")
-                        st.session_state["contexts"] = contexts
+            if r.status_code in BUSY_STATUS_CODES:
+                retry_after = r.headers.get("Retry-After")
+                logger.warning(f"Server busy ({r.status_code}), Retry-After: {retry_after}")
+                raise InterruptedError(busy_message(retry_after))
+            r.raise_for_status()
+            for response in iter_events(r.iter_content(chunk_size=None)):
+                logger.debug(f"Received event: {response}")
+                stage = response.get("stage")
+                data = response.get("data")
+                if stage == "tok":
+                    logger.debug(f"Yielding data: {data}")
+                    tokens.append(data)
+                    yield data
+                elif stage == "end":
+                    contexts = response.get("contexts") or []
+                    logger.debug(f"End of stream. Contexts: {contexts}")
+                    st.session_state["contexts"] = contexts
+                    recent.put(key, data or "".join(tokens), contexts)
+                elif stage == "error":
+                    logger.error(f"Server error while streaming: {data}")
+                    raise InterruptedError(ERROR_MESSAGE)
+    except requests.Timeout as e:
+        logger.error(f"Request timed out: {e}")
+        raise InterruptedError(
+            "La consulta tardó demasiado en responder. Por favor, intenta nuevamente."
+        )
     except requests.RequestException as e:
         logger.error(f"Request failed: {e}")
         raise
@@ -1,16 +1,27 @@
 import json
+import pytest
 import streamlit as st
 from unittest.mock import patch, MagicMock
 from app.config import get_settings
 from app.main import stream_data
+from app.services.client import get_recent_answers
+from app.services.utils import iter_events
 import streamlit.testing.v1 as st_test
 
 
-def make_response(chunks):
-    """Helper: simula la respuesta de requests.post con iter_content."""
+def sse(events):
+    """Helper: serializa eventos en el formato Server-Sent Events del backend."""
+    return "".join(
+        f"event: {e['stage']}\ndata: {json.dumps({**e, 'version': 1})}\n\n" for e in events
+    ).encode("utf-8")
+
+
+def make_response(chunks, size=7):
+    """Helper: simula la respuesta de requests.post con iter_content, en trozos arbitrarios."""
+    body = sse(chunks)
     mock_resp = MagicMock()
     mock_resp.__enter__.return_value = mock_resp  # para usar "with"
-    mock_resp.iter_content.return_value = [json.dumps(chunk).encode("utf-8") for chunk in chunks]
+    mock_resp.iter_content.return_value = [body[i : i + size] for i in range(0, len(body), size)]
     return mock_resp
 
 
@@ -24,8 +35,11 @@ def test_stream_data_yields_tokens_and_stores_contexts(monkeypatch):
 
     mock_response = make_response(fake_chunks)
 
-    # parcheamos requests.post para que devuelva nuestro fake
-    with patch("app.services.utils.requests.post", return_value=mock_response):
+    # parcheamos la sesión compartida para que devuelva nuestro fake
+    session = MagicMock()
+    session.post.return_value = mock_response
+    get_recent_answers.clear()
+    with patch("app.services.utils.get_session", return_value=session):
         settings = get_settings()
         tokens = list(stream_data("hola", settings))
 
@@ -36,6 +50,66 @@ def test_stream_data_yields_tokens_and_stores_contexts(monkeypatch):
 
     assert "contexts" in st.session_state
     assert st.session_state["contexts"][0]["document"]["source"] == "doc.pdf"
+    _, kwargs = session.post.call_args
+    assert kwargs["timeout"] == (settings.client.connect_timeout, settings.client.read_timeout)
+
+
+def test_repeated_question_is_served_from_recent_answers():
+    fake_chunks = [
+        {"stage": "tok", "data": "Hola"},
+        {"stage": "end", "data": "Hola", "contexts": [{"document": {"source": "doc.pdf"}}]},
+    ]
+    session = MagicMock()
+    session.post.return_value = make_response(fake_chunks)
+    get_recent_answers.clear()
+    with patch("app.services.utils.get_session", return_value=session):
+        settings = get_settings()
+        first = list(stream_data("¿Qué es la extorsión?", settings))
+        st.session_state.clear()
+        second = list(stream_data("  ¿qué es la   extorsión?", settings))
+
+    assert first == second == ["Hola"]
+    assert session.post.call_count == 1
+    assert st.session_state["contexts"][0]["document"]["source"] == "doc.pdf"
+
+
+@pytest.mark.parametrize(
+    "status, retry_after, expected",
+    [
+        (429, "5", "intenta nuevamente en 5 s."),
+        (503, "12", "intenta nuevamente en 12 s."),
+        (503, None, "intenta nuevamente en unos segundos."),
+        (429, "Wed, 21 Oct 2026 07:28:00 GMT", "intenta nuevamente en unos segundos."),
+    ],
+)
+def test_busy_server_shows_retry_after(status, retry_after, expected):
+    response = make_response([])
+    response.status_code = status
+    response.headers = {} if retry_after is None else {"Retry-After": retry_after}
+    session = MagicMock()
+    session.post.return_value = response
+    get_recent_answers.clear()
+    with patch("app.services.utils.get_session", return_value=session):
+        with pytest.raises(InterruptedError, match="El servidor está ocupado") as error:
+            list(stream_data("hola", get_settings()))
+
+    assert str(error.value).endswith(expected)
+    response.raise_for_status.assert_not_called()
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_iter_events_parses_split_frames(size):
+    events = [{"stage": "tok", "data": "Artículo 200"}, {"stage": "tok", "data": "ñandú\n"}]
+    body = b": keep-alive\n\n" + sse(events)
+
+    parsed = list(iter_events(body[i : i + size] for i in range(0, len(body), size)))
+
+    assert [e["data"] for e in parsed] == ["Artículo 200", "ñandú\n"]
+
+
+def test_iter_events_rejects_truncated_stream():
+    with pytest.raises(InterruptedError):
+        list(iter_events([sse([{"stage": "tok", "data": "Hola"}])[:-5]]))
 
 
 def test_app_renders():
@@ -0,0 +1,293 @@
+"""
+Ingestion throughput benchmark over a synthetic legal corpus.
+
+Generates multi-hundred-page codes (see benchmarks.corpus), then times each stage in
+isolation, pages/sec through the PDF loader, chunks/sec through TextProcessor, vectors/sec
+through StorageManager embedding and upserts into the local store, and the lexical indexes,
+followed by an end-to-end run of the ingest flow. Embeddings come from a deterministic
+fake model with a configurable per-batch delay, so only the pipeline itself is measured.
+Every stage reports wall time, throughput and the peak RSS reached so far. The end-to-end
+time includes starting Prefect's temporary server unless PREFECT_API_URL points to one.
+
+Peak RSS is a high-water mark, so to check that the streaming flow's memory stays flat,
+run it alone on corpora of growing size with a fixed budget; the run fails past it:
+    PYTHONPATH=src python -m benchmarks.bench_ingest --mode streaming --skip-stages \\
+        --files 20 --max-rss-mb 1500
+
+Usage (from ingest-pipeline):
+    PYTHONPATH=src python -m benchmarks.bench_ingest --files 3 --pages 300 \\
+        --loader parallel --output benchmarks/results/ingest.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from lib_utils.lexical.articles import ArticleIndex
+from lib_utils.lexical.bm25 import BM25Index
+
+from benchmarks.corpus import generate_corpus
+from pipelines.config.settings import Settings
+from pipelines.embeddings.Embeddings import EmbeddingService
+from pipelines.loaders.factory import get_loader
+from pipelines.processors.text_processor import TextProcessor
+from pipelines.storage.storage_manager import StorageManager
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic unit vectors seeded by each text's hash. `delay_ms` is awaited once per
+    batch, standing in for the round trip to a remote embedding API.
+    """
+
+    def __init__(self, size: int, delay_ms: float = 0.0):
+        self.size = size
+        self.delay_ms = delay_ms
+
+    def _embed(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+        vector = np.random.default_rng(seed).standard_normal(self.size, dtype=np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.delay_ms:
+            await asyncio.sleep(self.delay_ms / 1000)
+        return self.embed_documents(texts)
+
+
+def peak_rss_mb() -> dict[str, float]:
+    """
+    High-water resident set size of this process and of its largest child (loader workers).
+    """
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit, 1),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+class Stages:
+    """
+    Wall time, item throughput and peak RSS of each measured stage.
+    """
+
+    def __init__(self) -> None:
+        self.results: dict[str, dict[str, Any]] = {}
+
+    def record(self, name: str, seconds: float, items: int, unit: str) -> None:
+        self.results[name] = {
+            "wall_s": round(seconds, 3),
+            "items": items,
+            "unit": unit,
+            "per_s": round(items / seconds, 1) if seconds else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        print(f"{name:12} {seconds:8.2f}s  {items:8d} {unit:8} {items / seconds:10.1f}/s")
+
+
+def make_settings(args: argparse.Namespace, workdir: Path) -> Settings:
+    return Settings.model_validate(
+        {
+            "vector_store": {
+                "provider": "local",
+                "index_path": str(workdir / "vector_index"),
+                "lexical_index_path": str(workdir / "lexical_index"),
+                "article_index_path": str(workdir / "article_index.json"),
+                "quantization": args.quantization,
+                "ann_index": args.ann_index,
+            },
+            "embedding": {"size": args.dimension},
+            "ingest": {
+                "manifest_path": str(workdir / "manifest.json"),
+                "embedding_cache_path": (
+                    str(workdir / "embedding_cache.sqlite") if args.embedding_cache else None
+                ),
+                "mode": args.mode,
+                "loader": args.loader,
+                "splitter": args.splitter,
+            },
+        }
+    )
+
+
+async def run_stages(args: argparse.Namespace, paths: list[Path], settings: Settings) -> Stages:
+    stages = Stages()
+    embedding = FakeEmbeddings(args.dimension, args.embed_delay_ms)
+
+    loader = get_loader(settings)
+    started = time.perf_counter()
+    pages_by_file = [await loader.load(path) for path in paths]
+    pages = sum(len(file_pages) for file_pages in pages_by_file)
+    stages.record("load", time.perf_counter() - started, pages, "pages")
+
+    processor = TextProcessor(
+        chunk_size=settings.ingest.chunk_size,
+        overlap=settings.ingest.chunk_overlap,
+        splitter=settings.ingest.splitter,
+    )
+    started = time.perf_counter()
+    chunks: list[Document] = []
+    for file_pages in pages_by_file:
+        chunks.extend(processor.process_documents(file_pages))
+    stages.record("split", time.perf_counter() - started, len(chunks), "chunks")
+    del pages_by_file
+
+    storage = StorageManager(settings, embedding)
+    batch_size = settings.ingest.embedding_batch_size
+    batches = [chunks[i : i + batch_size] for i in range(0, len(chunks), batch_size)]
+    semaphore = asyncio.Semaphore(settings.ingest.max_in_flight)
+
+    async def embed(batch: list[Document]) -> list[list[float]]:
+        async with semaphore:
+            return await storage.embed_documents(batch)
+
+    started = time.perf_counter()
+    vectors = [vector for batch in await asyncio.gather(*map(embed, batches)) for vector in batch]
+    stages.record("embed", time.perf_counter() - started, len(vectors), "vectors")
+
+    started = time.perf_counter()
+    await storage.store_embeddings(chunks, vectors)
+    storage.close()
+    stages.record("upsert", time.perf_counter() - started, len(chunks), "vectors")
+
+    started = time.perf_counter()
+    for index in (
+        BM25Index(settings.vector_store.lexical_index_path),
+        ArticleIndex(settings.vector_store.article_index_path),
+    ):
+        index.add(chunks)
+        index.save()
+    stages.record("lexical", time.perf_counter() - started, len(chunks), "chunks")
+    return stages
+
+
+async def run_end_to_end(
+    args: argparse.Namespace, documents: Path, settings: Settings, stages: Stages
+) -> None:
+    # Imported here: importing the flows loads Prefect
+    from pipelines.orchestration.pipeline import document_processing_flow
+    from pipelines.orchestration.streaming import streaming_document_processing_flow
+
+    embedding = FakeEmbeddings(args.dimension, args.embed_delay_ms)
+    EmbeddingService.get_embedding_model = lambda self, settings: embedding  # type: ignore
+    flow = (
+        streaming_document_processing_flow
+        if settings.ingest.mode == "streaming"
+        else document_processing_flow
+    )
+    started = time.perf_counter()
+    stored = await flow(documents, settings)
+    elapsed = time.perf_counter() - started
+    # The batch flow returns the stored IDs, the streaming flow their count
+    count = len(stored) if isinstance(stored, list) else stored or 0
+    stages.record(f"e2e_{settings.ingest.mode}", elapsed, count, "chunks")
+
+
+async def main(args: argparse.Namespace) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        started = time.perf_counter()
+        paths = generate_corpus(workdir / "documents", args.files, args.pages, args.seed)
+        corpus_mb = sum(path.stat().st_size for path in paths) / 1024 / 1024
+        print(
+            f"Generated {args.files} x {args.pages} pages ({corpus_mb:.1f} MB) in "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+
+        stages = (
+            Stages()
+            if args.skip_stages
+            else await run_stages(args, paths, make_settings(args, workdir / "stages"))
+        )
+        if not args.skip_e2e:
+            settings = make_settings(args, workdir / "e2e")
+            await run_end_to_end(args, workdir / "documents", settings, stages)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {key: str(value) for key, value in vars(args).items()},
+        "corpus_mb": round(corpus_mb, 2),
+        "stages": stages.results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """
+    Lines describing the change of each stage's throughput against a baseline report.
+    """
+    lines = [f"Compared with {baseline.get('commit')} ({baseline.get('timestamp')}):"]
+    for name, stage in report["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before or not before.get("per_s") or not stage["per_s"]:
+            continue
+        change = (stage["per_s"] - before["per_s"]) / before["per_s"] * 100
+        lines.append(
+            f"  {name:12} {before['per_s']:10.1f} -> {stage['per_s']:10.1f} "
+            f"{stage['unit']}/s ({change:+.1f}%)"
+        )
+    return lines
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=300, help="Pages per synthetic code")
+    parser.add_argument("--loader", choices=["pypdf", "parallel"], default="pypdf")
+    parser.add_argument("--splitter", choices=["legal", "recursive"], default="legal")
+    parser.add_argument("--mode", choices=["batch", "streaming"], default="batch")
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--embed-delay-ms", type=float, default=0.0, help="Delay per batch")
+    parser.add_argument("--quantization", choices=["none", "int8", "binary"], default="none")
+    parser.add_argument("--ann-index", choices=["none", "ivf"], default="none")
+    parser.add_argument("--embedding-cache", action="store_true")
+    parser.add_argument("--skip-e2e", action="store_true", help="Only time isolated stages")
+    parser.add_argument("--skip-stages", action="store_true", help="Only run the ingest flow")
+    parser.add_argument("--max-rss-mb", type=float, help="Fail when peak RSS exceeds this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("benchmarks/results/ingest.json"))
+    parser.add_argument("--baseline", type=Path, help="Previous report to compare against")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main(args))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Peak RSS {report['peak_rss_mb']} MB -> {args.output}")
+    if args.baseline:
+        print("\n".join(compare(report, json.loads(args.baseline.read_text()))))
+    if args.max_rss_mb and report["peak_rss_mb"]["self"] > args.max_rss_mb:
+        sys.exit(f"Peak RSS {report['peak_rss_mb']['self']} MB exceeds {args.max_rss_mb} MB")
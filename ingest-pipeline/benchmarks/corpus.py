@@ -0,0 +1,159 @@
+"""
+Synthetic legal codes written as plain PDF files, without any PDF library.
+
+Each code is laid out like the national codes the pipeline ingests: LIBRO / TÍTULO /
+CAPÍTULO headings and numbered articles of varying length that often run across a page
+break, set in Helvetica with WinAnsi encoding so accented Spanish text round-trips
+through pypdf.
+"""
+
+import random
+from pathlib import Path
+
+LINES_PER_PAGE = 48
+CHARS_PER_LINE = 95
+
+_ROMAN = [(10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")]
+
+_SUBJECTS = [
+    "el funcionario público",
+    "quien ejerza la patria potestad",
+    "el acreedor",
+    "el poseedor de buena fe",
+    "el que mediante violencia o amenaza",
+    "la persona jurídica",
+    "el juez competente",
+    "el deudor",
+]
+_VERBS = [
+    "está obligado a",
+    "podrá",
+    "será reprimido con pena privativa de libertad no menor de tres años si llega a",
+    "no podrá",
+    "responde solidariamente cuando decida",
+]
+_OBJECTS = [
+    "restituir el bien con sus frutos",
+    "indemnizar los daños y perjuicios causados",
+    "solicitar la nulidad del acto jurídico",
+    "inscribir el derecho en el registro correspondiente",
+    "obtener para sí un beneficio económico indebido",
+    "ejercer la acción dentro del plazo de prescripción",
+]
+_TAILS = [
+    "salvo disposición legal en contrario",
+    "conforme a lo previsto en el artículo anterior",
+    "sin perjuicio de la reparación civil",
+    "dentro del plazo de treinta días",
+    "cuando concurran las circunstancias agravantes",
+]
+
+
+def roman(number: int) -> str:
+    result = ""
+    for value, numeral in _ROMAN:
+        while number >= value:
+            result += numeral
+            number -= value
+    return result
+
+
+def _article_text(rng: random.Random, number: int) -> str:
+    sentences = [
+        f"{rng.choice(_SUBJECTS).capitalize()} {rng.choice(_VERBS)} {rng.choice(_OBJECTS)}, "
+        f"{rng.choice(_TAILS)}."
+        for _ in range(rng.choice([1, 2, 2, 3, 4, 6, 10]))
+    ]
+    return f"Artículo {number}. " + " ".join(sentences)
+
+
+def _wrap(paragraph: str) -> list[str]:
+    lines, line = [], ""
+    for word in paragraph.split():
+        if line and len(line) + 1 + len(word) > CHARS_PER_LINE:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    return lines + [line] if line else lines
+
+
+def code_lines(pages: int, seed: int) -> list[str]:
+    """
+    Text lines of a code long enough to fill `pages` pages.
+    """
+    rng = random.Random(seed)
+    lines: list[str] = []
+    article = 0
+    book = title = chapter = 0
+    while len(lines) < pages * LINES_PER_PAGE:
+        if article % 60 == 0:
+            book += 1
+            lines += ["", f"LIBRO {roman(book)}"]
+        if article % 20 == 0:
+            title += 1
+            lines += ["", f"TÍTULO {roman(title)}"]
+        if article % 5 == 0:
+            chapter += 1
+            lines += [f"CAPÍTULO {roman(chapter)}"]
+        article += 1
+        lines += _wrap(_article_text(rng, article))
+    return lines[: pages * LINES_PER_PAGE]
+
+
+def _escape(line: str) -> bytes:
+    text = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return text.encode("cp1252", errors="replace")
+
+
+def write_pdf(path: Path, lines: list[str]) -> None:
+    """
+    Write `lines` as a PDF of LINES_PER_PAGE lines per page.
+    """
+    page_lines = [lines[i : i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then one content and one page per page
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for content in page_lines:
+        stream = b"BT /F1 9 Tf 40 800 Td 16 TL " + b" ".join(
+            b"(" + _escape(line) + b") '" for line in content
+        )
+        stream += b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R >> >> >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        f.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\n" % (len(objects) + 1))
+        f.write(b"startxref\n%d\n%%%%EOF\n" % xref)
+
+
+def generate_corpus(directory: Path, files: int, pages: int, seed: int = 0) -> list[Path]:
+    """
+    Write `files` synthetic codes of `pages` pages each into `directory`.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(files):
+        path = directory / f"codigo_sintetico_{i + 1}.pdf"
+        write_pdf(path, code_lines(pages, seed + i))
+        paths.append(path)
+    return paths
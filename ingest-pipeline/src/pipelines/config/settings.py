@@ -18,6 +18,23 @@ class VectorStoreConfig(BaseModel):
     index_name: str = "02-project-index"
     provider: str = "pinecone"
     rerank_top_n: int = 5
+    # Directory of the in-process index used by the "local" provider
+    index_path: str = "vector_index"
+    # Directory of the BM25 index used by hybrid search, built during ingestion
+    lexical_index_path: str = "lexical_index"
+    # Article number to chunk IDs map used by the exact article lookup
+    article_index_path: str = "article_index.json"
+    # Local first-pass encoding: "none" (float32), "int8" (4x smaller) or "binary" (32x)
+    quantization: str = "none"
+    # Quantized candidates rescored at full precision as a multiple of k, None picks the
+    # encoding's default (4 for int8, 10 for binary)
+    rescore_factor: int | None = None
+    # Local approximate nearest-neighbor index: "none" (full scan) or "ivf"
+    ann_index: str = "none"
+    # IVF centroids, None for 2 * sqrt(rows) at training time
+    ivf_nlist: int | None = None
+    # Rows needed before the IVF index is trained, smaller corpora are scanned exactly
+    ivf_min_train_rows: int = 20000
 
 
 class EmbeddingConfig(BaseModel):
@@ -27,6 +44,38 @@ class EmbeddingConfig(BaseModel):
     size: int = 1024
 
 
+class IngestConfig(BaseModel):
+    # Hashes and chunk IDs of already ingested files
+    manifest_path: str = "ingest_manifest.json"
+    # SQLite cache of chunk embeddings keyed by model and content hash, None disables it
+    embedding_cache_path: str | None = "embedding_cache.sqlite"
+    # "batch" materializes the corpus, "streaming" pipes it through bounded queues
+    mode: str = "batch"
+    # Max items buffered between streaming stages
+    queue_size: int = 8
+    # Chunks embedded together in streaming mode
+    stream_batch_size: int = 64
+    # Chunks per embedding request and vectors per upsert request; embedded chunks are
+    # pooled across embedding batches, so the two sizes are independent
+    embedding_batch_size: int = 64
+    upsert_batch_size: int = 100
+    # Batches embedded/upserted concurrently
+    max_in_flight: int = 4
+    # Retries per failed batch, with exponential backoff
+    max_retries: int = 3
+    retry_delay_seconds: float = 1.0
+    # "pypdf" parses in the event loop, "parallel" fans out over a process pool
+    loader: str = "pypdf"
+    # Worker processes of the parallel loader, defaults to the number of CPUs
+    parse_workers: int | None = None
+    # Pages parsed by a single worker task
+    pages_per_task: int = 50
+    # "legal" cuts on Título/Capítulo/Artículo boundaries, "recursive" splits each page
+    splitter: str = "legal"
+    chunk_size: int = 1000
+    chunk_overlap: int = 100
+
+
 class Settings(BaseYamlSettings):
     # LLM configs
     llm: LLMConfig = LLMConfig()
@@ -37,6 +86,9 @@ class Settings(BaseYamlSettings):
     # Embedding config
     embedding: EmbeddingConfig = EmbeddingConfig()
 
+    # Ingestion config
+    ingest: IngestConfig = IngestConfig()
+
     # LangSmith config
     langsmith_api_key: str | None = Field(default=None)
 
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List
+from typing import AsyncIterator, List
 
 from langchain_core.documents import Document
 
@@ -19,6 +19,20 @@ class BaseLoader(ABC):
         """
         pass
 
+    async def alazy_load(self, document_path: str | Path) -> AsyncIterator[Document]:
+        """
+        Lazily load documents from the specified path, one at a time.
+        Loaders that can stream pages should override this; the default loads everything.
+
+        Args:
+            document_path (str | Path): The path to the document to be loaded.
+
+        Yields:
+            Document: The loaded documents, in order.
+        """
+        for document in await self.load(document_path):
+            yield document
+
     @abstractmethod
     def supports(self, document_path: str | Path) -> bool:
         """
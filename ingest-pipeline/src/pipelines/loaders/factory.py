@@ -0,0 +1,21 @@
+from pipelines.config.settings import Settings
+from pipelines.loaders.base import BaseLoader
+
+
+def get_loader(settings: Settings) -> BaseLoader:
+    """
+    Return the PDF loader selected by `ingest.loader`.
+    """
+    if settings.ingest.loader == "parallel":
+        from pipelines.loaders.parallel_pdf_loader import ParallelPDFLoader
+
+        return ParallelPDFLoader(
+            max_workers=settings.ingest.parse_workers,
+            pages_per_task=settings.ingest.pages_per_task,
+        )
+    elif settings.ingest.loader == "pypdf":
+        from pipelines.loaders.pdf_loader import PDFLoader
+
+        return PDFLoader()
+    else:
+        raise EnvironmentError("Loader unsupported")
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, List
+
+from langchain_core.documents import Document
+
+from pipelines.loaders.base import BaseLoader
+
+logger = logging.getLogger(__name__)
+
+
+def _count_pages(document_path: str) -> int:
+    """
+    Return the number of pages of a PDF without extracting any text.
+    """
+    from pypdf import PdfReader
+
+    return len(PdfReader(document_path).pages)
+
+
+def _extract_pages(document_path: str, start: int, stop: int) -> list[tuple[int, str, str]]:
+    """
+    Extract the text of pages [start, stop) of a PDF. Runs inside a worker process.
+
+    Returns:
+        list[tuple[int, str, str]]: (page number, page label, text) for each page.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(document_path)
+    labels = reader.page_labels
+    return [
+        (number, labels[number], reader.pages[number].extract_text().strip())
+        for number in range(start, stop)
+    ]
+
+
+class ParallelPDFLoader(BaseLoader):
+    """
+    Loader class for PDF documents that extracts text in a process pool.
+
+    Each file is split into ranges of `pages_per_task` pages that are parsed in parallel,
+    so extraction of large codes is not serialized by the GIL. Pages come back as the same
+    page-level documents as PDFLoader, with `source`, `page`, `page_label` and `total_pages`
+    metadata.
+    """
+
+    _executors: dict[int, ProcessPoolExecutor] = {}
+
+    def __init__(self, max_workers: int | None = None, pages_per_task: int = 50):
+        """
+        Args:
+            max_workers (int | None): Worker processes; defaults to the number of CPUs.
+            pages_per_task (int): Pages parsed by a single worker task.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """
+        Process pool shared by every loader with the same number of workers.
+        """
+        if self.max_workers not in self._executors:
+            self._executors[self.max_workers] = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executors[self.max_workers]
+
+    def _ranges(self, total_pages: int) -> list[tuple[int, int]]:
+        return [
+            (start, min(start + self.pages_per_task, total_pages))
+            for start in range(0, total_pages, self.pages_per_task)
+        ]
+
+    def _to_documents(
+        self, document_path: str, total_pages: int, pages: list[tuple[int, str, str]]
+    ) -> List[Document]:
+        return [
+            Document(
+                page_content=text,
+                metadata={
+                    "source": document_path,
+                    "total_pages": total_pages,
+                    "page": number,
+                    "page_label": label,
+                },
+            )
+            for number, label, text in pages
+        ]
+
+    async def load(self, document_path: str | Path) -> List[Document]:
+        """
+        Load every page of a PDF, parsing page ranges concurrently in the process pool.
+
+        Args:
+            document_path (str | Path): The path to the PDF document to load.
+
+        Returns:
+            List[Document]: One document per PDF page, in page order.
+        """
+        return [page async for page in self.alazy_load(document_path)]
+
+    async def alazy_load(self, document_path: str | Path) -> AsyncIterator[Document]:
+        """
+        Yield the pages of a PDF in order while later page ranges are still being parsed.
+        At most `max_workers` ranges of a file are in flight at once.
+
+        Args:
+            document_path (str | Path): The path to the PDF document to load.
+
+        Yields:
+            Document: One document per PDF page.
+        """
+        path = str(document_path)
+        loop = asyncio.get_running_loop()
+        try:
+            total_pages = await loop.run_in_executor(self.executor, _count_pages, path)
+            ranges = self._ranges(total_pages)
+            pending: list[asyncio.Future] = []
+            for start, stop in ranges[: self.max_workers]:
+                pending.append(
+                    loop.run_in_executor(self.executor, _extract_pages, path, start, stop)
+                )
+            next_range = len(pending)
+
+            while pending:
+                pages = await pending.pop(0)
+                if next_range < len(ranges):
+                    start, stop = ranges[next_range]
+                    pending.append(
+                        loop.run_in_executor(self.executor, _extract_pages, path, start, stop)
+                    )
+                    next_range += 1
+                for document in self._to_documents(path, total_pages, pages):
+                    yield document
+            logger.info(f"PDF loaded successfully with {total_pages} docs")
+        except Exception as e:
+            logger.exception(f"Error loading pdf from {document_path}: {str(e)}")
+            raise Exception(f"Error loading pdf from {document_path}: {str(e)}") from e
+
+    def supports(self, document_path: str | Path) -> bool:
+        """
+        Check if the given document path is a PDF file.
+
+        Args:
+            document_path (str | Path): The path to the document to check.
+
+        Returns:
+            bool: True if the file is a PDF, False otherwise.
+        """
+        return Path(document_path).suffix.lower() == ".pdf"
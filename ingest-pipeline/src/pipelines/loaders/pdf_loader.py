@@ -1,6 +1,6 @@
 import logging
 from pathlib import Path
-from typing import List
+from typing import AsyncIterator, List
 
 from langchain_core.documents import Document
 from pipelines.loaders.base import BaseLoader
@@ -38,6 +38,23 @@ class PDFLoader(BaseLoader):
             logger.exception(f"Error loading pdf from {document_path}: {str(e)}")
             raise Exception(f"Error loading pdf from {document_path}: {str(e)}") from e
 
+    async def alazy_load(self, document_path: str | Path) -> AsyncIterator[Document]:
+        """
+        Asynchronously yield the pages of a PDF document one at a time.
+
+        Args:
+            document_path (str | Path): The path to the PDF document to load.
+
+        Yields:
+            Document: One document per PDF page.
+        """
+        try:
+            async for page in PyPDFLoader(document_path).alazy_load():
+                yield page
+        except Exception as e:
+            logger.exception(f"Error loading pdf from {document_path}: {str(e)}")
+            raise Exception(f"Error loading pdf from {document_path}: {str(e)}") from e
+
     def supports(self, document_path: str | Path) -> bool:
         """
         Check if the given document path is a PDF file.
@@ -10,32 +10,37 @@ from prefect.task_runners import ConcurrentTaskRunner
 from pipelines.config.logging import setup_logging
 from pipelines.config.settings import Settings, getSettings
 from pipelines.embeddings.Embeddings import EmbeddingService
-from pipelines.loaders.pdf_loader import PDFLoader
+from pipelines.loaders.factory import get_loader
+from pipelines.orchestration.streaming import streaming_document_processing_flow
 from pipelines.processors.text_processor import TextProcessor
+from pipelines.storage.lexical_index import load_lexical_indexes
+from pipelines.storage.manifest import IngestManifest, splitter_fingerprint
 from pipelines.storage.storage_manager import StorageManager
 
-
 setup_logging()
 logger = logging.getLogger(__name__)
 
 
 @task(retries=2, retry_delay_seconds=5)
-async def ingest_documents(file_path: str):
+async def ingest_documents(file_path: str, settings: Settings):
     """
-    Ingests documents from the given file path using PDFLoader if supported.
+    Ingests documents from the given file path using the configured PDF loader if supported.
     """
-    if PDFLoader().supports(file_path):
-        return await PDFLoader().load(file_path)
+    loader = get_loader(settings)
+    if loader.supports(file_path):
+        return await loader.load(file_path)
 
 
 @task
-def process_documents(document: Document):
+def process_documents(pages: List[Document], settings: Settings):
     """
-    Processes a document by chunking its text using TextProcessor.
+    Processes the pages of one document by chunking its text using TextProcessor.
     """
-    return TextProcessor(chunk_size=1000, overlap=100).processor(
-        document
-    )  # TODO: configurable chunk_size, overlap
+    return TextProcessor(
+        chunk_size=settings.ingest.chunk_size,
+        overlap=settings.ingest.chunk_overlap,
+        splitter=settings.ingest.splitter,
+    ).process_documents(pages)
 
 
 @task
@@ -55,41 +60,112 @@ async def store_documents(
     """
     Stores the provided documents asynchronously in the specified database using the embedding function.
     """
-    return await StorageManager(settings, embedding).store_documents(documents)
+    storage = StorageManager(settings, embedding)
+    try:
+        return await storage.store_documents(documents)
+    finally:
+        storage.close()
+
+
+@task
+async def delete_documents(
+    embedding: Embeddings,
+    ids: List[str],
+    settings: Settings,
+):
+    """
+    Deletes the vectors of the given chunk IDs from the specified database.
+    """
+    storage = StorageManager(settings, embedding)
+    try:
+        return await storage.delete_documents(ids)
+    finally:
+        storage.close()
 
 
-@flow(task_runner=ConcurrentTaskRunner())  # type:ignore
+@task
+async def mark_index_changed(embedding: Embeddings, settings: Settings):
+    """
+    Bumps the index version read by the API's answer cache.
+    """
+    storage = StorageManager(settings, embedding)
+    try:
+        return await storage.mark_index_changed()
+    finally:
+        storage.close()
+
+
+@flow(task_runner=ConcurrentTaskRunner())  # type: ignore
 async def document_processing_flow(documents_path: Path, settings: Settings):
     """
     Orchestrates the document processing pipeline: ingestion, processing, embedding, and storage.
+    Only files whose content changed since the last run (per the ingest manifest) are processed,
+    only chunks with new IDs are embedded and chunks that disappeared are deleted.
     """
-    documents = [
-        doc
-        for doc_list in await asyncio.gather(
-            *[ingest_documents(path.__str__()) for path in documents_path.glob("*")]
-        )
-        for doc in doc_list  # type:ignore
-    ]
-
-    if not documents:
+    manifest = IngestManifest.load(
+        settings.ingest.manifest_path,
+        splitter_fingerprint(
+            settings.ingest.chunk_size, settings.ingest.chunk_overlap, settings.ingest.splitter
+        ),
+    )
+    lexical_index, article_index = load_lexical_indexes(settings, manifest)
+    loader = get_loader(settings)
+    paths = sorted(path for path in documents_path.glob("*") if loader.supports(path))
+    hashes, changed, removed = manifest.changes(paths)
+    logger.info(
+        f"{len(changed)} new or changed files, {len(paths) - len(changed)} unchanged, "
+        f"{len(removed)} removed."
+    )
+    if not changed and not removed:
         logger.info("No documents to process.")
         return
 
-    all_chunks = []
-    for doc in documents:
-        chunk = process_documents(doc)  # type:ignore
-        all_chunks.extend(chunk)
+    loaded = await asyncio.gather(*[ingest_documents(path.__str__(), settings) for path in changed])
+
+    previous_ids = manifest.chunk_ids()
+    # Every chunk of the processed files goes to the lexical indexes, which may be rebuilt
+    processed: list[Document] = []
+    chunks_by_id: dict[str, Document] = {}
+    for path, doc_list in zip(changed, loaded):
+        file_chunk_ids = []
+        for chunk in process_documents(doc_list, settings):  # type: ignore
+            processed.append(chunk)
+            file_chunk_ids.append(chunk.id)
+            if chunk.id not in previous_ids:
+                chunks_by_id.setdefault(chunk.id, chunk)
+        manifest.update(path.name, hashes[path.name], file_chunk_ids)
+    for file_name in removed:
+        manifest.remove(file_name)
+    stale_ids = sorted(previous_ids - manifest.chunk_ids())
 
     try:
         embedding = get_embedding(settings)
-        result = await store_documents(embedding=embedding, documents=all_chunks, settings=settings)  # type: ignore[misc]
-        return result
+        result = []
+        if chunks_by_id:
+            result = await store_documents(embedding=embedding, documents=list(chunks_by_id.values()), settings=settings)  # type: ignore[misc]
+        if stale_ids:
+            await delete_documents(embedding=embedding, ids=stale_ids, settings=settings)  # type: ignore[misc]
+        await mark_index_changed(embedding=embedding, settings=settings)  # type: ignore[misc]
+        logger.info(
+            f"Stored {len(chunks_by_id)} new chunks, deleted {len(stale_ids)} stale chunks."
+        )
     except Exception as e:
         logger.exception(str(e))
         return
 
+    for index in (lexical_index, article_index):
+        index.add(processed)
+        index.remove(stale_ids)
+        index.save()
+    # Only record the run once the vector store is up to date, so failures are retried.
+    manifest.save()
+    return result
+
 
 if __name__ == "__main__":
     docs_path = Path(__file__).resolve().parents[3] / "documents/"
     settings = getSettings()
-    asyncio.run(document_processing_flow(docs_path, settings))
+    if settings.ingest.mode == "streaming":
+        asyncio.run(streaming_document_processing_flow(docs_path, settings))
+    else:
+        asyncio.run(document_processing_flow(docs_path, settings))
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+from pathlib import Path
+
+from langchain_core.documents import Document
+from lib_utils.lexical.articles import ArticleIndex
+from lib_utils.lexical.bm25 import BM25Index
+from prefect import flow
+
+from pipelines.config.settings import Settings
+from pipelines.embeddings.Embeddings import EmbeddingService
+from pipelines.loaders.base import BaseLoader
+from pipelines.loaders.factory import get_loader
+from pipelines.processors.text_processor import TextProcessor, sha256_hash
+from pipelines.storage.lexical_index import load_lexical_indexes
+from pipelines.storage.manifest import IngestManifest, splitter_fingerprint
+from pipelines.storage.storage_manager import StorageManager
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stream between stages
+_DONE = object()
+
+
+class _FileDone:
+    """
+    Marker sent after the last page of a file, so the split stage can close its manifest entry.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+
+async def _load_stage(loader: BaseLoader, paths: list[Path], pages: asyncio.Queue) -> None:
+    """
+    Stream the pages of every file into the pages queue.
+    """
+    for path in paths:
+        async for page in loader.alazy_load(path):
+            await pages.put(page)
+        await pages.put(_FileDone(path))
+        logger.info(f"Loaded {path.name}")
+    await pages.put(_DONE)
+
+
+async def _split_stage(
+    processor: TextProcessor,
+    pages: asyncio.Queue,
+    chunks: asyncio.Queue,
+    manifest: IngestManifest,
+    hashes: dict[str, str],
+    previous_ids: set[str],
+    lexical_indexes: tuple[BM25Index, ArticleIndex],
+) -> None:
+    """
+    Chunk pages as they arrive and forward the chunks that are not indexed yet.
+    Every chunk goes to the lexical indexes, which may be rebuilt from scratch.
+    """
+    file_chunk_ids: list[str] = []
+    forwarded: set[str] = set()
+    chunker = processor.start_document()
+    while (item := await pages.get()) is not _DONE:
+        if isinstance(item, _FileDone):
+            new_chunks = chunker.finish()
+        else:
+            new_chunks = chunker.feed(item)
+        for index in lexical_indexes:
+            index.add(new_chunks)
+        for chunk in new_chunks:
+            chunk_id = chunk.id or sha256_hash(chunk.page_content)
+            file_chunk_ids.append(chunk_id)
+            if chunk_id not in previous_ids and chunk_id not in forwarded:
+                forwarded.add(chunk_id)
+                await chunks.put(chunk)
+        if isinstance(item, _FileDone):
+            manifest.update(item.path.name, hashes[item.path.name], file_chunk_ids)
+            file_chunk_ids = []
+            chunker = processor.start_document()
+    await chunks.put(_DONE)
+
+
+async def _embed_stage(
+    storage: StorageManager, batch_size: int, chunks: asyncio.Queue, embedded: asyncio.Queue
+) -> None:
+    """
+    Group chunks into batches and embed each batch.
+    """
+    batch: list[Document] = []
+
+    async def flush() -> None:
+        vectors = await storage.embed_documents(batch)
+        await embedded.put((list(batch), vectors))
+        batch.clear()
+
+    while (item := await chunks.get()) is not _DONE:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    await embedded.put(_DONE)
+
+
+async def _upsert_stage(storage: StorageManager, embedded: asyncio.Queue) -> int:
+    """
+    Pool embedded batches and upsert them into the vector store, in batches of
+    `upsert_batch_size`.
+    Returns the number of stored chunks.
+    """
+    stored = 0
+    pending_docs: list[Document] = []
+    pending_vectors: list[list[float]] = []
+
+    async def flush(count: int) -> None:
+        nonlocal stored
+        documents, vectors = pending_docs[:count], pending_vectors[:count]
+        del pending_docs[:count], pending_vectors[:count]
+        stored += len(await storage.store_embeddings(documents, vectors))
+
+    while (item := await embedded.get()) is not _DONE:
+        documents, vectors = item
+        pending_docs.extend(documents)
+        pending_vectors.extend(vectors)
+        full = len(pending_docs) - len(pending_docs) % storage.upsert_batch_size
+        if full:
+            await flush(full)
+    if pending_docs:
+        await flush(len(pending_docs))
+    return stored
+
+
+@flow
+async def streaming_document_processing_flow(documents_path: Path, settings: Settings):
+    """
+    Streaming variant of the document processing pipeline.
+
+    Load, split, embed and upsert run as concurrent stages connected by bounded queues,
+    so chunks are stored while later PDFs are still being parsed and memory stays flat
+    regardless of the number of files. Only the lexical indexes grow with the corpus, as
+    compact posting arrays: BM25 merges its buffered chunks every `max_pending` chunks.
+    Uses the same ingest manifest as the batch flow.
+    """
+    manifest = IngestManifest.load(
+        settings.ingest.manifest_path,
+        splitter_fingerprint(
+            settings.ingest.chunk_size, settings.ingest.chunk_overlap, settings.ingest.splitter
+        ),
+    )
+    lexical_index, article_index = load_lexical_indexes(settings, manifest)
+    loader = get_loader(settings)
+    paths = sorted(path for path in documents_path.glob("*") if loader.supports(path))
+    hashes, changed, removed = manifest.changes(paths)
+    logger.info(
+        f"{len(changed)} new or changed files, {len(paths) - len(changed)} unchanged, "
+        f"{len(removed)} removed."
+    )
+    if not changed and not removed:
+        logger.info("No documents to process.")
+        return
+
+    embedding = EmbeddingService().get_embedding_model(settings)
+    storage = StorageManager(settings, embedding)
+    processor = TextProcessor(
+        chunk_size=settings.ingest.chunk_size,
+        overlap=settings.ingest.chunk_overlap,
+        splitter=settings.ingest.splitter,
+    )
+
+    queue_size = settings.ingest.queue_size
+    pages: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=queue_size * settings.ingest.stream_batch_size)
+    embedded: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    previous_ids = manifest.chunk_ids()
+    for file_name in removed:
+        manifest.remove(file_name)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(_load_stage(loader, changed, pages))
+            group.create_task(
+                _split_stage(
+                    processor,
+                    pages,
+                    chunks,
+                    manifest,
+                    hashes,
+                    previous_ids,
+                    (lexical_index, article_index),
+                )
+            )
+            group.create_task(
+                _embed_stage(storage, settings.ingest.stream_batch_size, chunks, embedded)
+            )
+            upsert = group.create_task(_upsert_stage(storage, embedded))
+
+        stale_ids = sorted(previous_ids - manifest.chunk_ids())
+        if stale_ids:
+            await storage.delete_documents(stale_ids)
+            lexical_index.remove(stale_ids)
+            article_index.remove(stale_ids)
+        await storage.mark_index_changed()
+        logger.info(f"Stored {upsert.result()} new chunks, deleted {len(stale_ids)} stale chunks.")
+    except Exception as e:
+        logger.exception(str(e))
+        return
+    finally:
+        storage.close()
+
+    lexical_index.save()
+    article_index.save()
+    # Only record the run once the vector store is up to date, so failures are retried.
+    manifest.save()
+    return upsert.result()
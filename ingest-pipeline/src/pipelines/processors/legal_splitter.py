@@ -0,0 +1,180 @@
+import re
+from bisect import bisect_right
+from typing import Any
+
+from langchain_core.documents import Document
+
+# Structural headings of Peruvian legal codes, matched at the start of a line.
+# Titles and chapters only introduce the article that follows them.
+LEGAL_HEADING = re.compile(
+    r"^[ \t]*(?:"
+    r"(?P<heading>(?:LIBRO|T[IÍ]TULO|CAP[IÍ]TULO|SECCI[OÓ]N|SUBCAP[IÍ]TULO)\s+[IVXLCDM\d]+\b)"
+    r"|(?:Art[ií]culo|ART[IÍ]CULO|Art\.)\s*(?P<article>\d+(?:-[A-Z])?)\s*[°º.]?"
+    r")",
+    re.MULTILINE,
+)
+_WHITESPACE = re.compile(r"\s")
+
+
+class LegalTextSplitter:
+    """
+    Splits legal codes on their structural boundaries (Libro, Título, Capítulo, Artículo).
+
+    Text is scanned once with a precompiled pattern. Consecutive short articles are packed
+    together up to `chunk_size`; an article longer than `chunk_size` is cut into windows with
+    `chunk_overlap` characters of overlap. Every chunk records the article numbers it contains.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        """
+        Args:
+            chunk_size (int): The maximum size of each text chunk.
+            chunk_overlap (int): Overlap between windows of an article longer than chunk_size.
+        """
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def start(self) -> "LegalSplitSession":
+        """
+        Start splitting a new document whose pages will be fed in order.
+        """
+        return LegalSplitSession(self)
+
+    def split_documents(self, pages: list[Document]) -> list[Document]:
+        """
+        Split the pages of one document as a single text, so articles that cross a page
+        break are kept together.
+        """
+        session = self.start()
+        chunks = [chunk for page in pages for chunk in session.feed(page)]
+        return chunks + session.finish()
+
+
+class LegalSplitSession:
+    """
+    Incremental split of one document. Pages are fed one at a time and complete chunks are
+    returned as soon as a later heading proves they cannot grow any more, so a document never
+    needs to be held in memory as a whole.
+    """
+
+    def __init__(self, splitter: LegalTextSplitter):
+        self.chunk_size = splitter.chunk_size
+        self.chunk_overlap = splitter.chunk_overlap
+        # Unprocessed text, starting at global offset `buffer_start`
+        self.buffer = ""
+        self.buffer_start = 0
+        self.scan_from = 0
+        # Global offset where each page starts, with its metadata
+        self.page_offsets: list[int] = []
+        self.page_metadata: list[dict[str, Any]] = []
+        # Heading text waiting for the article it introduces
+        self.heading = ""
+        # Packed sections: (global offset, text, article number)
+        self.pending: list[tuple[int, str, str | None]] = []
+        self.pending_size = 0
+
+    def feed(self, page: Document) -> list[Document]:
+        """
+        Add the next page and return the chunks completed so far.
+        """
+        self.page_offsets.append(self.buffer_start + len(self.buffer))
+        self.page_metadata.append(dict(page.metadata))
+        self.buffer += page.page_content + "\n"
+
+        chunks: list[Document] = []
+        starts = [m.start() for m in LEGAL_HEADING.finditer(self.buffer, self.scan_from)]
+        starts = [start for start in starts if start > 0]
+        if starts:
+            boundaries = [0, *starts]
+            for start, end in zip(boundaries, boundaries[1:]):
+                chunks.extend(self._add_section(start, end))
+            self._consume(starts[-1])
+        # The open section has no heading past its first character, no need to rescan it.
+        self.scan_from = max(len(self.buffer) - 1, 1)
+        return chunks
+
+    def finish(self) -> list[Document]:
+        """
+        Flush the last open section and return the remaining chunks.
+        """
+        chunks = self._add_section(0, len(self.buffer)) if self.buffer.strip() else []
+        if self.heading:
+            self.pending.append((self.buffer_start, self.heading, None))
+            self.heading = ""
+        chunks.extend(self._flush())
+        self._consume(len(self.buffer))
+        return chunks
+
+    def _consume(self, end: int) -> None:
+        self.buffer_start += end
+        self.buffer = self.buffer[end:]
+        self.scan_from = 0
+
+    def _add_section(self, start: int, end: int) -> list[Document]:
+        match = LEGAL_HEADING.match(self.buffer, start)
+        text = self.buffer[start:end].strip()
+        if not text:
+            return []
+        offset = self.buffer_start + start
+        if match and match.group("heading"):
+            self.heading = f"{self.heading}\n{text}" if self.heading else text
+            return []
+
+        article = match.group("article") if match else None
+        if self.heading:
+            text = f"{self.heading}\n{text}"
+            self.heading = ""
+
+        chunks: list[Document] = []
+        if len(text) > self.chunk_size:
+            chunks.extend(self._flush())
+            for window_offset, window in self._windows(text):
+                chunks.append(self._chunk([(offset + window_offset, window, article)]))
+            return chunks
+
+        if self.pending_size + len(text) + 1 > self.chunk_size:
+            chunks.extend(self._flush())
+        self.pending.append((offset, text, article))
+        self.pending_size += len(text) + 1
+        return chunks
+
+    def _flush(self) -> list[Document]:
+        if not self.pending:
+            return []
+        chunk = self._chunk(self.pending)
+        self.pending = []
+        self.pending_size = 0
+        return [chunk]
+
+    def _windows(self, text: str) -> list[tuple[int, str]]:
+        """
+        Cut an oversized section into overlapping windows that end on whitespace.
+        """
+        windows = []
+        start = 0
+        while start < len(text):
+            end = min(start + self.chunk_size, len(text))
+            if end < len(text):
+                cut = max(text.rfind("\n", start, end), text.rfind(" ", start, end))
+                if cut > start + self.chunk_size // 2:
+                    end = cut
+            windows.append((start, text[start:end].strip()))
+            if end >= len(text):
+                break
+            next_start = max(end - self.chunk_overlap, start + 1)
+            space = _WHITESPACE.search(text, next_start, end)
+            start = space.end() if space else next_start
+        return windows
+
+    def _chunk(self, sections: list[tuple[int, str, str | None]]) -> Document:
+        offset = sections[0][0]
+        page_index = max(bisect_right(self.page_offsets, offset) - 1, 0)
+        metadata = dict(self.page_metadata[page_index])
+        articles = [article for _, _, article in sections if article is not None]
+        if articles:
+            metadata["article"] = articles[0]
+            metadata["articles"] = articles
+        return Document(
+            page_content="\n".join(text for _, text, _ in sections),
+            metadata=metadata,
+        )
@@ -4,6 +4,8 @@ from typing import List
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from pipelines.processors.legal_splitter import LegalSplitSession, LegalTextSplitter
+
 
 def sha256_hash(input_text: str) -> str:
     """
@@ -20,16 +22,26 @@ class TextProcessor:
     A class for processing text documents by splitting them into chunks with optional overlap.
     """
 
-    def __init__(self, chunk_size: int, overlap: int):
+    def __init__(self, chunk_size: int, overlap: int, splitter: str = "recursive"):
         """
         Initialize a TextProcessor instance.
 
         Args:
             chunk_size (int): The maximum size of each text chunk.
             overlap (int): The number of overlapping characters between consecutive chunks.
+            splitter (str): "legal" to cut on Título/Capítulo/Artículo boundaries across the
+                whole document, "recursive" for RecursiveCharacterTextSplitter on each page.
         """
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.splitter = splitter
+        # Splitters are built once and reused for every document
+        self.recursive_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.overlap,
+            is_separator_regex=True,
+        )
+        self.legal_splitter = LegalTextSplitter(self.chunk_size, self.overlap)
 
     def _get_basename(self, document: Document) -> str:
         """
@@ -44,16 +56,10 @@ class TextProcessor:
         source = document.metadata["source"]
         return os.path.basename(source)
 
-    def processor(self, document: Document) -> List[Document]:
+    def _finalize(self, chunks: List[Document]) -> List[Document]:
         """
-        Split a document into chunks using RecursiveCharacterTextSplitter.
+        Give each chunk a content-based ID and a bare file name as source.
         """
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.overlap,
-            is_separator_regex=True,
-        )
-        chunks = splitter.split_documents([document])
         # For each chunk in the list, generate a unique ID using the SHA-256 hash of its page_content.
         # This ensures that each chunk can be uniquely identified based on its content.
         for chunk in chunks:
@@ -62,3 +68,54 @@ class TextProcessor:
             chunk.metadata["source"] = self._get_basename(chunk)
 
         return list(chunks)
+
+    def processor(self, document: Document) -> List[Document]:
+        """
+        Split a single document into chunks with the configured splitter.
+        """
+        if self.splitter == "legal":
+            return self.process_documents([document])
+        return self._finalize(self.recursive_splitter.split_documents([document]))
+
+    def process_documents(self, pages: List[Document]) -> List[Document]:
+        """
+        Split all the pages of one source document into chunks.
+        The legal splitter treats the pages as one text; the recursive one splits page by page.
+        """
+        chunker = self.start_document()
+        chunks = [chunk for page in pages for chunk in chunker.feed(page)]
+        return chunks + chunker.finish()
+
+    def start_document(self) -> "DocumentChunker":
+        """
+        Start chunking a document whose pages will be fed one at a time.
+        """
+        return DocumentChunker(self)
+
+
+class DocumentChunker:
+    """
+    Incremental chunking of one source document, page by page, used by the streaming flow.
+    """
+
+    def __init__(self, processor: TextProcessor):
+        self.processor = processor
+        self.session: LegalSplitSession | None = None
+        if processor.splitter == "legal":
+            self.session = processor.legal_splitter.start()
+
+    def feed(self, page: Document) -> List[Document]:
+        """
+        Add the next page and return the chunks completed so far.
+        """
+        if self.session is None:
+            return self.processor.processor(page)
+        return self.processor._finalize(self.session.feed(page))
+
+    def finish(self) -> List[Document]:
+        """
+        Return the chunks still pending at the end of the document.
+        """
+        if self.session is None:
+            return []
+        return self.processor._finalize(self.session.finish())
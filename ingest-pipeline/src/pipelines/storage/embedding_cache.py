@@ -0,0 +1,85 @@
+import logging
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+class EmbeddingCache:
+    """
+    Persistent content-addressed cache of chunk embeddings.
+
+    Vectors are stored in SQLite as float32 blobs keyed by a namespace, made of the embedding
+    provider, model and dimension, and the sha256 of the chunk text. Re-running ingestion,
+    rebuilding an index or moving to another vector store therefore needs no embedding calls
+    for content that was embedded before with the same model.
+    """
+
+    def __init__(self, path: str | Path, provider: str, model: str, size: int):
+        """
+        Args:
+            path (str | Path): Location of the SQLite database.
+            provider (str): Embedding provider name.
+            model (str): Embedding model name.
+            size (int): Embedding dimension.
+        """
+        self.path = Path(path)
+        self.namespace = f"{provider}:{model}:{size}"
+        self.size = size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "namespace TEXT NOT NULL, chunk_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (namespace, chunk_hash)) WITHOUT ROWID"
+        )
+        self._connection.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, chunk_hashes: list[str]) -> dict[str, list[float]]:
+        """
+        Return the cached vectors of the given chunk hashes, skipping the ones not cached.
+        """
+        found: dict[str, list[float]] = {}
+        unique = list(dict.fromkeys(chunk_hashes))
+        with self._lock:
+            for i in range(0, len(unique), _LOOKUP_BATCH):
+                batch = unique[i : i + _LOOKUP_BATCH]
+                rows = self._connection.execute(
+                    "SELECT chunk_hash, vector FROM embeddings WHERE namespace = ? "
+                    f"AND chunk_hash IN ({', '.join('?' * len(batch))})",
+                    [self.namespace, *batch],
+                )
+                for chunk_hash, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    if len(vector) == self.size:
+                        found[chunk_hash] = vector.tolist()
+        return found
+
+    def put_many(self, items: dict[str, list[float]]) -> None:
+        """
+        Store the vectors of the given chunk hashes.
+        """
+        if not items:
+            return
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (namespace, chunk_hash, vector) "
+                "VALUES (?, ?, ?)",
+                [
+                    (self.namespace, chunk_hash, array("f", vector).tobytes())
+                    for chunk_hash, vector in items.items()
+                ],
+            )
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
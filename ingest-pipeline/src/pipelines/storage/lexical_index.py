@@ -0,0 +1,28 @@
+import logging
+
+from lib_utils.lexical.articles import ArticleIndex
+from lib_utils.lexical.bm25 import BM25Index
+
+from pipelines.config.settings import Settings
+from pipelines.storage.manifest import IngestManifest
+
+logger = logging.getLogger(__name__)
+
+
+def load_lexical_indexes(
+    settings: Settings, manifest: IngestManifest
+) -> tuple[BM25Index, ArticleIndex]:
+    """
+    Load the BM25 and article indexes kept next to the vector store.
+
+    Both are updated with the chunks of the files processed on each run, so they must cover
+    every chunk in the manifest. When one is missing but the manifest is not empty, every
+    file is processed again to rebuild it. The recorded chunk IDs are kept, so chunks that
+    are already stored are not embedded again and stale ones are still deleted.
+    """
+    lexical_index = BM25Index(settings.vector_store.lexical_index_path)
+    article_index = ArticleIndex(settings.vector_store.article_index_path)
+    if manifest.files and not (lexical_index.exists() and article_index.exists()):
+        logger.warning("Lexical indexes missing, every file will be ingested again to build them.")
+        manifest.reprocess_all()
+    return lexical_index, article_index
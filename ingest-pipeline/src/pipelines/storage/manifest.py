@@ -0,0 +1,118 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(file_path: str | Path, block_size: int = 1 << 20) -> str:
+    """
+    Calculate the SHA-256 hash of a file's content, reading it in blocks.
+    """
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(block_size):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def splitter_fingerprint(chunk_size: int, chunk_overlap: int, splitter: str) -> str:
+    """
+    Identify the chunking configuration: the same file split differently yields other chunks.
+    """
+    return f"{splitter}:{chunk_size}:{chunk_overlap}"
+
+
+class IngestManifest:
+    """
+    Persistent record of what has been ingested into the vector store.
+
+    For every source file it keeps the content hash, the splitter fingerprint and the IDs
+    of the chunks it produced, so a run can skip unchanged files, embed only new chunks and
+    delete the vectors of chunks that disappeared. A file split with another configuration
+    counts as changed.
+    """
+
+    def __init__(
+        self, path: str | Path, files: dict[str, dict] | None = None, fingerprint: str = ""
+    ):
+        """
+        Args:
+            path (str | Path): Location of the manifest JSON file.
+            files (dict[str, dict] | None): Entries keyed by file name with `hash`, `splitter`
+                and `chunk_ids`.
+            fingerprint (str): Splitter fingerprint of the current run.
+        """
+        self.path = Path(path)
+        self.files: dict[str, dict] = files or {}
+        self.fingerprint = fingerprint
+        # Set by `reprocess_all`: every file counts as changed on this run
+        self.reprocess = False
+
+    @classmethod
+    def load(cls, path: str | Path, fingerprint: str = "") -> "IngestManifest":
+        """
+        Load the manifest from disk, or return an empty one if it does not exist yet.
+        """
+        path = Path(path)
+        if not path.exists():
+            logger.info(f"No manifest found at {path}, every file will be ingested.")
+            return cls(path, fingerprint=fingerprint)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return cls(path, data.get("files", {}), fingerprint)
+
+    def save(self) -> None:
+        """
+        Atomically write the manifest to disk.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"files": self.files}, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def changes(self, paths: list[Path]) -> tuple[dict[str, str], list[Path], set[str]]:
+        """
+        Compare the files on disk against the manifest.
+
+        Returns:
+            tuple: Content hash per file name, the new or changed paths, and the names of
+                recorded files that no longer exist.
+        """
+        hashes = {path.name: file_hash(path) for path in paths}
+        changed = [path for path in paths if not self.is_unchanged(path.name, hashes[path.name])]
+        removed = set(self.files) - set(hashes)
+        return hashes, changed, removed
+
+    def reprocess_all(self) -> None:
+        """
+        Count every file as changed on this run. Entries keep their chunk IDs, so chunks that
+        are no longer produced are still deleted.
+        """
+        self.reprocess = True
+
+    def is_unchanged(self, file_name: str, content_hash: str) -> bool:
+        entry = self.files.get(file_name)
+        return (
+            not self.reprocess
+            and entry is not None
+            and entry["hash"] == content_hash
+            and entry.get("splitter") == self.fingerprint
+        )
+
+    def chunk_ids(self) -> set[str]:
+        """
+        Return the IDs of every chunk currently recorded in the manifest.
+        """
+        return {chunk_id for entry in self.files.values() for chunk_id in entry["chunk_ids"]}
+
+    def update(self, file_name: str, content_hash: str, chunk_ids: list[str]) -> None:
+        self.files[file_name] = {
+            "hash": content_hash,
+            "splitter": self.fingerprint,
+            "chunk_ids": sorted(set(chunk_ids)),
+        }
+
+    def remove(self, file_name: str) -> None:
+        self.files.pop(file_name, None)
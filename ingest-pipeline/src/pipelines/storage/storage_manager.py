@@ -1,13 +1,19 @@
+import asyncio
 import logging
+from typing import Awaitable, Callable, TypeVar
 
 from langchain_core.documents.base import Document
 from langchain_core.embeddings import Embeddings
 from lib_utils.interfaces.vector_store import VectorStoreClient
 
 from pipelines.config.settings import Settings
+from pipelines.processors.text_processor import sha256_hash
+from pipelines.storage.embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class StorageManager:
     """
@@ -18,6 +24,21 @@ class StorageManager:
         """
         Initialize the StorageManager with a specified database and embedding function.
         """
+        self.embedding = embedding
+        self.embedding_batch_size = settings.ingest.embedding_batch_size
+        self.upsert_batch_size = settings.ingest.upsert_batch_size
+        self.max_in_flight = settings.ingest.max_in_flight
+        self.max_retries = settings.ingest.max_retries
+        self.retry_delay_seconds = settings.ingest.retry_delay_seconds
+        self.embedding_cache: EmbeddingCache | None = None
+        if settings.ingest.embedding_cache_path:
+            self.embedding_cache = EmbeddingCache(
+                settings.ingest.embedding_cache_path,
+                settings.embedding.provider,
+                settings.embedding.model,
+                settings.embedding.size,
+            )
+
         if settings.vector_store.provider == "pinecone":
             from lib_utils.vector_database.pinecone import PineconeService
 
@@ -31,10 +52,161 @@ class StorageManager:
                 )
             else:
                 raise EnvironmentError("VS_API_KEY not found")
+        elif settings.vector_store.provider == "local":
+            from lib_utils.vector_database.ivf import IVFIndex
+            from lib_utils.vector_database.local import LocalVectorStore
+
+            # Trained and extended batch by batch as chunks are upserted
+            ann_index = None
+            if settings.vector_store.ann_index == "ivf":
+                ann_index = IVFIndex(
+                    settings.vector_store.index_path,
+                    settings.embedding.size,
+                    nlist=settings.vector_store.ivf_nlist,
+                    min_train_rows=settings.vector_store.ivf_min_train_rows,
+                )
+            elif settings.vector_store.ann_index != "none":
+                raise EnvironmentError(f"Unknown ANN index {settings.vector_store.ann_index}")
+
+            self.vs_client = LocalVectorStore(
+                embedding,
+                settings.vector_store.index_path,
+                settings.embedding.size,
+                settings.vector_store.rerank_top_n,
+                quantization=settings.vector_store.quantization,
+                rescore_factor=settings.vector_store.rescore_factor,
+                ann_index=ann_index,
+            )
+
+    def close(self) -> None:
+        """
+        Close the embedding cache connection. Call it once the manager is no longer used.
+        """
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
+            self.embedding_cache = None
+
+    async def _with_retries(self, description: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await `call`, retrying with exponential backoff up to `max_retries` times.
+        """
+        attempt = 0
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.retry_delay_seconds * 2**attempt
+                attempt += 1
+                logger.warning(f"{description} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def embed_documents(self, documents: list[Document]) -> list[list[float]]:
+        """
+        Embed one batch of documents, retrying on failure.
+        Vectors found in the embedding cache are reused; only the other texts are embedded.
+        """
+        texts = [doc.page_content for doc in documents]
+        if self.embedding_cache is None:
+            return await self._with_retries(
+                f"Embedding {len(texts)} chunks", lambda: self.embedding.aembed_documents(texts)
+            )
+
+        hashes = [sha256_hash(text) for text in texts]
+        cached = self.embedding_cache.get_many(hashes)
+        missing = {h: text for h, text in zip(hashes, texts) if h not in cached}
+        if missing:
+            missing_texts = list(missing.values())
+            vectors = await self._with_retries(
+                f"Embedding {len(missing_texts)} chunks",
+                lambda: self.embedding.aembed_documents(missing_texts),
+            )
+            computed = dict(zip(missing, vectors))
+            self.embedding_cache.put_many(computed)
+            cached.update(computed)
+        logger.debug(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+        return [cached[h] for h in hashes]
 
     async def store_documents(self, documents: list[Document]) -> list[str]:
         """
         Store a list of Document objects asynchronously.
         Returns a list of document IDs as strings.
+
+        Documents are embedded in batches of `embedding_batch_size`, with at most
+        `max_in_flight` batches running concurrently. Embedded documents are pooled across
+        batches and upserted in batches of `upsert_batch_size`, so either size can be tuned
+        to its API's limits. A failing request is retried on its own; if it still fails, the
+        other batches are stored anyway and an error counting the failures is raised at the end.
+        """
+        batches = [
+            documents[i : i + self.embedding_batch_size]
+            for i in range(0, len(documents), self.embedding_batch_size)
+        ]
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        pending_docs: list[Document] = []
+        pending_vectors: list[list[float]] = []
+
+        async def upsert(count: int) -> list[str]:
+            # Taken from the pool before awaiting, so concurrent batches never upsert it twice
+            docs, vectors = pending_docs[:count], pending_vectors[:count]
+            del pending_docs[:count], pending_vectors[:count]
+            async with semaphore:
+                return await self.store_embeddings(docs, vectors)
+
+        async def run(batch: list[Document]) -> list[str]:
+            async with semaphore:
+                embeddings = await self.embed_documents(batch)
+            pending_docs.extend(batch)
+            pending_vectors.extend(embeddings)
+            full = len(pending_docs) - len(pending_docs) % self.upsert_batch_size
+            return await upsert(full) if full else []
+
+        logger.info(f"Storing {len(documents)} documents in {len(batches)} batches.")
+        results = await asyncio.gather(*[run(batch) for batch in batches], return_exceptions=True)
+        if pending_docs:
+            remainder = await asyncio.gather(upsert(len(pending_docs)), return_exceptions=True)
+            results.extend(remainder)
+
+        ids: list[str] = []
+        failures = 0
+        for result in results:
+            if isinstance(result, BaseException):
+                failures += 1
+                logger.error(f"Batch failed after {self.max_retries} retries: {result}")
+            else:
+                ids.extend(result)
+        if failures:
+            raise RuntimeError(f"{failures} batches failed to be stored")
+        return ids
+
+    async def store_embeddings(
+        self, documents: list[Document], embeddings: list[list[float]]
+    ) -> list[str]:
+        """
+        Store documents with precomputed embeddings asynchronously, in upsert batches.
+        Returns a list of document IDs as strings.
+        """
+        ids: list[str] = []
+        for i in range(0, len(documents), self.upsert_batch_size):
+            docs = documents[i : i + self.upsert_batch_size]
+            vectors = embeddings[i : i + self.upsert_batch_size]
+            ids.extend(
+                await self._with_retries(
+                    f"Upserting {len(docs)} vectors",
+                    lambda: self.vs_client.store_embeddings(docs, vectors),
+                )
+            )
+        return ids
+
+    async def delete_documents(self, ids: list[str]) -> None:
+        """
+        Delete the documents with the given IDs from the vector database.
+        """
+        await self.vs_client.delete_documents(ids)
+
+    async def mark_index_changed(self) -> None:
+        """
+        Tell API readers the corpus changed, so they drop the answers cached before this run.
         """
-        return await self.vs_client.store_documents(documents)
+        await self._with_retries("Marking the index as changed", self.vs_client.mark_index_changed)
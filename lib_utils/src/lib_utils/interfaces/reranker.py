@@ -0,0 +1,33 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+from langchain_core.documents.base import Document
+
+
+class Reranker(ABC):
+    """
+    Abstract base class for a reranker.
+    Vector store clients delegate `rerank_context` to a reranker when one is configured.
+    """
+
+    @abstractmethod
+    async def rerank(
+        self,
+        documents: list[Document],
+        query: str,
+        vectors: dict[str, np.ndarray] | None = None,
+    ) -> list[dict]:
+        """
+        Score documents against a query and return the best ones.
+
+        Args:
+            documents (list[Document]): The list of Document objects to be reranked.
+            query (str): The query string used to rerank the documents.
+            vectors (dict[str, np.ndarray] | None): Stored embeddings of the documents by ID,
+                for rerankers that compare them with the query. May miss some documents.
+
+        Returns:
+            list[dict]: The top documents, best first, in the PineconeRerank shape:
+                [{"id", "index", "score", "document": {"id", "text", **metadata}}].
+        """
+        pass
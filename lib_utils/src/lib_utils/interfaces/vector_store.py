@@ -22,13 +22,50 @@ class VectorStoreClient(ABC):
         pass
 
     @abstractmethod
-    async def retrieve(self, query: str, search_type: str, k: int) -> list[Document]:
+    async def store_embeddings(
+        self, documents: list[Document], embeddings: list[list[float]]
+    ) -> list[str]:
+        """
+        Store documents whose embeddings were already computed, skipping the embedding model.
+
+        Args:
+            documents (list[Document]): The documents to be stored.
+            embeddings (list[list[float]]): One embedding per document, in the same order.
+
+        Returns:
+            list[str]: A list of IDs corresponding to the stored documents.
+        """
+        pass
+
+    @abstractmethod
+    async def delete_documents(self, ids: list[str]) -> None:
+        """
+        Delete documents from the vector store by ID.
+
+        Args:
+            ids (list[str]): The IDs of the documents to delete.
+        """
+        pass
+
+    @abstractmethod
+    async def retrieve(
+        self,
+        query: str,
+        search_type: str,
+        k: int,
+        fetch_k: int | None = None,
+        lambda_mult: float = 0.5,
+    ) -> list[Document]:
         """
         Retrieve documents from the vector store based on a query and search type.
 
         Args:
             query (str): The search query string.
             search_type (str): The type of search to perform (e.g., similarity, keyword).
+            k (int): Number of documents to return.
+            fetch_k (int | None): Candidates considered by "mmr" and "hybrid" before
+                selecting k, None for the store's default.
+            lambda_mult (float): MMR trade-off, 1 for relevance only, 0 for diversity only.
 
         Returns:
             list[Document]: A list of documents matching the query.
@@ -48,3 +85,52 @@ class VectorStoreClient(ABC):
             list[dict]: A list of dictionaries representing the reranked documents.
         """
         pass
+
+    async def start(self) -> None:
+        """
+        Open long-lived resources, such as pooled HTTP sessions, before serving requests.
+        Backends without such resources do nothing.
+        """
+        return None
+
+    async def aclose(self) -> None:
+        """
+        Release the resources opened by `start`.
+        """
+        return None
+
+    async def fetch_documents(self, ids: list[str]) -> list[Document]:
+        """
+        Fetch stored documents by ID, without any search.
+
+        Backends that cannot fetch by ID return an empty list and callers fall back to
+        a regular search.
+
+        Args:
+            ids (list[str]): The IDs of the documents to fetch.
+
+        Returns:
+            list[Document]: The documents found, in the order of `ids`.
+        """
+        return []
+
+    async def index_version(self) -> str | None:
+        """
+        Return an identifier that changes whenever the indexed corpus changes.
+
+        Callers use it to invalidate caches derived from the index. Backends that cannot
+        report it cheaply return None.
+
+        Returns:
+            str | None: The current index version, or None if unknown.
+        """
+        return None
+
+    async def mark_index_changed(self) -> None:
+        """
+        Record that the indexed corpus changed, after a writer stored or deleted documents.
+
+        Backends whose `index_version` is derived from the stored data do nothing; the others
+        bump a version readers can see, so their caches are dropped.
+        """
+        return None
@@ -0,0 +1,116 @@
+import json
+import logging
+import os
+from pathlib import Path
+
+from langchain_core.documents.base import Document
+
+logger = logging.getLogger(__name__)
+
+
+class ArticleIndex:
+    """
+    Persisted map from (source, article number) to the IDs of the chunks holding that article.
+
+    Built at ingest time from the `source` and `articles` metadata set by the legal splitter,
+    so a question naming an article can be answered without any search. Stored as a single
+    JSON file; like the other indexes, readers reload it when it changes on disk.
+    """
+
+    def __init__(self, index_file: str | Path):
+        """
+        Args:
+            index_file (str | Path): Location of the JSON index.
+        """
+        self.index_file = Path(index_file)
+        self._sources: dict[str, dict[str, list[str]]] = {}
+        self._index_mtime: float | None = None
+        self._dirty = False
+        self._load()
+
+    def exists(self) -> bool:
+        return self.index_file.exists()
+
+    def __len__(self) -> int:
+        return sum(len(articles) for articles in self._sources.values())
+
+    def _load(self) -> None:
+        if not self.index_file.exists():
+            return
+        data = json.loads(self.index_file.read_text(encoding="utf-8"))
+        self._sources = data.get("sources", {})
+        self._index_mtime = self.index_file.stat().st_mtime
+        logger.info(f"Loaded article index with {len(self)} articles from {self.index_file}")
+
+    def _maybe_reload(self) -> None:
+        """
+        Reload the index if another process (e.g. the ingest pipeline) rewrote it.
+        """
+        if self._dirty:
+            return
+        try:
+            mtime = self.index_file.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime != self._index_mtime:
+            self._load()
+
+    def add(self, documents: list[Document]) -> None:
+        """
+        Record the articles of each chunk, in the order the chunks are given.
+        """
+        for document in documents:
+            source = document.metadata.get("source")
+            articles = document.metadata.get("articles") or []
+            if not document.id or not source:
+                continue
+            by_article = self._sources.setdefault(source, {})
+            for article in articles:
+                ids = by_article.setdefault(str(article), [])
+                if document.id not in ids:
+                    ids.append(document.id)
+                    self._dirty = True
+
+    def remove(self, ids: list[str]) -> None:
+        """
+        Forget chunks by ID, dropping articles and sources left without chunks.
+        """
+        removed = set(ids)
+        if not removed:
+            return
+        for source in list(self._sources):
+            by_article = self._sources[source]
+            for article in list(by_article):
+                kept = [doc_id for doc_id in by_article[article] if doc_id not in removed]
+                if len(kept) != len(by_article[article]):
+                    self._dirty = True
+                if kept:
+                    by_article[article] = kept
+                else:
+                    del by_article[article]
+            if not by_article:
+                del self._sources[source]
+
+    def save(self) -> None:
+        """
+        Atomically write the index to disk.
+        """
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(".tmp")
+        tmp_file.write_text(
+            json.dumps({"sources": self._sources}, ensure_ascii=False), encoding="utf-8"
+        )
+        os.replace(tmp_file, self.index_file)
+        self._index_mtime = self.index_file.stat().st_mtime
+        self._dirty = False
+
+    def sources(self) -> list[str]:
+        self._maybe_reload()
+        return list(self._sources)
+
+    def lookup(self, source: str, article: str) -> list[str]:
+        """
+        Return the chunk IDs of an article of a source, in document order.
+        """
+        self._maybe_reload()
+        return list(self._sources.get(source, {}).get(article, []))
@@ -0,0 +1,309 @@
+import io
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents.base import Document
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercase, accent-folded word tokens, so "Artículo" and "articulo" match.
+    """
+    folded = unicodedata.normalize("NFKD", text.casefold())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return _TOKEN.findall(folded)
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[tuple[str, float]]:
+    """
+    Fuse several rankings of IDs, best first, with reciprocal rank fusion.
+
+    Args:
+        rankings (list[list[str]]): One list of IDs per retriever, best first.
+        k (int): RRF damping constant; higher values flatten the contribution of top ranks.
+
+    Returns:
+        list[tuple[str, float]]: (id, fused score) sorted by descending score.
+    """
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+@dataclass(frozen=True)
+class _Postings:
+    """
+    Everything a search reads, built together and swapped in with a single assignment, so
+    a search running in a worker thread never mixes two loads or compactions of the index.
+    """
+
+    terms: list[str] = field(default_factory=list)
+    vocab: dict[str, int] = field(default_factory=dict)
+    doc_ids: list[str] = field(default_factory=list)
+    rows: dict[str, int] = field(default_factory=dict)
+    doc_lengths: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    offsets: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.int64))
+    post_docs: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    post_tfs: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.uint16))
+
+
+class BM25Index:
+    """
+    Persisted BM25 inverted index over chunk IDs.
+
+    Postings are kept as flat numpy arrays sorted by term: `offsets[t]:offsets[t + 1]` is the
+    slice of `post_docs` / `post_tfs` holding the documents and term frequencies of term `t`.
+    The whole index is a single uncompressed .npz file. Additions and removals are buffered
+    and merged into the arrays on the next search or save, or once `max_pending` chunks are
+    buffered, so the ingest pipeline can feed it batch by batch while per-chunk term counts
+    never pile up for the whole corpus. Like LocalVectorStore, readers reload the file when it changes on disk;
+    reloads and merges publish a new `_Postings` and are serialized by a lock.
+    """
+
+    INDEX_FILE = "bm25.npz"
+
+    def __init__(
+        self, index_path: str | Path, k1: float = 1.2, b: float = 0.75, max_pending: int = 10000
+    ):
+        """
+        Args:
+            index_path (str | Path): Directory of the index file.
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 length normalization.
+            max_pending (int): Buffered chunks that trigger a merge into the posting arrays.
+        """
+        self.index_path = Path(index_path)
+        self.k1 = k1
+        self.b = b
+        self.max_pending = max_pending
+
+        self._postings = _Postings()
+        self._lock = threading.Lock()
+        self._pending: dict[str, tuple[Counter, int]] = {}
+        self._removed: set[str] = set()
+        self._index_mtime: float | None = None
+        self._load()
+
+    @property
+    def _index_file(self) -> Path:
+        return self.index_path / self.INDEX_FILE
+
+    def exists(self) -> bool:
+        return self._index_file.exists()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._compact()
+            return len(self._postings.doc_ids)
+
+    def _load(self) -> None:
+        if not self._index_file.exists():
+            return
+        # Taken before reading, so a rewrite during the read triggers another reload
+        mtime = self._index_file.stat().st_mtime
+        with np.load(self._index_file, allow_pickle=False) as data:
+            terms = data["terms"].tolist()
+            doc_ids = data["doc_ids"].tolist()
+            self._postings = _Postings(
+                terms,
+                {term: j for j, term in enumerate(terms)},
+                doc_ids,
+                {doc_id: row for row, doc_id in enumerate(doc_ids)},
+                data["doc_lengths"],
+                data["offsets"],
+                data["post_docs"],
+                data["post_tfs"],
+            )
+        self._index_mtime = mtime
+        logger.info(f"Loaded BM25 index with {len(doc_ids)} chunks from {self.index_path}")
+
+    def _maybe_reload(self) -> None:
+        """
+        Reload the index if another process (e.g. the ingest pipeline) rewrote it.
+        """
+        if self._pending or self._removed:
+            return
+        try:
+            mtime = self._index_file.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime != self._index_mtime:
+            self._load()
+
+    def add(self, documents: list[Document]) -> None:
+        """
+        Index documents by ID, replacing any previous version of the same ID.
+        """
+        for document in documents:
+            if not document.id:
+                continue
+            tokens = tokenize(document.page_content)
+            with self._lock:
+                self._pending[document.id] = (Counter(tokens), len(tokens))
+                self._removed.discard(document.id)
+                if len(self._pending) >= self.max_pending:
+                    self._compact()
+
+    def remove(self, ids: list[str]) -> None:
+        """
+        Remove documents from the index by ID.
+        """
+        with self._lock:
+            for doc_id in ids:
+                self._pending.pop(doc_id, None)
+                if doc_id in self._postings.rows:
+                    self._removed.add(doc_id)
+
+    def _compact(self) -> None:
+        """
+        Merge buffered additions and removals into new posting arrays. Called with the lock
+        held; searches keep reading the previous `_Postings` until it is replaced.
+
+        The kept postings are already sorted by (term, row) and added chunks get the last
+        rows, so only the added postings are sorted and both are scattered into place in
+        linear time: the merge cost does not grow with the log of the index size.
+        """
+        if not self._pending and not self._removed:
+            return
+
+        old = self._postings
+        terms = list(old.terms)
+        vocab = dict(old.vocab)
+        drop = self._removed | self._pending.keys()
+        keep = np.fromiter(
+            (doc_id not in drop for doc_id in old.doc_ids),
+            dtype=bool,
+            count=len(old.doc_ids),
+        )
+        new_rows = (np.cumsum(keep) - 1).astype(np.int32)
+        kept = keep[old.post_docs]
+        term_of = np.repeat(np.arange(len(old.terms), dtype=np.int64), np.diff(old.offsets))
+        kept_terms = term_of[kept]
+        kept_docs = new_rows[old.post_docs[kept]]
+        kept_tfs = old.post_tfs[kept]
+        doc_ids = [doc_id for doc_id, k in zip(old.doc_ids, keep) if k]
+        lengths = [old.doc_lengths[keep]]
+
+        new_terms: list[int] = []
+        new_docs: list[int] = []
+        new_tfs: list[int] = []
+        new_lengths: list[int] = []
+        for doc_id, (counts, length) in self._pending.items():
+            row = len(doc_ids)
+            doc_ids.append(doc_id)
+            new_lengths.append(length)
+            for term, tf in counts.items():
+                column = vocab.get(term)
+                if column is None:
+                    column = vocab[term] = len(terms)
+                    terms.append(term)
+                new_terms.append(column)
+                new_docs.append(row)
+                new_tfs.append(min(tf, np.iinfo(np.uint16).max))
+        lengths.append(np.asarray(new_lengths, dtype=np.int32))
+        added_terms = np.asarray(new_terms, dtype=np.int64)
+        order = np.lexsort((np.asarray(new_docs, dtype=np.int32), added_terms))
+        added_terms = added_terms[order]
+
+        kept_per_term = np.bincount(kept_terms, minlength=len(terms))
+        added_per_term = np.bincount(added_terms, minlength=len(terms))
+        offsets = np.concatenate([[0], np.cumsum(kept_per_term + added_per_term)]).astype(np.int64)
+        # A kept posting moves past the added postings of smaller terms, an added posting
+        # past the kept postings of its own and smaller terms
+        kept_positions = (
+            np.arange(kept_terms.shape[0])
+            + (np.cumsum(added_per_term) - added_per_term)[kept_terms]
+        )
+        added_positions = np.arange(added_terms.shape[0]) + np.cumsum(kept_per_term)[added_terms]
+        post_docs = np.empty(offsets[-1], dtype=np.int32)
+        post_docs[kept_positions] = kept_docs
+        post_docs[added_positions] = np.asarray(new_docs, dtype=np.int32)[order]
+        post_tfs = np.empty(offsets[-1], dtype=np.uint16)
+        post_tfs[kept_positions] = kept_tfs
+        post_tfs[added_positions] = np.asarray(new_tfs, dtype=np.uint16)[order]
+
+        self._postings = _Postings(
+            terms,
+            vocab,
+            doc_ids,
+            {doc_id: row for row, doc_id in enumerate(doc_ids)},
+            np.concatenate(lengths).astype(np.int32),
+            offsets,
+            post_docs,
+            post_tfs,
+        )
+        self._pending.clear()
+        self._removed.clear()
+
+    def save(self) -> None:
+        """
+        Atomically write the index to disk.
+        """
+        with self._lock:
+            self._compact()
+            postings = self._postings
+            self.index_path.mkdir(parents=True, exist_ok=True)
+            buffer = io.BytesIO()
+            np.savez(
+                buffer,
+                terms=np.asarray(postings.terms, dtype=str),
+                doc_ids=np.asarray(postings.doc_ids, dtype=str),
+                doc_lengths=postings.doc_lengths,
+                offsets=postings.offsets,
+                post_docs=postings.post_docs,
+                post_tfs=postings.post_tfs,
+            )
+            tmp_file = self._index_file.with_suffix(".tmp")
+            tmp_file.write_bytes(buffer.getvalue())
+            os.replace(tmp_file, self._index_file)
+            self._index_mtime = self._index_file.stat().st_mtime
+        logger.info(f"Saved BM25 index with {len(postings.doc_ids)} chunks to {self.index_path}")
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        """
+        Return the top-k chunk IDs for a query with their BM25 scores, best first.
+        """
+        with self._lock:
+            self._maybe_reload()
+            self._compact()
+            postings = self._postings
+        n = len(postings.doc_ids)
+        vocab = postings.vocab
+        columns = [vocab[t] for t in dict.fromkeys(tokenize(query)) if t in vocab]
+        if not n or not columns or k <= 0:
+            return []
+
+        lengths = postings.doc_lengths.astype(np.float32)
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(float(lengths.mean()), 1.0))
+        scores = np.zeros(n, dtype=np.float32)
+        for column in columns:
+            start, stop = postings.offsets[column], postings.offsets[column + 1]
+            if start == stop:
+                continue
+            docs = postings.post_docs[start:stop]
+            tfs = postings.post_tfs[start:stop].astype(np.float32)
+            df = stop - start
+            idf = np.log1p((n - df + 0.5) / (df + 0.5))
+            # Each document appears once per term, so fancy-index accumulation is safe.
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm[docs])
+
+        matched = np.flatnonzero(scores)
+        k = min(k, matched.shape[0])
+        if not k:
+            return []
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        order = top[np.argsort(-scores[top], kind="stable")]
+        return [(postings.doc_ids[row], float(scores[row])) for row in order]
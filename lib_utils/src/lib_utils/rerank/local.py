@@ -0,0 +1,155 @@
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+
+import numpy as np
+from langchain_core.documents.base import Document
+from langchain_core.embeddings import Embeddings
+from lib_utils.interfaces.reranker import Reranker
+from lib_utils.lexical.bm25 import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class LocalReranker(Reranker):
+    """
+    Offline CPU reranker mixing embedding similarity with a BM25 lexical score.
+
+    Chunks are never embedded: the dense score compares the query vector with the chunk
+    vectors the vector store already holds, and candidates without one get the mean dense
+    score of the others. The lexical score is BM25 over the candidate set, normalized to
+    [0, 1]. Raw dense scores are cached by (query hash, chunk id); normalization depends on
+    the candidate set, so the lexical part is recomputed on every call.
+    """
+
+    def __init__(
+        self,
+        embedding_function: Embeddings,
+        top_n: int,
+        lexical_weight: float = 0.3,
+        cache_size: int = 4096,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        """
+        Args:
+            embedding_function (Embeddings): Model of the query vector, the one retrieval uses,
+                so its query embedding cache applies.
+            top_n (int): Number of documents returned.
+            lexical_weight (float): Weight of the BM25 score; the rest goes to cosine similarity.
+            cache_size (int): Max entries of the dense score cache.
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 length normalization.
+        """
+        self.embedding = embedding_function
+        self.top_n = top_n
+        self.lexical_weight = lexical_weight
+        self.cache_size = cache_size
+        self.k1 = k1
+        self.b = b
+        self._scores: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _chunk_id(document: Document) -> str:
+        return document.id or hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _remember(self, cache: OrderedDict, key, value) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def lexical_scores(self, documents: list[Document], query: str) -> np.ndarray:
+        """
+        BM25 score of every document for the query terms, scaled so the best one is 1.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not documents:
+            return np.zeros(len(documents), dtype=np.float32)
+
+        column = {term: j for j, term in enumerate(terms)}
+        tf = np.zeros((len(documents), len(terms)), dtype=np.float32)
+        lengths = np.empty(len(documents), dtype=np.float32)
+        for i, document in enumerate(documents):
+            tokens = tokenize(document.page_content)
+            lengths[i] = len(tokens)
+            for term, count in Counter(tokens).items():
+                j = column.get(term)
+                if j is not None:
+                    tf[i, j] = count
+
+        n = len(documents)
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        avg_length = max(float(lengths.mean()), 1.0)
+        denominator = tf + self.k1 * (1 - self.b + self.b * lengths[:, None] / avg_length)
+        scores = (tf * (self.k1 + 1) / denominator) @ idf
+        best = float(scores.max())
+        return scores / best if best > 0 else scores
+
+    async def _dense_scores(
+        self, ids: list[str], query: str, vectors: dict[str, np.ndarray]
+    ) -> np.ndarray:
+        """
+        Cosine similarity of every chunk with the query, NaN for chunks without a vector.
+        """
+        query_key = hashlib.sha256(" ".join(tokenize(query)).encode("utf-8")).hexdigest()
+        with self._lock:
+            known = [self._scores.get((query_key, chunk_id)) for chunk_id in ids]
+        scores = np.array([np.nan if score is None else score for score in known])
+        missing = [i for i, score in enumerate(known) if score is None and ids[i] in vectors]
+        if missing:
+            query_vector = self._normalize(
+                np.asarray(await self.embedding.aembed_query(query), dtype=np.float32)
+            )
+            matrix = self._normalize(
+                np.stack([np.asarray(vectors[ids[i]], dtype=np.float32) for i in missing])
+            )
+            scores[missing] = matrix @ query_vector
+            with self._lock:
+                for i in missing:
+                    self._remember(self._scores, (query_key, ids[i]), float(scores[i]))
+        logger.debug(f"Reranking {len(ids)} chunks, {len(missing)} dense scores computed")
+        return scores
+
+    async def rerank(
+        self,
+        documents: list[Document],
+        query: str,
+        vectors: dict[str, np.ndarray] | None = None,
+    ) -> list[dict]:
+        if not documents:
+            return []
+
+        ids = [self._chunk_id(document) for document in documents]
+        dense = await self._dense_scores(ids, query, vectors or {})
+        if np.isnan(dense).all():
+            logger.warning("No chunk vectors to rerank with, ranking by BM25 scores only")
+            dense[:] = 0.0
+        else:
+            dense[np.isnan(dense)] = np.nanmean(dense)
+        lexical = self.lexical_scores(documents, query)
+        scores = (1 - self.lexical_weight) * dense + self.lexical_weight * lexical
+
+        order = np.argsort(-scores, kind="stable")[: self.top_n]
+        return [
+            {
+                "id": ids[i],
+                "index": int(i),
+                "score": float(scores[i]),
+                "document": {
+                    "id": ids[i],
+                    "text": documents[i].page_content,
+                    **documents[i].metadata,
+                },
+            }
+            for i in order
+        ]
@@ -0,0 +1,252 @@
+import json
+import logging
+import math
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows assigned to centroids per step, bounds the (rows, nlist) score matrix
+ASSIGN_BLOCK_ROWS = 16384
+
+
+class IVFLists(NamedTuple):
+    """
+    Loaded state of an IVF index, swapped in as a whole so searches never see a mix of two
+    loads: rows of centroid c are `rows[offsets[c]:offsets[c + 1]]`.
+    """
+
+    centroids: np.ndarray
+    rows: np.ndarray
+    offsets: np.ndarray
+
+
+class IVFIndex:
+    """
+    Inverted file index over the rows of a LocalVectorStore.
+
+    Rows are clustered around `nlist` spherical k-means centroids and a search only scans the
+    rows of the `nprobe` centroids closest to the query, so its cost grows with about
+    N * nprobe / nlist rows instead of N. The index lives next to the vectors:
+        - ivf_centroids.npy: (nlist, dimension) float32 centroids, memory-mapped.
+        - ivf_lists.i32: the centroid of every row, appended as rows are added.
+        - ivf.json: nlist and the number of rows the centroids were trained on.
+
+    Centroids are trained once the store reaches `min_train_rows`, and retrained (with
+    nlist growing like sqrt(N)) when it has grown `retrain_growth` times since, so an index
+    fed batch by batch during ingestion stays balanced. Below `min_train_rows` a brute-force
+    scan is already fast, and `trained` stays False.
+
+    Only the writer of the store calls `sync`, `select` and `reassign`; readers call `load`,
+    which never writes and leaves the index untrained until the writer caught up.
+    """
+
+    CENTROIDS_FILE = "ivf_centroids.npy"
+    LISTS_FILE = "ivf_lists.i32"
+    INFO_FILE = "ivf.json"
+
+    def __init__(
+        self,
+        index_path: str | Path,
+        dimension: int,
+        nlist: int | None = None,
+        nprobe: int = 16,
+        min_train_rows: int = 20000,
+        retrain_growth: float = 4.0,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            index_path (str | Path): Directory shared with the vector store files.
+            dimension (int): Vector dimension.
+            nlist (int | None): Number of centroids, None for 2 * sqrt(rows) at training time.
+            nprobe (int): Centroids scanned per query; higher means better recall, slower search.
+            min_train_rows (int): Rows needed before the centroids are trained.
+            retrain_growth (float): Growth since the last training that triggers a new one.
+            seed (int): Seed of the training sample and the initial centroids.
+        """
+        self.index_path = Path(index_path)
+        self.dimension = dimension
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_rows = min_train_rows
+        self.retrain_growth = retrain_growth
+        self.seed = seed
+
+        self.trained_rows = 0
+        # None until trained centroids covering every row are loaded
+        self.lists: IVFLists | None = None
+
+    @property
+    def _centroids_file(self) -> Path:
+        return self.index_path / self.CENTROIDS_FILE
+
+    @property
+    def _lists_file(self) -> Path:
+        return self.index_path / self.LISTS_FILE
+
+    @property
+    def _info_file(self) -> Path:
+        return self.index_path / self.INFO_FILE
+
+    @property
+    def trained(self) -> bool:
+        return self.lists is not None
+
+    @property
+    def list_count(self) -> int:
+        """
+        Number of trained centroids, 0 until the index is trained.
+        """
+        return 0 if self.lists is None else self.lists.centroids.shape[0]
+
+    @classmethod
+    def remove_files(cls, index_path: str | Path) -> None:
+        for name in (cls.CENTROIDS_FILE, cls.LISTS_FILE, cls.INFO_FILE):
+            (Path(index_path) / name).unlink(missing_ok=True)
+
+    def _assign(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        lists = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], ASSIGN_BLOCK_ROWS):
+            block = np.asarray(vectors[start : start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+            lists[start : start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+        return lists
+
+    def _train(self, vectors: np.ndarray, iterations: int = 10) -> np.ndarray:
+        """
+        Spherical k-means on a sample of at most 64 rows per centroid.
+        """
+        count = vectors.shape[0]
+        nlist = min(self.nlist or max(1, int(2 * math.sqrt(count))), count)
+        rng = np.random.default_rng(self.seed)
+        sample_rows = np.sort(rng.choice(count, min(count, nlist * 64), replace=False))
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+        for _ in range(iterations):
+            lists = self._assign(sample, centroids)
+            counts = np.bincount(lists, minlength=nlist)
+            # Empty clusters keep their previous centroid
+            filled = counts > 0
+            starts = (np.cumsum(counts) - counts)[filled]
+            sums = np.add.reduceat(sample[np.argsort(lists, kind="stable")], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids[filled] = sums / np.maximum(norms, np.finfo(np.float32).tiny)
+        logger.info(f"Trained {nlist} IVF centroids on {sample.shape[0]} of {count} rows")
+        return centroids
+
+    def _write_info(self, nlist: int) -> None:
+        tmp_info = self._info_file.with_suffix(".tmp")
+        tmp_info.write_text(json.dumps({"nlist": nlist, "trained_rows": self.trained_rows}))
+        os.replace(tmp_info, self._info_file)
+
+    def sync(self, vectors: np.ndarray) -> None:
+        """
+        Bring the index in line with `vectors`, the store's full (count, dimension) matrix:
+        train or retrain the centroids when due, otherwise assign the rows added since the
+        last sync, then load the result.
+        """
+        count = vectors.shape[0]
+        info = json.loads(self._info_file.read_text()) if self._info_file.exists() else None
+        trained_rows = info["trained_rows"] if info and self._centroids_file.exists() else 0
+        lists_size = self._lists_file.stat().st_size if self._lists_file.exists() else 0
+        have = min(lists_size // 4, count) if trained_rows else 0
+
+        if count >= self.min_train_rows and (
+            not trained_rows or count >= trained_rows * self.retrain_growth
+        ):
+            centroids = self._train(vectors)
+            self.trained_rows = count
+            tmp_centroids = self._centroids_file.with_suffix(".tmp.npy")
+            np.save(tmp_centroids, centroids)
+            os.replace(tmp_centroids, self._centroids_file)
+            tmp_lists = self._lists_file.with_suffix(".tmp")
+            self._assign(vectors, centroids).tofile(tmp_lists)
+            os.replace(tmp_lists, self._lists_file)
+            self._write_info(centroids.shape[0])
+        elif trained_rows:
+            if lists_size != have * 4:
+                os.truncate(self._lists_file, have * 4)
+            if have < count:
+                centroids = np.load(self._centroids_file, mmap_mode="r")
+                with self._lists_file.open("ab") as f:
+                    f.write(self._assign(vectors[have:], np.asarray(centroids)).tobytes())
+        self.load(count)
+
+    def load(self, count: int) -> IVFLists | None:
+        """
+        Map the centroids and group the first `count` rows by centroid. Never writes.
+        Leaves the index untrained when the files are missing or do not cover every row.
+
+        Returns:
+            IVFLists | None: The loaded state, also kept in `lists`.
+        """
+        self.lists = self._read(count)
+        return self.lists
+
+    def _read(self, count: int) -> IVFLists | None:
+        if not self._info_file.exists() or not self._centroids_file.exists():
+            return None
+        lists_size = self._lists_file.stat().st_size if self._lists_file.exists() else 0
+        if lists_size < count * 4:
+            return None
+
+        info = json.loads(self._info_file.read_text())
+        self.trained_rows = info["trained_rows"]
+        centroids = np.load(self._centroids_file, mmap_mode="r")
+        lists = np.fromfile(self._lists_file, dtype=np.int32, count=count)
+        rows = np.argsort(lists, kind="stable").astype(np.int64)
+        offsets = np.zeros(centroids.shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(lists, minlength=centroids.shape[0]), out=offsets[1:])
+        return IVFLists(centroids, rows, offsets)
+
+    def select(self, keep: np.ndarray) -> None:
+        """
+        Keep the assignments of the rows in the boolean mask `keep`, e.g. before the store
+        rewrites itself without deleted rows. The remaining rows are not reassigned.
+        """
+        if not self._lists_file.exists():
+            return
+        lists = np.fromfile(self._lists_file, dtype=np.int32, count=keep.shape[0])
+        if lists.shape[0] != keep.shape[0]:
+            # Does not cover the rows: drop it, the next sync assigns every row again
+            self._lists_file.unlink()
+            return
+        tmp_lists = self._lists_file.with_suffix(".tmp")
+        lists[keep].tofile(tmp_lists)
+        os.replace(tmp_lists, self._lists_file)
+
+    def reassign(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """
+        Move the updated `rows` to the centroids closest to their new `vectors`.
+        """
+        if self.lists is None or not rows.shape[0]:
+            return
+        lists = np.fromfile(self._lists_file, dtype=np.int32)
+        if lists.shape[0] <= rows.max():
+            self._lists_file.unlink()
+            return
+        lists[rows] = self._assign(vectors, np.asarray(self.lists.centroids))
+        tmp_lists = self._lists_file.with_suffix(".tmp")
+        lists.tofile(tmp_lists)
+        os.replace(tmp_lists, self._lists_file)
+
+    def candidates(
+        self, query_vector: np.ndarray, nprobe: int | None = None, lists: IVFLists | None = None
+    ) -> np.ndarray:
+        """
+        Rows of the `nprobe` centroids closest to the query, in ascending row order.
+        `lists` pins the state of an earlier load, by default the current one.
+        """
+        lists = lists or self.lists
+        if lists is None:
+            raise ValueError("IVF index is not trained.")
+        scores = lists.centroids @ query_vector
+        nprobe = min(nprobe or self.nprobe, scores.shape[0])
+        probes = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        rows = np.concatenate([lists.rows[lists.offsets[c] : lists.offsets[c + 1]] for c in probes])
+        rows.sort()
+        return rows
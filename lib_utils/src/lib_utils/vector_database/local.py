@@ -0,0 +1,688 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.documents.base import Document
+from langchain_core.embeddings import Embeddings
+from lib_utils.interfaces.reranker import Reranker
+from lib_utils.interfaces.vector_store import VectorStoreClient
+from lib_utils.lexical.bm25 import BM25Index, reciprocal_rank_fusion
+from lib_utils.vector_database.ivf import IVFIndex, IVFLists
+from lib_utils.vector_database.mmr import maximal_marginal_relevance
+from lib_utils.vector_database.quantization import QUANTIZERS, Quantizer, get_quantizer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """
+    Everything a search reads, loaded together and swapped in with a single assignment, so
+    a search running in a worker thread never mixes two loads of the index.
+    """
+
+    ids: list[str]
+    texts: list[str]
+    metadatas: list[dict[str, Any]]
+    rows: dict[str, int]
+    vectors: np.ndarray
+    codes: np.ndarray | None = None
+    # Codes of the rows past the end of the codes file, encoded in memory by readers
+    codes_tail: np.ndarray | None = None
+    ann_lists: IVFLists | None = None
+    # True for rows deleted or replaced since the last rewrite, None when there are none
+    dead: np.ndarray | None = None
+
+
+class LocalVectorStore(VectorStoreClient):
+    """
+    In-process vector store backed by a memory-mapped float32 matrix.
+
+    The index directory contains these files:
+        - vectors.f32: row-major float32 matrix of L2-normalized embeddings.
+        - sidecar.jsonl: one JSON line per row with the chunk id, text and metadata.
+        - deleted.i64: rows deleted, or replaced by a later row with the same id.
+        - index.json: dimension, row and deleted counts, and a generation counter bumped on
+          every write.
+
+    Writes only ever append: an upsert of an existing id appends the new row and marks the
+    old one deleted, and a delete only marks rows. Searches skip deleted rows, and the files
+    are rewritten without them, block by block from the mapping, once they make up
+    `COMPACT_DELETED_RATIO` of the rows.
+
+    With `quantization` set to "int8" or "binary", a fourth file holds the quantized vectors
+    (see lib_utils.vector_database.quantization). Searches scan those codes, then rescore the
+    best `k * rescore_factor` rows against the memory-mapped float32 matrix, so only the codes
+    and a few float rows per query need to stay in memory.
+
+    With an `ann_index` (see lib_utils.vector_database.ivf), searches only score the rows of
+    the clusters nearest to the query instead of scanning every row.
+
+    Readers reload the index whenever the generation in index.json changes, so the API picks up
+    a re-ingested corpus without restarting. A `read_only` store never writes to the index
+    directory: codes missing from the codes file are encoded in memory, and only a writer
+    (the ingest pipeline) appends or truncates the files.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    SIDECAR_FILE = "sidecar.jsonl"
+    INDEX_FILE = "index.json"
+    DELETED_FILE = "deleted.i64"
+    # Float rows read per step while quantizing or rewriting, bounds the memory of a (re)build
+    QUANTIZE_BLOCK_ROWS = 65536
+    # Share of deleted rows that triggers a rewrite of the files without them
+    COMPACT_DELETED_RATIO = 0.25
+
+    def __init__(
+        self,
+        embedding_function: Embeddings,
+        index_path: str | Path,
+        model_size: int,
+        rerank_top_n: int,
+        fetch_k: int = 20,
+        reranker: Reranker | None = None,
+        lexical_index: BM25Index | None = None,
+        quantization: str = "none",
+        rescore_factor: int | None = None,
+        ann_index: IVFIndex | None = None,
+        read_only: bool = False,
+    ):
+        self.embedding = embedding_function
+        self.index_path = Path(index_path)
+        self.dimension = model_size
+        self.rerank_top_n = rerank_top_n
+        self.fetch_k = fetch_k
+        self.reranker = reranker
+        # BM25 index over the same chunk IDs, required by the "hybrid" search type
+        self.lexical_index = lexical_index
+        # First-pass encoding, None keeps exact float32 search
+        self.quantizer = get_quantizer(quantization, model_size)
+        if rescore_factor is None and self.quantizer is not None:
+            rescore_factor = self.quantizer.rescore_factor
+        self.rescore_factor = rescore_factor or 1
+        # Approximate nearest-neighbor index over the same rows, None keeps the full scan
+        self.ann_index = ann_index
+        self.read_only = read_only
+
+        self.generation = 0
+        self._snapshot = _Snapshot([], [], [], {}, np.empty((0, self.dimension), np.float32))
+        self._needs_rewrite = False
+
+        if not read_only:
+            self.index_path.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    @property
+    def _vectors_file(self) -> Path:
+        return self.index_path / self.VECTORS_FILE
+
+    @property
+    def _sidecar_file(self) -> Path:
+        return self.index_path / self.SIDECAR_FILE
+
+    @property
+    def _index_file(self) -> Path:
+        return self.index_path / self.INDEX_FILE
+
+    @property
+    def _deleted_file(self) -> Path:
+        return self.index_path / self.DELETED_FILE
+
+    def __len__(self) -> int:
+        return len(self._snapshot.rows)
+
+    def _read_index_info(self) -> dict[str, Any] | None:
+        try:
+            return json.loads(self._index_file.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def _load(self, info: dict[str, Any] | None = None) -> None:
+        """
+        Load the sidecar into memory and map the vector matrix from disk, then swap the result
+        in as the snapshot searches read.
+
+        Writers flag index.json as `writing` before touching the files. A read-only store
+        keeps its current snapshot while the flag is set, and discards a load during which
+        index.json changed, so it never publishes files of two different writes.
+        """
+        info = info or self._read_index_info()
+        if info is None:
+            return
+        if self.read_only and info.get("writing"):
+            return
+        try:
+            snapshot, needs_rewrite = self._read_snapshot(info)
+        except (OSError, ValueError, IndexError) as e:
+            if self.read_only and self._read_index_info() != info:
+                logger.info(f"Index at {self.index_path} changed while loading: {e}")
+                return
+            raise
+        if self.read_only and self._read_index_info() != info:
+            return
+
+        self._snapshot = snapshot
+        self.generation = info.get("generation", 0)
+        # Leftovers from an interrupted write: the next write must rewrite the files.
+        self._needs_rewrite = needs_rewrite or bool(info.get("writing"))
+        logger.info(f"Loaded local index with {info['count']} vectors from {self.index_path}")
+
+    def _read_snapshot(self, info: dict[str, Any]) -> tuple[_Snapshot, bool]:
+        """
+        Returns:
+            tuple: The snapshot of the files described by `info`, and whether the files hold
+                leftovers of an interrupted append.
+        """
+        if info["dimension"] != self.dimension:
+            raise ValueError(
+                f"Index at {self.index_path} has dimension {info['dimension']}, "
+                f"expected {self.dimension}"
+            )
+
+        count = info["count"]
+        ids: list[str] = []
+        texts: list[str] = []
+        metadatas: list[dict[str, Any]] = []
+        extra_lines = 0
+        with self._sidecar_file.open(encoding="utf-8") as f:
+            for line in f:
+                if len(ids) == count:
+                    extra_lines += 1
+                    continue
+                record = json.loads(line)
+                ids.append(record["id"])
+                texts.append(record["text"])
+                metadatas.append(record["metadata"])
+
+        dead = None
+        deleted = info.get("deleted", 0)
+        if deleted:
+            dead = np.zeros(count, dtype=bool)
+            dead[np.fromfile(self._deleted_file, dtype=np.int64, count=deleted)] = True
+        live = range(count) if dead is None else np.flatnonzero(~dead).tolist()
+        vectors = self._map_vectors(count)
+        codes, codes_tail = self._load_codes(vectors)
+        ann_lists = None
+        if self.ann_index is not None:
+            # Training and assignment happen in the writer's `_append` and `_rewrite`; an index
+            # that does not cover every row stays untrained and searches scan every row
+            ann_lists = self.ann_index.load(count)
+        snapshot = _Snapshot(
+            ids,
+            texts,
+            metadatas,
+            {ids[row]: row for row in live},
+            vectors,
+            codes,
+            codes_tail,
+            ann_lists,
+            dead,
+        )
+        row_bytes = self.dimension * np.dtype(np.float32).itemsize
+        vectors_size = self._vectors_file.stat().st_size if self._vectors_file.exists() else 0
+        return snapshot, bool(extra_lines or vectors_size != count * row_bytes)
+
+    def _map_vectors(self, count: int) -> np.ndarray:
+        if not count:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.memmap(
+            self._vectors_file, dtype=np.float32, mode="r", shape=(count, self.dimension)
+        )
+
+    def _sync_codes(self, count: int) -> None:
+        """
+        Bring the codes file in line with the first `count` float rows: drop rows past them
+        and encode the missing tail, e.g. after rows were appended by a writer configured
+        without quantization, or after a rewrite removed the codes.
+        """
+        if self.quantizer is None:
+            return
+        path = self.index_path / self.quantizer.codes_file
+        row_bytes = self.quantizer.dtype.itemsize
+        size = path.stat().st_size if path.exists() else 0
+        have = min(size // row_bytes, count)
+        if size != have * row_bytes:
+            os.truncate(path, have * row_bytes)
+        if have == count:
+            return
+
+        logger.info(f"Quantizing {count - have} vectors to {self.quantizer.name}")
+        vectors = self._map_vectors(count)
+        with path.open("ab") as f:
+            for start in range(have, count, self.QUANTIZE_BLOCK_ROWS):
+                block = vectors[start : start + self.QUANTIZE_BLOCK_ROWS]
+                f.write(self.quantizer.encode(block).tobytes())
+
+    def _load_codes(self, vectors: np.ndarray) -> tuple[np.ndarray | None, np.ndarray | None]:
+        """
+        Map the codes of the rows of `vectors`. A writer first brings the codes file up to
+        date; a reader maps the rows the file has and encodes the rest in memory.
+
+        Returns:
+            tuple: The memory-mapped codes and the in-memory codes of the rows after them.
+        """
+        count = vectors.shape[0]
+        if self.quantizer is None or not count:
+            return None, None
+        if not self.read_only:
+            self._sync_codes(count)
+        path = self.index_path / self.quantizer.codes_file
+        size = path.stat().st_size if path.exists() else 0
+        have = min(size // self.quantizer.dtype.itemsize, count)
+        codes = np.empty(0, dtype=self.quantizer.dtype)
+        if have:
+            codes = np.memmap(path, dtype=self.quantizer.dtype, mode="r", shape=(have,))
+        if have == count:
+            return codes, None
+        logger.info(f"Quantizing {count - have} vectors missing from {path} in memory")
+        tail = np.concatenate(
+            [
+                self.quantizer.encode(np.asarray(vectors[start : start + self.QUANTIZE_BLOCK_ROWS]))
+                for start in range(have, count, self.QUANTIZE_BLOCK_ROWS)
+            ]
+        )
+        return codes, tail
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise PermissionError(f"Local index at {self.index_path} is opened read-only")
+
+    def _maybe_reload(self) -> _Snapshot:
+        """
+        Reload the index if another process (e.g. the ingest pipeline) wrote to it. Keyed on
+        the generation, not the file mtime, which may not change when two writes fall within
+        its resolution.
+
+        Returns:
+            _Snapshot: The current snapshot, to be used for the whole operation.
+        """
+        info = self._read_index_info()
+        if info is not None and info.get("generation", 0) != self.generation:
+            self._load(info)
+        return self._snapshot
+
+    def _write_index_info(self, count: int, deleted: int, writing: bool = False) -> None:
+        # index.json is written last: readers only reload once the data files are complete.
+        tmp_index = self._index_file.with_suffix(".tmp")
+        info = {
+            "dimension": self.dimension,
+            "count": count,
+            "deleted": deleted,
+            "generation": self.generation,
+        }
+        if writing:
+            info["writing"] = True
+        tmp_index.write_text(json.dumps(info), encoding="utf-8")
+        os.replace(tmp_index, self._index_file)
+
+    def _begin_write(self, snapshot: _Snapshot) -> int:
+        """
+        Start a new generation, flagged as being written until `_write_index_info` ends it.
+
+        Returns:
+            int: The number of deleted rows of `snapshot`.
+        """
+        self.generation += 1
+        dead_count = 0 if snapshot.dead is None else int(np.count_nonzero(snapshot.dead))
+        if self._index_file.exists():
+            self._write_index_info(len(snapshot.ids), dead_count, writing=True)
+        return dead_count
+
+    @staticmethod
+    def _sidecar_line(doc_id: str, text: str, metadata: dict[str, Any]) -> str:
+        return json.dumps({"id": doc_id, "text": text, "metadata": metadata}, ensure_ascii=False)
+
+    def _append(
+        self,
+        snapshot: _Snapshot,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+        vectors: np.ndarray,
+        deleted: list[int],
+    ) -> None:
+        """
+        Append the rows of `ids` past the end of `snapshot` with their `vectors`, and mark the
+        `deleted` rows, then rewrite the files if deleted rows have piled up.
+        """
+        dead_count = self._begin_write(snapshot)
+        start = len(snapshot.ids)
+        if vectors.shape[0]:
+            with self._vectors_file.open("ab") as f:
+                f.write(vectors.astype(np.float32, copy=False).tobytes())
+            with self._sidecar_file.open("a", encoding="utf-8") as f:
+                for row in range(start, len(ids)):
+                    f.write(self._sidecar_line(ids[row], texts[row], metadatas[row]))
+                    f.write("\n")
+        if deleted:
+            # Drop entries of an interrupted write past the recorded count first
+            size = self._deleted_file.stat().st_size if self._deleted_file.exists() else 0
+            if size != dead_count * 8:
+                os.truncate(self._deleted_file, dead_count * 8)
+            with self._deleted_file.open("ab") as f:
+                f.write(np.asarray(deleted, dtype=np.int64).tobytes())
+            dead_count += len(deleted)
+        self._sync_codes(len(ids))
+        if self.ann_index is not None:
+            self.ann_index.sync(self._map_vectors(len(ids)))
+        self._write_index_info(len(ids), dead_count)
+        self._load()
+        if dead_count and dead_count >= self.COMPACT_DELETED_RATIO * len(ids):
+            self._rewrite(self._snapshot)
+
+    def _rewrite(self, snapshot: _Snapshot) -> None:
+        """
+        Rewrite the vector matrix and sidecar with the live rows of `snapshot` only, dropping
+        deleted rows and leftovers of an interrupted write, then swap in a fresh mapping.
+        Vectors are copied block by block, so memory does not grow with the index.
+        """
+        self._begin_write(snapshot)
+        keep = np.ones(len(snapshot.ids), dtype=bool) if snapshot.dead is None else ~snapshot.dead
+        live = np.flatnonzero(keep)
+        if self.ann_index is not None:
+            self.ann_index.select(keep)
+
+        tmp_vectors = self._vectors_file.with_suffix(".tmp")
+        with tmp_vectors.open("wb") as f:
+            for start in range(0, live.shape[0], self.QUANTIZE_BLOCK_ROWS):
+                block = snapshot.vectors[live[start : start + self.QUANTIZE_BLOCK_ROWS]]
+                f.write(np.asarray(block, dtype=np.float32).tobytes())
+        os.replace(tmp_vectors, self._vectors_file)
+
+        tmp_sidecar = self._sidecar_file.with_suffix(".tmp")
+        with tmp_sidecar.open("w", encoding="utf-8") as f:
+            for row in live:
+                f.write(
+                    self._sidecar_line(
+                        snapshot.ids[row], snapshot.texts[row], snapshot.metadatas[row]
+                    )
+                )
+                f.write("\n")
+        os.replace(tmp_sidecar, self._sidecar_file)
+        self._deleted_file.unlink(missing_ok=True)
+        # Rows moved: codes of every encoding are stale, ours is rebuilt now
+        for quantizer in QUANTIZERS.values():
+            (self.index_path / quantizer.codes_file).unlink(missing_ok=True)
+        self._sync_codes(live.shape[0])
+        # The ANN assignments were carried over to the kept rows above; without an ANN index
+        # configured here they can no longer be trusted
+        if self.ann_index is not None:
+            self.ann_index.sync(self._map_vectors(live.shape[0]))
+        else:
+            IVFIndex.remove_files(self.index_path)
+        self._write_index_info(live.shape[0], 0)
+        self._load()
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    async def _embed_query(self, query: str) -> np.ndarray:
+        vector = np.asarray(await self.embedding.aembed_query(query), dtype=np.float32)
+        return self._normalize(vector)
+
+    @staticmethod
+    def _to_document(snapshot: _Snapshot, row: int) -> Document:
+        return Document(
+            id=snapshot.ids[row],
+            page_content=snapshot.texts[row],
+            metadata=dict(snapshot.metadatas[row]),
+        )
+
+    async def store_documents(self, documents: list[Document]) -> list[str]:
+        if not documents:
+            return []
+        embeddings = await self.embedding.aembed_documents([doc.page_content for doc in documents])
+        return await self.store_embeddings(documents, embeddings)
+
+    async def store_embeddings(
+        self, documents: list[Document], embeddings: list[list[float]]
+    ) -> list[str]:
+        logger.info(f"Adding {len(documents)} to the local vector store.")
+        if not documents:
+            return []
+        self._check_writable()
+
+        new_vectors = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        if new_vectors.shape[1] != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {new_vectors.shape[1]} does not match {self.dimension}"
+            )
+
+        snapshot = self._maybe_reload()
+        if self._needs_rewrite:
+            self._rewrite(snapshot)
+            snapshot = self._snapshot
+        # The snapshot may be in use by searches: build the new sidecar on copies
+        doc_ids, texts = list(snapshot.ids), list(snapshot.texts)
+        metadatas, rows = list(snapshot.metadatas), dict(snapshot.rows)
+        deleted: list[int] = []
+        ids = []
+        for doc in documents:
+            doc_id = doc.id or doc.metadata.get("id") or f"doc_{len(doc_ids)}"
+            ids.append(doc_id)
+            row = rows.get(doc_id)
+            if row is not None:
+                # Same id: upsert semantics, the appended row replaces the existing one
+                deleted.append(row)
+            rows[doc_id] = len(doc_ids)
+            doc_ids.append(doc_id)
+            texts.append(doc.page_content)
+            metadatas.append(dict(doc.metadata))
+
+        self._append(snapshot, doc_ids, texts, metadatas, new_vectors, deleted)
+        return ids
+
+    async def delete_documents(self, ids: list[str]) -> None:
+        self._check_writable()
+        snapshot = self._maybe_reload()
+        if self._needs_rewrite:
+            self._rewrite(snapshot)
+            snapshot = self._snapshot
+        rows = sorted({snapshot.rows[doc_id] for doc_id in ids if doc_id in snapshot.rows})
+        if not rows:
+            return
+        logger.info(f"Deleting {len(rows)} from the local vector store.")
+        self._append(
+            snapshot,
+            snapshot.ids,
+            snapshot.texts,
+            snapshot.metadatas,
+            np.empty((0, self.dimension), np.float32),
+            rows,
+        )
+
+    async def fetch_documents(self, ids: list[str]) -> list[Document]:
+        snapshot = self._maybe_reload()
+        return [
+            self._to_document(snapshot, snapshot.rows[doc_id])
+            for doc_id in ids
+            if doc_id in snapshot.rows
+        ]
+
+    async def index_version(self) -> str | None:
+        self._maybe_reload()
+        return str(self.generation)
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    @staticmethod
+    def _code_scores(
+        quantizer: Quantizer,
+        head: np.ndarray,
+        tail: np.ndarray | None,
+        query_vector: np.ndarray,
+        rows: np.ndarray | None,
+    ) -> np.ndarray:
+        """
+        Approximate scores of the sorted `rows`, or of every row when None, from the mapped
+        codes (`head`) and the codes encoded in memory after them (`tail`).
+        """
+        if tail is None:
+            return quantizer.scores(head if rows is None else head[rows], query_vector)
+        if rows is None:
+            parts = [head, tail]
+        else:
+            split = int(np.searchsorted(rows, head.shape[0]))
+            parts = [head[rows[:split]], tail[rows[split:] - head.shape[0]]]
+        return np.concatenate([quantizer.scores(part, query_vector) for part in parts])
+
+    def _similarity(
+        self, query_vector: np.ndarray, k: int, snapshot: _Snapshot | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k search by inner product over the live rows of the normalized matrix. With an ANN
+        index only the rows of the probed clusters are scored. With quantization, the codes
+        pick `k * rescore_factor` candidates whose exact scores decide the top k.
+
+        Args:
+            query_vector (np.ndarray): Normalized query embedding.
+            k (int): Number of rows to return.
+            snapshot (_Snapshot | None): State to search, by default the current one. Callers
+                that also read rows or documents pass the snapshot they read them from.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Row indices and scores sorted by descending score.
+        """
+        snapshot = snapshot or self._snapshot
+        dead = snapshot.dead
+        k = min(k, len(snapshot.rows))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        rows = None
+        if self.ann_index is not None and snapshot.ann_lists is not None:
+            rows = self.ann_index.candidates(query_vector, lists=snapshot.ann_lists)
+            if dead is not None:
+                rows = rows[~dead[rows]]
+            if rows.shape[0] < k:
+                # Probed clusters too small to fill k: fall back to the full scan
+                rows = None
+
+        if self.quantizer is None or snapshot.codes is None:
+            vectors = snapshot.vectors if rows is None else snapshot.vectors[rows]
+            scores = vectors @ query_vector
+            if rows is None and dead is not None:
+                scores[dead] = -np.inf
+            order = self._top_k(scores, k)
+            return (order if rows is None else rows[order]), scores[order]
+
+        approximate = self._code_scores(
+            self.quantizer, snapshot.codes, snapshot.codes_tail, query_vector, rows
+        )
+        if rows is None and dead is not None:
+            approximate[dead] = -np.inf
+        # Sorted rows read the float matrix front to back
+        candidates = np.sort(self._top_k(approximate, k * self.rescore_factor))
+        if rows is not None:
+            candidates = rows[candidates]
+        elif dead is not None:
+            candidates = candidates[~dead[candidates]]
+        scores = snapshot.vectors[candidates] @ query_vector
+        order = self._top_k(scores, k)
+        return candidates[order], scores[order]
+
+    async def retrieve(
+        self,
+        query: str,
+        search_type: str,
+        k: int,
+        fetch_k: int | None = None,
+        lambda_mult: float = 0.5,
+    ) -> list[Document]:
+        snapshot = self._maybe_reload()
+        if not snapshot.rows or k <= 0:
+            return []
+
+        query_vector = await self._embed_query(query)
+        fetch_k = max(fetch_k or self.fetch_k, k)
+        if search_type == "similarity":
+            rows, _ = self._similarity(query_vector, k, snapshot)
+        elif search_type == "mmr":
+            candidates, _ = self._similarity(query_vector, fetch_k, snapshot)
+            selected = maximal_marginal_relevance(
+                query_vector, snapshot.vectors[candidates], k, lambda_mult
+            )
+            rows = candidates[selected]
+        elif search_type == "hybrid":
+            rows = await self._hybrid_rows(snapshot, query, query_vector, k, fetch_k)
+        else:
+            raise ValueError(f"search_type of {search_type} not allowed.")
+
+        return [self._to_document(snapshot, int(row)) for row in rows]
+
+    async def _hybrid_rows(
+        self, snapshot: _Snapshot, query: str, query_vector: np.ndarray, k: int, fetch_k: int
+    ) -> np.ndarray:
+        """
+        Run dense and BM25 search concurrently and fuse them with reciprocal rank fusion.
+        The dense search thread gets the caller's snapshot, so a reload meanwhile is harmless.
+        """
+        if self.lexical_index is None:
+            raise ValueError("search_type of hybrid requires a lexical index.")
+        (dense, _), lexical = await asyncio.gather(
+            asyncio.to_thread(self._similarity, query_vector, fetch_k, snapshot),
+            asyncio.to_thread(self.lexical_index.search, query, fetch_k),
+        )
+        fused = reciprocal_rank_fusion(
+            [[snapshot.ids[row] for row in dense], [doc_id for doc_id, _ in lexical]]
+        )
+        rows = [snapshot.rows[doc_id] for doc_id, _ in fused if doc_id in snapshot.rows]
+        return np.asarray(rows[:k], dtype=np.int64)
+
+    async def rerank_context(self, documents: list[Document], query: str) -> list[dict]:
+        """
+        Rerank documents by cosine similarity to the query using the stored vectors.
+
+        Documents that are not in the index are embedded on the fly. The result mirrors
+        the shape returned by PineconeRerank: [{id, index, score, document}].
+        A configured reranker is used instead when given, with the stored vectors.
+        """
+        if not documents:
+            return []
+        snapshot = self._maybe_reload()
+        if self.reranker is not None:
+            rows = {doc.id: snapshot.rows[doc.id] for doc in documents if doc.id in snapshot.rows}
+            stored = {doc_id: snapshot.vectors[row] for doc_id, row in rows.items() if doc_id}
+            return await self.reranker.rerank(documents, query, stored)
+
+        query_vector = await self._embed_query(query)
+        vectors = np.empty((len(documents), self.dimension), dtype=np.float32)
+        missing = []
+        for i, doc in enumerate(documents):
+            row = snapshot.rows.get(doc.id) if doc.id else None
+            if row is None:
+                missing.append(i)
+            else:
+                vectors[i] = snapshot.vectors[row]
+        if missing:
+            embedded = await self.embedding.aembed_documents(
+                [documents[i].page_content for i in missing]
+            )
+            vectors[missing] = self._normalize(np.asarray(embedded, dtype=np.float32))
+
+        scores = vectors @ query_vector
+        order = np.argsort(-scores)[: self.rerank_top_n]
+        return [
+            {
+                "id": documents[i].id or f"doc_{i}",
+                "index": int(i),
+                "score": float(scores[i]),
+                "document": {
+                    "id": documents[i].id or f"doc_{i}",
+                    "text": documents[i].page_content,
+                    **documents[i].metadata,
+                },
+            }
+            for i in order
+        ]
@@ -0,0 +1,86 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def maximal_marginal_relevance(
+    query_vector: np.ndarray, candidates: np.ndarray, k: int, lambda_mult: float = 0.5
+) -> np.ndarray:
+    """
+    Greedy maximal marginal relevance over a candidate matrix.
+
+    All cosine similarities, query to candidates and candidates to each other, are computed
+    in one batched pass up front; each of the k greedy steps is then a vectorized update of
+    every candidate's similarity to the selected set, with no per-pair Python work.
+
+    Args:
+        query_vector (np.ndarray): Query embedding, shape (dimension,).
+        candidates (np.ndarray): Candidate embeddings, shape (n, dimension).
+        k (int): Number of candidates to select.
+        lambda_mult (float): 1 ranks by relevance only, 0 by diversity only.
+
+    Returns:
+        np.ndarray: Indices of the selected rows of `candidates`, in selection order.
+    """
+    k = min(k, candidates.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    candidates = np.asarray(candidates, dtype=np.float32)
+    norms = np.linalg.norm(candidates, axis=1, keepdims=True)
+    normalized = candidates / np.where(norms == 0, 1.0, norms)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / (np.linalg.norm(query) or 1.0)
+
+    relevance = normalized @ query
+    similarity = normalized @ normalized.T
+
+    selected = np.empty(k, dtype=np.int64)
+    redundancy = np.full(candidates.shape[0], -np.inf, dtype=np.float32)
+    available = np.ones(candidates.shape[0], dtype=bool)
+    # The most relevant candidate always comes first
+    best = int(np.argmax(relevance))
+    for i in range(k):
+        selected[i] = best
+        available[best] = False
+        if i == k - 1:
+            break
+        np.maximum(redundancy, similarity[best], out=redundancy)
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        best = int(np.argmax(np.where(available, scores, -np.inf)))
+    return selected
+
+
+class VectorCache:
+    """
+    Bounded LRU cache of chunk vectors by chunk id, so MMR over remote candidates only
+    fetches the vectors of chunks it has not seen recently. Chunk ids are content hashes,
+    so a cached vector stays valid for as long as the embedding model does.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._vectors: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def get_many(self, ids: list[str]) -> dict[str, np.ndarray]:
+        with self._lock:
+            found = {}
+            for chunk_id in ids:
+                vector = self._vectors.get(chunk_id)
+                if vector is not None:
+                    self._vectors.move_to_end(chunk_id)
+                    found[chunk_id] = vector
+            return found
+
+    def put_many(self, vectors: dict[str, np.ndarray]) -> None:
+        with self._lock:
+            for chunk_id, vector in vectors.items():
+                self._vectors[chunk_id] = vector
+                self._vectors.move_to_end(chunk_id)
+            while len(self._vectors) > self.max_size:
+                self._vectors.popitem(last=False)
@@ -1,15 +1,28 @@
+import asyncio
 import logging
 import time
+import uuid
+from contextlib import AsyncExitStack
+from typing import Any
+
+import numpy as np
 from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores import VectorStore
 from langchain_pinecone import PineconeVectorStore
 from langchain_core.documents.base import Document
 from langchain_pinecone.rerank import PineconeRerank
+from lib_utils.interfaces.reranker import Reranker
 from lib_utils.interfaces.vector_store import VectorStoreClient
+from lib_utils.lexical.bm25 import BM25Index, reciprocal_rank_fusion
+from lib_utils.vector_database.mmr import VectorCache, maximal_marginal_relevance
 from pinecone import Pinecone, ServerlessSpec
 
 logger = logging.getLogger(__name__)
 
+# Namespace of the index version record, kept apart from the chunks searched by queries
+VERSION_NAMESPACE = "index-version"
+VERSION_ID = "index-version"
+
 
 class PineconeService(VectorStoreClient):
     def __init__(
@@ -19,6 +32,11 @@ class PineconeService(VectorStoreClient):
         index_name: str,
         model_size: int,
         rerank_top_n: int,
+        reranker: Reranker | None = None,
+        lexical_index: BM25Index | None = None,
+        fetch_k: int = 20,
+        vector_cache_size: int = 4096,
+        version_check_seconds: float = 30.0,
     ):
         pc: Pinecone = Pinecone(api_key=api_key)
         existing_indexes = [index_info["name"] for index_info in pc.list_indexes()]
@@ -34,26 +52,206 @@ class PineconeService(VectorStoreClient):
             while not pc.describe_index(index_name).status["ready"]:
                 time.sleep(1)
 
-        index = pc.Index(index_name)
+        self.index = pc.Index(index_name)
+        self.embedding = embedding_function
         self.vector_store: VectorStore = PineconeVectorStore(
-            index=index, embedding=embedding_function
+            index=self.index, embedding=embedding_function
         )
+        self._exit_stack: AsyncExitStack | None = None
+        # Async client of the index, open between `start` and `aclose`
+        self._async_index: Any = None
 
         from pydantic import SecretStr
 
         # Convert the api_key string to a SecretStr
         api_key_secret = SecretStr(api_key)
         self.rerank = PineconeRerank(client=pc, pinecone_api_key=api_key_secret, top_n=rerank_top_n)
+        # A configured reranker replaces the remote Pinecone rerank call
+        self.reranker = reranker
+        # BM25 index over the same chunk IDs, required by the "hybrid" search type
+        self.lexical_index = lexical_index
+        self.fetch_k = fetch_k
+        # Vectors of recently returned chunks, so MMR queries skip `include_values`
+        self.vector_cache = VectorCache(vector_cache_size)
+        self.model_size = model_size
+        # The version record is fetched at most once per interval, not on every request
+        self.version_check_seconds = version_check_seconds
+        self._version: str | None = None
+        self._version_checked_at = -float("inf")
+
+    async def start(self) -> None:
+        """
+        Keep the async index client, and its pooled HTTP session, open until `aclose`.
+        Otherwise PineconeVectorStore opens and closes a session on every async call.
+        The queries, fetches and upserts made here directly go through the same client.
+        """
+        if self._exit_stack is not None or not isinstance(self.vector_store, PineconeVectorStore):
+            return
+        self._exit_stack = AsyncExitStack()
+        await self._exit_stack.enter_async_context(self.vector_store)
+        self._async_index = await self.vector_store.async_index
+
+    async def aclose(self) -> None:
+        self._async_index = None
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+
+    async def _call_index(self, method: str, **kwargs) -> Any:
+        """
+        Call a data plane method on the async client opened by `start`, or, outside of
+        `start` and `aclose` (e.g. in the ingest pipeline), on the sync client in a thread.
+        """
+        if self._async_index is not None:
+            return await getattr(self._async_index, method)(**kwargs)
+        return await asyncio.to_thread(getattr(self.index, method), **kwargs)
 
     async def store_documents(self, documents: list[Document]) -> list[str]:
         logger.info(f"Adding {len(documents)} to the vector db.")
         return await self.vector_store.aadd_documents(documents)
 
-    async def retrieve(self, query: str, search_type: str, k: int) -> list[Document]:
+    async def store_embeddings(
+        self, documents: list[Document], embeddings: list[list[float]]
+    ) -> list[str]:
+        ids = [doc.id or str(uuid.uuid4()) for doc in documents]
+        # Same layout as PineconeVectorStore: the chunk text lives under the "text" metadata key
+        vectors = [
+            (doc_id, embedding, {**doc.metadata, "text": doc.page_content})
+            for doc_id, embedding, doc in zip(ids, embeddings, documents)
+        ]
+        logger.info(f"Upserting {len(vectors)} vectors to the vector db.")
+        await self._call_index("upsert", vectors=vectors)
+        return ids
+
+    async def delete_documents(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        logger.info(f"Deleting {len(ids)} from the vector db.")
+        await self.vector_store.adelete(ids=ids)
+
+    async def retrieve(
+        self,
+        query: str,
+        search_type: str,
+        k: int,
+        fetch_k: int | None = None,
+        lambda_mult: float = 0.5,
+    ) -> list[Document]:
+        fetch_k = max(fetch_k or self.fetch_k, k)
+        if search_type == "hybrid":
+            return await self._hybrid_search(query, k, fetch_k)
+        if search_type == "mmr":
+            return await self._mmr_search(query, k, fetch_k, lambda_mult)
         retrieved_docs = await self.vector_store.asearch(query, search_type, k=k)
 
         return retrieved_docs
 
+    async def _candidate_vectors(self, ids: list[str]) -> dict[str, np.ndarray]:
+        """
+        Vectors of the given chunks, from the local cache or, for the rest, one fetch call.
+        """
+        vectors = self.vector_cache.get_many(ids)
+        missing = [doc_id for doc_id in ids if doc_id not in vectors]
+        if missing:
+            response = await self._call_index("fetch", ids=missing)
+            fetched = {
+                doc_id: np.asarray(vector.values, dtype=np.float32)
+                for doc_id, vector in response.vectors.items()
+            }
+            self.vector_cache.put_many(fetched)
+            vectors.update(fetched)
+        logger.debug(f"Vectors of {len(ids)} candidates, {len(missing)} fetched")
+        return vectors
+
+    async def _mmr_search(
+        self, query: str, k: int, fetch_k: int, lambda_mult: float
+    ) -> list[Document]:
+        """
+        Query the candidates without their values, take the vectors from the local cache
+        (fetching only unseen ones) and select k of them with the vectorized MMR.
+        """
+        query_vector = np.asarray(await self.embedding.aembed_query(query), dtype=np.float32)
+        response = await self._call_index(
+            "query",
+            vector=query_vector.tolist(),
+            top_k=fetch_k,
+            include_metadata=True,
+            include_values=False,
+        )
+        vectors = await self._candidate_vectors([match.id for match in response.matches])
+        matches = [match for match in response.matches if match.id in vectors]
+        if not matches:
+            return []
+
+        candidates = np.stack([vectors[match.id] for match in matches])
+        selected = maximal_marginal_relevance(query_vector, candidates, k, lambda_mult)
+        documents = []
+        for i in selected:
+            metadata = dict(matches[i].metadata or {})
+            text = metadata.pop("text", "")
+            documents.append(Document(id=matches[i].id, page_content=text, metadata=metadata))
+        return documents
+
+    async def _hybrid_search(self, query: str, k: int, fetch_k: int) -> list[Document]:
+        """
+        Run dense and BM25 search concurrently and fuse them with reciprocal rank fusion.
+        Chunks found only by BM25 are fetched from the index by ID.
+        """
+        if self.lexical_index is None:
+            raise ValueError("search_type of hybrid requires a lexical index.")
+        dense, lexical = await asyncio.gather(
+            self.vector_store.asimilarity_search(query, k=fetch_k),
+            asyncio.to_thread(self.lexical_index.search, query, fetch_k),
+        )
+        docs_by_id = {doc.id: doc for doc in dense if doc.id}
+        fused = reciprocal_rank_fusion(
+            [[doc.id for doc in dense if doc.id], [doc_id for doc_id, _ in lexical]]
+        )[:k]
+
+        missing = [doc_id for doc_id, _ in fused if doc_id not in docs_by_id]
+        docs_by_id.update({doc.id: doc for doc in await self.fetch_documents(missing) if doc.id})
+        return [docs_by_id[doc_id] for doc_id, _ in fused if doc_id in docs_by_id]
+
+    async def index_version(self) -> str | None:
+        """
+        Version written by the ingest pipeline's `mark_index_changed`, None until it first ran.
+        """
+        now = time.monotonic()
+        if now - self._version_checked_at >= self.version_check_seconds:
+            self._version_checked_at = now
+            response = await self._call_index(
+                "fetch", ids=[VERSION_ID], namespace=VERSION_NAMESPACE
+            )
+            record = response.vectors.get(VERSION_ID)
+            self._version = (record.metadata or {}).get("version") if record else None
+        return self._version
+
+    async def mark_index_changed(self) -> None:
+        version = uuid.uuid4().hex
+        # Cosine indexes reject all-zero vectors
+        values = [1.0] + [0.0] * (self.model_size - 1)
+        logger.info(f"Setting the index version to {version}.")
+        await self._call_index(
+            "upsert",
+            vectors=[(VERSION_ID, values, {"version": version})],
+            namespace=VERSION_NAMESPACE,
+        )
+
+    async def fetch_documents(self, ids: list[str]) -> list[Document]:
+        if not ids:
+            return []
+        response = await self._call_index("fetch", ids=ids)
+        documents = {}
+        for doc_id, vector in response.vectors.items():
+            metadata = dict(vector.metadata or {})
+            text = metadata.pop("text", "")
+            documents[doc_id] = Document(id=doc_id, page_content=text, metadata=metadata)
+        return [documents[doc_id] for doc_id in ids if doc_id in documents]
+
     async def rerank_context(self, documents: list[Document], query: str) -> list[dict]:
+        if self.reranker is not None:
+            # Cached after MMR; after similarity or hybrid search one fetch call fills them in
+            vectors = await self._candidate_vectors([doc.id for doc in documents if doc.id])
+            return await self.reranker.rerank(documents, query, vectors)
         rerank_documents = await self.rerank.arerank(documents=documents, query=query)
         return rerank_documents
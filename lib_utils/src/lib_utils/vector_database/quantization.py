@@ -0,0 +1,122 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# Rows decoded per step while scanning codes: the scratch block stays cache-sized
+SCAN_BLOCK_ROWS = 1024
+
+
+class Quantizer(ABC):
+    """
+    Compact encoding of L2-normalized float32 vectors for the first-pass scan of
+    LocalVectorStore. Codes are fixed-size records, so they can be appended and memory-mapped
+    like the float matrix; the approximate scores they give only need to rank the true
+    neighbours among the first candidates, which are then rescored at full precision.
+    """
+
+    name = ""
+    # File of the codes in the index directory
+    codes_file = ""
+    # Candidates rescored at full precision, as a multiple of k
+    rescore_factor = 4
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    @property
+    @abstractmethod
+    def dtype(self) -> np.dtype:
+        """
+        Record dtype of one encoded vector.
+        """
+
+    @abstractmethod
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Encode a (n, dimension) float32 matrix into n records of `dtype`.
+        """
+
+    @abstractmethod
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        Approximate inner products between every code and a normalized float32 query.
+        """
+
+
+class Int8Quantizer(Quantizer):
+    """
+    Symmetric per-vector scalar quantization: each component is stored as an int8 of the
+    vector's largest magnitude, plus one float32 scale. About 4x smaller than float32.
+    """
+
+    name = "int8"
+    codes_file = "vectors.i8"
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype([("scale", "<f4"), ("codes", "i1", (self.dimension,))])
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        scale = np.abs(vectors).max(axis=1) / 127
+        scale[scale == 0] = 1.0
+        records = np.empty(vectors.shape[0], dtype=self.dtype)
+        records["scale"] = scale
+        records["codes"] = np.rint(vectors / scale[:, None])
+        return records
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        # Decoding into one reused buffer keeps the scan as fast as a float32 matmul
+        scratch = np.empty((SCAN_BLOCK_ROWS, self.dimension), dtype=np.float32)
+        for start in range(0, codes.shape[0], SCAN_BLOCK_ROWS):
+            block = codes[start : start + SCAN_BLOCK_ROWS]
+            decoded = scratch[: block.shape[0]]
+            np.copyto(decoded, block["codes"], casting="unsafe")
+            out[start : start + block.shape[0]] = (decoded @ query) * block["scale"]
+        return out
+
+
+class BinaryQuantizer(Quantizer):
+    """
+    One sign bit per component, packed eight to a byte. 32x smaller than float32; the score
+    is the fraction of matching signs mapped to [-1, 1]. Coarser than int8, so more
+    candidates are rescored to keep the same recall.
+    """
+
+    name = "binary"
+    codes_file = "vectors.b1"
+    rescore_factor = 10
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype([("bits", "u1", ((self.dimension + 7) // 8,))])
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        records = np.empty(vectors.shape[0], dtype=self.dtype)
+        records["bits"] = np.packbits(vectors > 0, axis=1)
+        return records
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        query_bits = np.packbits(query > 0)
+        for start in range(0, codes.shape[0], SCAN_BLOCK_ROWS):
+            block = codes[start : start + SCAN_BLOCK_ROWS]["bits"]
+            distance = np.bitwise_count(block ^ query_bits).sum(axis=1, dtype=np.int32)
+            out[start : start + block.shape[0]] = 1.0 - 2.0 * distance / self.dimension
+        return out
+
+
+QUANTIZERS: dict[str, type[Quantizer]] = {
+    quantizer.name: quantizer for quantizer in (Int8Quantizer, BinaryQuantizer)
+}
+
+
+def get_quantizer(name: str, dimension: int) -> Quantizer | None:
+    """
+    Return the quantizer called `name`, or None for "none" (exact float32 search).
+    """
+    if name == "none":
+        return None
+    if name not in QUANTIZERS:
+        raise ValueError(f"quantization of {name} not allowed.")
+    return QUANTIZERS[name](dimension)
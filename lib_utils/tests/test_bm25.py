@@ -0,0 +1,165 @@
+import threading
+
+import pytest
+from langchain_core.documents import Document
+
+from lib_utils.lexical.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCUMENTS = [
+    Document(id="robo", page_content="El robo agravado se reprime con pena privativa de libertad"),
+    Document(id="hurto", page_content="El hurto simple se reprime con pena de libertad"),
+    Document(id="contrato", page_content="El contrato es el acuerdo de dos o más partes"),
+]
+
+
+def make_index(path) -> BM25Index:
+    index = BM25Index(path)
+    index.add(DOCUMENTS)
+    return index
+
+
+##############################################
+# Tokenizer tests
+##############################################
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Artículo 200", ["articulo", "200"]),
+        ("¿QUÉ dice?", ["que", "dice"]),
+        ("", []),
+    ],
+)
+def test_tokenize(text, expected):
+    assert tokenize(text) == expected
+
+
+##############################################
+# Search tests
+##############################################
+def test_search_ranks_matching_documents(tmp_path):
+    index = make_index(tmp_path)
+
+    results = index.search("robo agravado", k=3)
+
+    assert [doc_id for doc_id, _ in results] == ["robo"]
+    assert results[0][1] > 0
+
+
+def test_rare_terms_weigh_more(tmp_path):
+    index = make_index(tmp_path)
+
+    # "pena" is in two documents, "hurto" only in one
+    results = index.search("pena hurto", k=3)
+
+    assert [doc_id for doc_id, _ in results] == ["hurto", "robo"]
+
+
+def test_search_without_matches(tmp_path):
+    index = make_index(tmp_path)
+
+    assert index.search("constitución", k=3) == []
+    assert index.search("robo", k=0) == []
+
+
+def test_add_replaces_and_remove_drops(tmp_path):
+    index = make_index(tmp_path)
+
+    index.add([Document(id="contrato", page_content="robo")])
+    index.remove(["robo"])
+
+    assert [doc_id for doc_id, _ in index.search("robo", k=3)] == ["contrato"]
+    assert len(index) == 3 - 1
+
+
+def test_pending_chunks_are_merged_in_batches(tmp_path):
+    words = ["robo", "hurto", "pena", "contrato", "libertad", "parte"]
+    documents = [
+        Document(id=f"c{i}", page_content=" ".join(words[j % 6] for j in range(i, i + i % 5 + 1)))
+        for i in range(50)
+    ]
+    incremental = BM25Index(tmp_path / "incremental", max_pending=7)
+    for start in range(0, 50, 3):
+        incremental.add(documents[start : start + 3])
+        assert len(incremental._pending) < 7
+    incremental.remove(["c4", "c30"])
+    incremental.add([Document(id="c9", page_content="contrato")])
+    reference = BM25Index(tmp_path / "reference")
+    reference.add([doc for doc in documents if doc.id not in ("c4", "c9", "c30")])
+    reference.add([Document(id="c9", page_content="contrato")])
+
+    for query in ("robo", "pena contrato", "libertad parte hurto"):
+        assert dict(incremental.search(query, k=50)) == pytest.approx(
+            dict(reference.search(query, k=50))
+        )
+
+
+def test_save_and_reload(tmp_path):
+    make_index(tmp_path).save()
+    reader = BM25Index(tmp_path)
+    assert reader.exists()
+    assert [doc_id for doc_id, _ in reader.search("contrato", k=3)] == ["contrato"]
+
+    writer = BM25Index(tmp_path)
+    writer.remove(["contrato"])
+    writer.save()
+
+    assert reader.search("contrato", k=3) == []
+
+
+def write_generation(path, generation: int, previous: list[str]) -> list[str]:
+    # Generations of different sizes and vocabularies, so mixed arrays would not line up
+    writer = BM25Index(path)
+    writer.remove(previous)
+    documents = [
+        Document(id=f"g{generation}-{i}", page_content=f"robo pena t{generation}x{i}")
+        for i in range(5 + 37 * generation % 200)
+    ]
+    writer.add(documents)
+    writer.save()
+    return [document.id for document in documents]
+
+
+def test_concurrent_searches_during_rewrites(tmp_path):
+    ids = write_generation(tmp_path, 0, [])
+    reader = BM25Index(tmp_path)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+    generations: list[set[str]] = []
+
+    def search():
+        while not stop.is_set():
+            try:
+                results = reader.search("robo pena", k=500)
+                generations.append({doc_id.split("-")[0] for doc_id, _ in results})
+            except BaseException as error:
+                errors.append(error)
+                return
+
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for generation in range(1, 30):
+            ids = write_generation(tmp_path, generation, ids)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert not errors
+    assert all(len(prefixes) == 1 for prefixes in generations)
+    assert [doc_id for doc_id, _ in reader.search("t29x0", k=1)] == ["g29-0"]
+
+
+##############################################
+# Reciprocal rank fusion tests
+##############################################
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+
+    assert [doc_id for doc_id, _ in fused] == ["b", "a", "d", "c"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_reciprocal_rank_fusion_empty():
+    assert reciprocal_rank_fusion([[], []]) == []
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from lib_utils.vector_database.ivf import IVFIndex
+
+DIMENSION = 16
+
+
+def normalized(count: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def lists_of(index: IVFIndex) -> np.ndarray:
+    return np.fromfile(index.index_path / IVFIndex.LISTS_FILE, dtype=np.int32)
+
+
+##############################################
+# Sync tests
+##############################################
+def test_sync_waits_for_min_train_rows(tmp_path):
+    index = IVFIndex(tmp_path, DIMENSION, min_train_rows=100)
+
+    index.sync(normalized(99))
+
+    assert not index.trained
+    assert not (tmp_path / IVFIndex.CENTROIDS_FILE).exists()
+
+
+def test_sync_trains_then_appends(tmp_path):
+    vectors = normalized(300)
+    index = IVFIndex(tmp_path, DIMENSION, nlist=8, min_train_rows=100)
+
+    index.sync(vectors[:200])
+    assert index.trained
+    assert index.list_count == 8
+    assert index.trained_rows == 200
+
+    index.sync(vectors)
+    # Not grown enough to retrain: the new rows are assigned to the existing centroids
+    assert index.trained_rows == 200
+    assert lists_of(index).shape == (300,)
+    np.testing.assert_array_equal(
+        lists_of(index)[200:], index._assign(vectors[200:], np.asarray(index.lists.centroids))
+    )
+
+
+def test_sync_retrains_after_growth(tmp_path):
+    vectors = normalized(800)
+    index = IVFIndex(tmp_path, DIMENSION, min_train_rows=100, retrain_growth=4.0)
+
+    index.sync(vectors[:100])
+    nlist = index.list_count
+    index.sync(vectors)
+
+    assert index.trained_rows == 800
+    assert index.list_count > nlist
+
+
+def test_sync_truncates_lists_beyond_the_rows(tmp_path):
+    vectors = normalized(200)
+    index = IVFIndex(tmp_path, DIMENSION, nlist=4, min_train_rows=100)
+    index.sync(vectors)
+
+    index.sync(vectors[:150])
+
+    assert lists_of(index).shape == (150,)
+
+
+##############################################
+# Load tests
+##############################################
+def test_load_requires_lists_covering_every_row(tmp_path):
+    IVFIndex(tmp_path, DIMENSION, nlist=4, min_train_rows=100).sync(normalized(200))
+    reader = IVFIndex(tmp_path, DIMENSION)
+
+    assert reader.load(201) is None
+    assert not reader.trained
+    lists = reader.load(200)
+    assert lists is not None
+    assert lists.offsets[-1] == 200
+    np.testing.assert_array_equal(np.sort(lists.rows), np.arange(200))
+
+
+def test_candidates(tmp_path):
+    vectors = normalized(400)
+    index = IVFIndex(tmp_path, DIMENSION, nlist=8, nprobe=2, min_train_rows=100)
+    index.sync(vectors)
+
+    candidates = index.candidates(vectors[17])
+
+    assert 17 in candidates
+    assert np.all(np.diff(candidates) > 0)
+    np.testing.assert_array_equal(index.candidates(vectors[17], nprobe=8), np.arange(400))
+
+
+def test_candidates_of_untrained_index(tmp_path):
+    with pytest.raises(ValueError):
+        IVFIndex(tmp_path, DIMENSION).candidates(normalized(1)[0])
+
+
+##############################################
+# Select and reassign tests
+##############################################
+def test_select_keeps_the_lists_of_kept_rows(tmp_path):
+    index = IVFIndex(tmp_path, DIMENSION, nlist=4, min_train_rows=100)
+    index.sync(normalized(200))
+    before = lists_of(index)
+    keep = np.arange(200) % 3 != 0
+
+    index.select(keep)
+
+    np.testing.assert_array_equal(lists_of(index), before[keep])
+
+
+def test_select_drops_lists_not_covering_the_rows(tmp_path):
+    index = IVFIndex(tmp_path, DIMENSION, nlist=4, min_train_rows=100)
+    index.sync(normalized(200))
+
+    index.select(np.ones(250, dtype=bool))
+
+    assert not (tmp_path / IVFIndex.LISTS_FILE).exists()
+
+
+def test_reassign_moves_updated_rows(tmp_path):
+    vectors = normalized(200)
+    index = IVFIndex(tmp_path, DIMENSION, nlist=4, min_train_rows=100)
+    index.sync(vectors)
+    centroids = np.asarray(index.lists.centroids)
+    before = lists_of(index)
+    target = int((before[0] + 1) % 4)
+
+    index.reassign(np.array([0]), centroids[target][None, :])
+
+    after = lists_of(index)
+    assert after[0] == target
+    np.testing.assert_array_equal(after[1:], before[1:])
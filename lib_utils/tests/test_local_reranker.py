@@ -0,0 +1,94 @@
+import asyncio
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from lib_utils.rerank.local import LocalReranker
+
+
+class CountingEmbeddings(Embeddings):
+    """
+    Embeds every query to the same vector and counts the calls made to it.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.documents = 0
+
+    def embed_documents(self, texts):
+        self.documents += len(texts)
+        return [[1.0, 0.0] for _ in texts]
+
+    def embed_query(self, text):
+        self.queries += 1
+        return [1.0, 0.0]
+
+
+DOCUMENTS = [
+    Document(id="a", page_content="robo agravado"),
+    Document(id="b", page_content="hurto simple"),
+    Document(id="c", page_content="contrato de compraventa"),
+]
+VECTORS = {"a": np.array([0.0, 1.0]), "b": np.array([1.0, 0.0]), "c": np.array([1.0, 1.0])}
+
+
+def rerank(reranker, documents=DOCUMENTS, query="consulta", vectors=None):
+    return asyncio.run(reranker.rerank(documents, query, vectors))
+
+
+##############################################
+# Scoring tests
+##############################################
+def test_rerank_orders_by_stored_vectors():
+    embedding = CountingEmbeddings()
+    reranker = LocalReranker(embedding, top_n=2, lexical_weight=0.0)
+
+    results = rerank(reranker, vectors=VECTORS)
+
+    assert [result["id"] for result in results] == ["b", "c"]
+    assert results[0]["score"] == 1.0
+    assert results[0]["document"]["text"] == "hurto simple"
+    assert embedding.documents == 0
+
+
+def test_lexical_score_breaks_dense_ties():
+    reranker = LocalReranker(CountingEmbeddings(), top_n=3, lexical_weight=0.3)
+
+    results = rerank(reranker, query="contrato")
+
+    assert results[0]["id"] == "c"
+    assert results[0]["score"] == 0.3
+
+
+def test_documents_without_vectors_get_the_mean_dense_score():
+    reranker = LocalReranker(CountingEmbeddings(), top_n=3, lexical_weight=0.0)
+
+    results = rerank(reranker, vectors={"a": VECTORS["a"], "b": VECTORS["b"]})
+
+    assert {result["id"]: result["score"] for result in results}["c"] == 0.5
+
+
+##############################################
+# Cache tests
+##############################################
+def test_cached_scores_skip_the_query_embedding():
+    embedding = CountingEmbeddings()
+    reranker = LocalReranker(embedding, top_n=3)
+
+    first = rerank(reranker, vectors=VECTORS)
+    second = rerank(reranker, vectors={})
+
+    assert embedding.queries == 1
+    assert first == second
+    assert len(reranker._scores) == 3
+
+
+def test_no_vectors_no_query_embedding(caplog):
+    embedding = CountingEmbeddings()
+
+    rerank(LocalReranker(embedding, top_n=3))
+
+    assert embedding.queries == 0
+    assert "BM25 scores only" in caplog.text
+    assert rerank(LocalReranker(embedding, top_n=3), documents=[]) == []
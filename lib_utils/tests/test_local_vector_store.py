@@ -0,0 +1,318 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from lib_utils.vector_database.ivf import IVFIndex
+from lib_utils.vector_database.local import LocalVectorStore
+
+DIMENSION = 8
+
+
+class TableEmbeddings(Embeddings):
+    """
+    Embeds the texts it was given vectors for, and any other text to a fixed vector.
+    """
+
+    def __init__(self, vectors: dict[str, list[float]] | None = None):
+        self.vectors = vectors or {}
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.vectors.get(text, [1.0] + [0.0] * (DIMENSION - 1))
+
+
+def unit(index: int) -> list[float]:
+    vector = [0.0] * DIMENSION
+    vector[index] = 1.0
+    return vector
+
+
+def make_store(path, **kwargs) -> LocalVectorStore:
+    kwargs.setdefault("embedding_function", TableEmbeddings())
+    return LocalVectorStore(index_path=path, model_size=DIMENSION, rerank_top_n=3, **kwargs)
+
+
+def store(vs: LocalVectorStore, vectors: dict[str, list[float]]) -> list[str]:
+    documents = [Document(id=doc_id, page_content=f"text {doc_id}") for doc_id in vectors]
+    return asyncio.run(vs.store_embeddings(documents, list(vectors.values())))
+
+
+def random_vectors(count: int, seed: int = 0, prefix: str = "c") -> dict[str, list[float]]:
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((count, DIMENSION)).astype(np.float32)
+    return {f"{prefix}{i}": row.tolist() for i, row in enumerate(matrix)}
+
+
+def file_state(path) -> dict[str, tuple[int, int]]:
+    return {
+        entry.name: (entry.stat().st_size, entry.stat().st_mtime_ns) for entry in path.iterdir()
+    }
+
+
+##############################################
+# Write tests
+##############################################
+def test_store_and_fetch(tmp_path):
+    vs = make_store(tmp_path)
+    store(vs, {"a": unit(0), "b": unit(1)})
+
+    documents = asyncio.run(vs.fetch_documents(["b", "missing", "a"]))
+
+    assert [doc.id for doc in documents] == ["b", "a"]
+    assert documents[0].page_content == "text b"
+    assert len(make_store(tmp_path)) == 2
+
+
+def vectors_rows(path) -> int:
+    return (path / LocalVectorStore.VECTORS_FILE).stat().st_size // (DIMENSION * 4)
+
+
+def test_upsert_replaces_existing_rows_in_place(tmp_path):
+    vs = make_store(tmp_path)
+    store(vs, {f"c{i}": unit(i) for i in range(DIMENSION)})
+    generation = vs.generation
+
+    asyncio.run(vs.store_embeddings([Document(id="c0", page_content="new c0")], [unit(2)]))
+
+    reopened = make_store(tmp_path)
+    assert len(reopened) == DIMENSION
+    assert reopened.generation > generation
+    # Appended, and the old row only marked deleted
+    assert vectors_rows(tmp_path) == DIMENSION + 1
+    assert asyncio.run(reopened.fetch_documents(["c0"]))[0].page_content == "new c0"
+    rows, _ = reopened._similarity(np.asarray(unit(0), dtype=np.float32), 1)
+    assert reopened._snapshot.ids[rows[0]] != "c0"
+    rows, _ = reopened._similarity(np.asarray(unit(2), dtype=np.float32), 2)
+    assert sorted(reopened._snapshot.ids[row] for row in rows) == ["c0", "c2"]
+
+
+def test_delete_documents(tmp_path):
+    vs = make_store(tmp_path)
+    store(vs, {f"c{i}": unit(i) for i in range(DIMENSION)})
+
+    asyncio.run(vs.delete_documents(["c1", "missing"]))
+
+    reopened = make_store(tmp_path)
+    assert len(reopened) == DIMENSION - 1
+    assert asyncio.run(reopened.fetch_documents(["c1"])) == []
+    assert vectors_rows(tmp_path) == DIMENSION
+    rows, _ = reopened._similarity(np.asarray(unit(1), dtype=np.float32), DIMENSION)
+    assert "c1" not in [reopened._snapshot.ids[row] for row in rows]
+    assert rows.shape[0] == DIMENSION - 1
+
+
+def test_deleted_rows_are_compacted(tmp_path):
+    vs = make_store(tmp_path)
+    store(vs, {f"c{i}": unit(i) for i in range(DIMENSION)})
+
+    asyncio.run(vs.delete_documents(["c1"]))
+    store(vs, {"c2": unit(3)})
+    assert vectors_rows(tmp_path) == DIMENSION + 1
+    # A third of the rows deleted: rewritten without them
+    asyncio.run(vs.delete_documents(["c4"]))
+
+    reopened = make_store(tmp_path)
+    assert vectors_rows(tmp_path) == DIMENSION - 2
+    assert not (tmp_path / LocalVectorStore.DELETED_FILE).exists()
+    assert sorted(reopened._snapshot.ids) == sorted(
+        f"c{i}" for i in range(DIMENSION) if i not in (1, 4)
+    )
+    assert asyncio.run(reopened.fetch_documents(["c2"]))[0].id == "c2"
+    np.testing.assert_array_equal(
+        reopened._snapshot.vectors[reopened._snapshot.rows["c2"]], unit(3)
+    )
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_quantized_search_skips_deleted_rows(tmp_path, quantization):
+    vectors = random_vectors(100)
+    vs = make_store(tmp_path, quantization=quantization)
+    store(vs, vectors)
+    asyncio.run(vs.delete_documents(["c5"]))
+
+    query = np.asarray(vectors["c5"], dtype=np.float32)
+    rows, _ = vs._similarity(query / np.linalg.norm(query), 99)
+
+    assert "c5" not in [vs._snapshot.ids[row] for row in rows]
+    assert rows.shape[0] == 99
+
+
+def test_interrupted_append_is_recovered(tmp_path):
+    vs = make_store(tmp_path)
+    store(vs, {"a": unit(0), "b": unit(1)})
+    # A writer died after appending rows but before updating index.json
+    with (tmp_path / LocalVectorStore.VECTORS_FILE).open("ab") as f:
+        f.write(np.ones(DIMENSION, dtype=np.float32).tobytes())
+    with (tmp_path / LocalVectorStore.SIDECAR_FILE).open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "lost", "text": "", "metadata": {}}) + "\n")
+
+    vs = make_store(tmp_path)
+    assert vs._snapshot.ids == ["a", "b"]
+    store(vs, {"c": unit(2)})
+
+    reopened = make_store(tmp_path)
+    assert reopened._snapshot.ids == ["a", "b", "c"]
+    assert vectors_rows(tmp_path) == 3
+    assert not reopened._needs_rewrite
+
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    store(make_store(tmp_path), {"a": unit(0)})
+
+    with pytest.raises(ValueError):
+        LocalVectorStore(TableEmbeddings(), tmp_path, DIMENSION + 1, rerank_top_n=3)
+
+
+##############################################
+# Reader tests
+##############################################
+def test_reader_reloads_when_index_changes(tmp_path):
+    writer = make_store(tmp_path)
+    store(writer, {"a": unit(0)})
+    reader = make_store(tmp_path, read_only=True)
+    version = asyncio.run(reader.index_version())
+
+    store(writer, {"b": unit(1)})
+
+    assert asyncio.run(reader.index_version()) != version
+    assert [doc.id for doc in asyncio.run(reader.fetch_documents(["b"]))] == ["b"]
+
+
+def test_reader_reloads_when_mtime_does_not_change(tmp_path):
+    writer = make_store(tmp_path)
+    store(writer, {"a": unit(0)})
+    reader = make_store(tmp_path, read_only=True)
+    mtime = (tmp_path / LocalVectorStore.INDEX_FILE).stat().st_mtime_ns
+
+    store(writer, {"b": unit(1)})
+    # Both writes within the mtime resolution
+    os.utime(tmp_path / LocalVectorStore.INDEX_FILE, ns=(mtime, mtime))
+
+    assert len(asyncio.run(reader.fetch_documents(["a", "b"]))) == 2
+
+
+def test_reader_keeps_its_snapshot_during_a_write(tmp_path):
+    writer = make_store(tmp_path)
+    store(writer, {"a": unit(0)})
+    reader = make_store(tmp_path, read_only=True)
+    snapshot = reader._snapshot
+
+    # A write has started but not finished, e.g. while the files are being rewritten
+    writer._begin_write(writer._snapshot)
+
+    assert reader._maybe_reload() is snapshot
+    assert make_store(tmp_path, read_only=True)._snapshot.ids == []
+    store(writer, {"b": unit(1)})
+    assert sorted(reader._maybe_reload().rows) == ["a", "b"]
+
+
+def test_read_only_store_never_writes(tmp_path):
+    store(make_store(tmp_path, quantization="int8"), random_vectors(50))
+    # Rows appended by a writer configured without quantization have no codes on disk
+    store(make_store(tmp_path), random_vectors(30, seed=1, prefix="d"))
+    before = file_state(tmp_path)
+
+    reader = make_store(tmp_path, quantization="int8", read_only=True)
+
+    assert file_state(tmp_path) == before
+    assert reader._snapshot.codes.shape[0] == 50
+    assert reader._snapshot.codes_tail.shape[0] == 30
+    with pytest.raises(PermissionError):
+        asyncio.run(reader.delete_documents(["c0"]))
+
+
+##############################################
+# Search tests
+##############################################
+@pytest.mark.parametrize("search_type", ["similarity", "mmr"])
+def test_retrieve(tmp_path, search_type):
+    embedding = TableEmbeddings({"query": unit(1)})
+    vs = make_store(tmp_path, embedding_function=embedding)
+    store(vs, {"a": unit(0), "b": unit(1), "c": unit(2)})
+
+    documents = asyncio.run(vs.retrieve("query", search_type, k=1))
+
+    assert [doc.id for doc in documents] == ["b"]
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_quantized_search_matches_exact_search(tmp_path, quantization):
+    vectors = random_vectors(300)
+    store(make_store(tmp_path / "exact"), vectors)
+    store(make_store(tmp_path / "quantized", quantization=quantization), vectors)
+    exact = make_store(tmp_path / "exact", read_only=True)
+    quantized = make_store(tmp_path / "quantized", quantization=quantization, read_only=True)
+
+    for doc_id in ("c3", "c100", "c250"):
+        query = np.asarray(vectors[doc_id], dtype=np.float32)
+        query /= np.linalg.norm(query)
+        expected, expected_scores = exact._similarity(query, 5)
+        rows, scores = quantized._similarity(query, 5)
+        # Rescoring returns the exact scores of the rows it keeps
+        assert rows[0] == expected[0]
+        np.testing.assert_allclose(scores[0], expected_scores[0], rtol=1e-5)
+
+
+def test_quantized_reader_scores_the_in_memory_tail(tmp_path):
+    store(make_store(tmp_path, quantization="int8"), random_vectors(50))
+    tail = random_vectors(30, seed=1, prefix="d")
+    store(make_store(tmp_path), tail)
+    reader = make_store(tmp_path, quantization="int8", read_only=True)
+
+    query = np.asarray(tail["d7"], dtype=np.float32)
+    rows, _ = reader._similarity(query / np.linalg.norm(query), 1)
+
+    assert reader._snapshot.ids[rows[0]] == "d7"
+
+
+def test_ivf_search_finds_stored_rows(tmp_path):
+    vectors = random_vectors(600)
+    writer = make_store(tmp_path, ann_index=IVFIndex(tmp_path, DIMENSION, min_train_rows=500))
+    store(writer, vectors)
+    reader = make_store(tmp_path, ann_index=IVFIndex(tmp_path, DIMENSION, nprobe=4), read_only=True)
+
+    assert reader._snapshot.ann_lists is not None
+    for doc_id in ("c0", "c321", "c599"):
+        query = np.asarray(vectors[doc_id], dtype=np.float32)
+        rows, _ = reader._similarity(query / np.linalg.norm(query), 1)
+        assert reader._snapshot.ids[rows[0]] == doc_id
+
+    asyncio.run(writer.delete_documents(["c321"]))
+    query = np.asarray(vectors["c321"], dtype=np.float32)
+    rows, _ = reader._similarity(query / np.linalg.norm(query), 5, reader._maybe_reload())
+    assert "c321" not in [reader._snapshot.ids[row] for row in rows]
+
+
+def test_reader_ignores_ivf_lists_not_covering_every_row(tmp_path):
+    writer = make_store(tmp_path, ann_index=IVFIndex(tmp_path, DIMENSION, min_train_rows=500))
+    store(writer, random_vectors(600))
+    # Appended by a writer without the ANN index: the lists miss the new rows
+    store(make_store(tmp_path), random_vectors(10, seed=1, prefix="d"))
+    before = file_state(tmp_path)
+
+    reader = make_store(tmp_path, ann_index=IVFIndex(tmp_path, DIMENSION), read_only=True)
+
+    assert reader._snapshot.ann_lists is None
+    assert file_state(tmp_path) == before
+
+
+def test_hybrid_search_requires_a_lexical_index(tmp_path):
+    vs = make_store(tmp_path)
+    store(vs, {"a": unit(0)})
+
+    with pytest.raises(ValueError):
+        asyncio.run(vs.retrieve("query", "hybrid", k=1))
+
+
+def test_empty_store_returns_nothing(tmp_path):
+    vs = make_store(tmp_path)
+
+    assert asyncio.run(vs.retrieve("query", "similarity", k=3)) == []
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from langchain_core.vectorstores.utils import maximal_marginal_relevance as langchain_mmr
+
+from lib_utils.vector_database.mmr import VectorCache, maximal_marginal_relevance
+
+
+##############################################
+# MMR tests
+##############################################
+@pytest.mark.parametrize("lambda_mult", [0.0, 0.25, 0.5, 0.9, 1.0])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_mmr_matches_langchain(lambda_mult, seed):
+    rng = np.random.default_rng(seed)
+    candidates = rng.standard_normal((40, 32)).astype(np.float32)
+    query = rng.standard_normal(32).astype(np.float32)
+
+    selected = maximal_marginal_relevance(query, candidates, 8, lambda_mult)
+
+    assert selected.tolist() == langchain_mmr(query, candidates, lambda_mult, 8)
+
+
+def test_mmr_skips_near_duplicates():
+    candidates = np.array([[1.0, 0.1, 0.0], [1.0, 0.11, 0.0], [0.6, 0.0, 0.8]], dtype=np.float32)
+
+    selected = maximal_marginal_relevance(np.array([1.0, 0.0, 0.0]), candidates, 2, 0.25)
+
+    assert selected.tolist() == [0, 2]
+
+
+@pytest.mark.parametrize("k, expected", [(0, []), (5, [0, 1]), (-1, [])])
+def test_mmr_k_bounds(k, expected):
+    candidates = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+
+    assert maximal_marginal_relevance(np.array([1.0, 0.0]), candidates, k).tolist() == expected
+
+
+##############################################
+# VectorCache tests
+##############################################
+def test_vector_cache_get_many_returns_hits_only():
+    cache = VectorCache()
+    cache.put_many({"a": np.ones(2), "b": np.zeros(2)})
+
+    found = cache.get_many(["a", "missing"])
+
+    assert list(found) == ["a"]
+    np.testing.assert_array_equal(found["a"], np.ones(2))
+
+
+def test_vector_cache_evicts_least_recently_used():
+    cache = VectorCache(max_size=2)
+    cache.put_many({"a": np.ones(2), "b": np.ones(2)})
+    cache.get_many(["a"])
+
+    cache.put_many({"c": np.ones(2)})
+
+    assert len(cache) == 2
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
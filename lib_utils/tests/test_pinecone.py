@@ -0,0 +1,208 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from lib_utils.rerank.local import LocalReranker
+from lib_utils.vector_database.mmr import VectorCache
+from lib_utils.vector_database.pinecone import VERSION_ID, VERSION_NAMESPACE, PineconeService
+
+DIMENSION = 4
+
+
+class QueryEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return [1.0, 0.0, 0.0, 0.0]
+
+
+class FakeIndex:
+    """
+    In-memory stand-in for a Pinecone index, recording the calls made to it.
+    """
+
+    def __init__(self, vectors: dict[str, list[float]]):
+        self.namespaces: dict[str | None, dict] = {
+            None: {
+                doc_id: SimpleNamespace(values=values, metadata={"text": f"text {doc_id}"})
+                for doc_id, values in vectors.items()
+            }
+        }
+        self.queries: list[dict] = []
+        self.fetches: list[list[str]] = []
+
+    def query(self, vector, top_k, include_metadata, include_values):
+        self.queries.append({"top_k": top_k, "include_values": include_values})
+        records = self.namespaces[None]
+        scores = {doc_id: float(np.dot(vector, r.values)) for doc_id, r in records.items()}
+        ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        matches = [
+            SimpleNamespace(
+                id=doc_id, metadata=dict(records[doc_id].metadata), score=scores[doc_id]
+            )
+            for doc_id in ranked
+        ]
+        return SimpleNamespace(matches=matches)
+
+    def fetch(self, ids, namespace=None):
+        self.fetches.append(list(ids))
+        records = self.namespaces.get(namespace, {})
+        return SimpleNamespace(
+            vectors={doc_id: records[doc_id] for doc_id in ids if doc_id in records}
+        )
+
+    def upsert(self, vectors, namespace=None):
+        records = self.namespaces.setdefault(namespace, {})
+        for doc_id, values, metadata in vectors:
+            records[doc_id] = SimpleNamespace(values=values, metadata=metadata)
+
+
+class FakeAsyncIndex:
+    """
+    Async client over a FakeIndex, as opened by `PineconeService.start`.
+    """
+
+    def __init__(self, index: FakeIndex):
+        self.index = index
+        self.calls: list[str] = []
+
+    async def query(self, **kwargs):
+        self.calls.append("query")
+        return self.index.query(**kwargs)
+
+    async def fetch(self, **kwargs):
+        self.calls.append("fetch")
+        return self.index.fetch(**kwargs)
+
+    async def upsert(self, **kwargs):
+        self.calls.append("upsert")
+        return self.index.upsert(**kwargs)
+
+
+def make_service(index: FakeIndex, version_check_seconds: float = 30.0) -> PineconeService:
+    # Skips __init__, which connects to Pinecone
+    service = PineconeService.__new__(PineconeService)
+    service.embedding = QueryEmbeddings()
+    service.index = index
+    service.vector_cache = VectorCache()
+    service.fetch_k = 20
+    service.reranker = None
+    service.lexical_index = None
+    service.model_size = DIMENSION
+    service.version_check_seconds = version_check_seconds
+    service._version = None
+    service._version_checked_at = -float("inf")
+    service._async_index = None
+    return service
+
+
+VECTORS = {
+    "a": [1.0, 0.0, 0.0, 0.0],
+    "a-copy": [0.99, 0.01, 0.0, 0.0],
+    "b": [0.7, 0.7, 0.0, 0.0],
+    "c": [0.0, 0.0, 1.0, 0.0],
+}
+
+
+##############################################
+# MMR search tests
+##############################################
+def test_mmr_search_selects_diverse_documents():
+    index = FakeIndex(VECTORS)
+    service = make_service(index)
+
+    documents = asyncio.run(service.retrieve("query", "mmr", k=3, lambda_mult=0.25))
+
+    assert [doc.id for doc in documents] == ["a", "c", "b"]
+    assert documents[0].page_content == "text a"
+    assert "text" not in documents[0].metadata
+    assert index.queries == [{"top_k": 20, "include_values": False}]
+
+
+def test_mmr_search_fetches_only_unseen_vectors():
+    index = FakeIndex(VECTORS)
+    service = make_service(index)
+
+    asyncio.run(service.retrieve("query", "mmr", k=2, fetch_k=2))
+    asyncio.run(service.retrieve("query", "mmr", k=2, fetch_k=4))
+    asyncio.run(service.retrieve("query", "mmr", k=2, fetch_k=4))
+
+    assert index.fetches == [["a", "a-copy"], ["b", "c"]]
+
+
+def test_mmr_search_without_matches():
+    service = make_service(FakeIndex({}))
+
+    assert asyncio.run(service.retrieve("query", "mmr", k=2)) == []
+
+
+##############################################
+# Rerank tests
+##############################################
+def test_local_rerank_fetches_missing_vectors():
+    index = FakeIndex(VECTORS)
+    service = make_service(index)
+    service.reranker = LocalReranker(service.embedding, top_n=2, lexical_weight=0.0)
+    documents = asyncio.run(service.fetch_documents(["c", "a-copy", "a"]))
+    index.fetches.clear()
+
+    results = asyncio.run(service.rerank_context(documents, "query"))
+    asyncio.run(service.rerank_context(documents, "query"))
+
+    assert [result["id"] for result in results] == ["a", "a-copy"]
+    assert results[0]["score"] == 1.0
+    assert index.fetches == [["c", "a-copy", "a"]]
+
+
+##############################################
+# Index version tests
+##############################################
+def test_index_version_follows_mark_index_changed():
+    index = FakeIndex(VECTORS)
+    service = make_service(index, version_check_seconds=0.0)
+    assert asyncio.run(service.index_version()) is None
+
+    asyncio.run(service.mark_index_changed())
+    version = asyncio.run(service.index_version())
+
+    assert version is not None
+    assert len(index.namespaces[VERSION_NAMESPACE][VERSION_ID].values) == DIMENSION
+    assert VERSION_ID not in index.namespaces[None]
+
+
+def test_index_version_is_checked_once_per_interval():
+    index = FakeIndex(VECTORS)
+    service = make_service(index, version_check_seconds=3600.0)
+
+    asyncio.run(service.index_version())
+    asyncio.run(service.mark_index_changed())
+
+    assert asyncio.run(service.index_version()) is None
+    assert index.fetches == [[VERSION_ID]]
+
+
+##############################################
+# Async client tests
+##############################################
+def test_started_service_uses_the_async_client(monkeypatch):
+    index = FakeIndex(VECTORS)
+    service = make_service(index, version_check_seconds=0.0)
+    service._async_index = FakeAsyncIndex(index)
+
+    async def no_thread(*args, **kwargs):
+        raise AssertionError("the sync client was called")
+
+    monkeypatch.setattr(asyncio, "to_thread", no_thread)
+
+    async def requests():
+        await service.retrieve("query", "mmr", k=2)
+        await service.fetch_documents(["c"])
+        await service.mark_index_changed()
+        await service.index_version()
+
+    asyncio.run(requests())
+
+    assert service._async_index.calls == ["query", "fetch", "fetch", "upsert", "fetch"]
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from lib_utils.vector_database.quantization import (
+    BinaryQuantizer,
+    Int8Quantizer,
+    get_quantizer,
+)
+
+DIMENSION = 64
+
+
+def normalized(count: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+##############################################
+# Factory tests
+##############################################
+@pytest.mark.parametrize(
+    "name, expected",
+    [("none", type(None)), ("int8", Int8Quantizer), ("binary", BinaryQuantizer)],
+)
+def test_get_quantizer(name, expected):
+    assert isinstance(get_quantizer(name, DIMENSION), expected)
+
+
+def test_get_quantizer_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        get_quantizer("pq", DIMENSION)
+
+
+##############################################
+# Encoding tests
+##############################################
+def test_int8_scores_approximate_inner_products():
+    vectors, query = normalized(2000), normalized(1, seed=1)[0]
+    quantizer = Int8Quantizer(DIMENSION)
+
+    codes = quantizer.encode(vectors)
+
+    assert codes.dtype.itemsize == 4 + DIMENSION
+    np.testing.assert_allclose(quantizer.scores(codes, query), vectors @ query, atol=0.02)
+
+
+def test_binary_scores_count_matching_signs():
+    quantizer = BinaryQuantizer(8)
+    vectors = np.array([[1, 1, 1, 1, 1, 1, 1, 1], [1, 1, 1, 1, -1, -1, -1, -1]], np.float32)
+
+    codes = quantizer.encode(vectors)
+
+    assert codes.dtype.itemsize == 1
+    np.testing.assert_allclose(quantizer.scores(codes, np.ones(8, np.float32)), [1.0, 0.0])
+
+
+def rescored_top_k(quantizer, codes, vectors, query, k) -> np.ndarray:
+    candidates = np.argsort(-quantizer.scores(codes, query))[: k * quantizer.rescore_factor]
+    return candidates[np.argsort(-(vectors[candidates] @ query))[:k]]
+
+
+def test_int8_rescoring_recovers_the_exact_top_k():
+    vectors, queries = normalized(5000), normalized(20, seed=1)
+    quantizer = Int8Quantizer(DIMENSION)
+    codes = quantizer.encode(vectors)
+
+    for query in queries:
+        exact = np.argsort(-(vectors @ query))[:10]
+        assert len(set(exact) & set(rescored_top_k(quantizer, codes, vectors, query, 10))) >= 9
+
+
+@pytest.mark.parametrize("quantizer", [Int8Quantizer(DIMENSION), BinaryQuantizer(DIMENSION)])
+def test_rescoring_finds_near_duplicates(quantizer):
+    vectors = normalized(5000)
+    codes = quantizer.encode(vectors)
+    noise = 0.1 * normalized(20, seed=1)
+    rows = np.arange(0, 5000, 250)
+
+    for row, query in zip(rows, vectors[rows] + noise):
+        assert rescored_top_k(quantizer, codes, vectors, query, 1)[0] == row
+
+
+def test_scores_of_no_codes():
+    quantizer = Int8Quantizer(DIMENSION)
+
+    assert quantizer.scores(quantizer.encode(normalized(0)), normalized(1)[0]).shape == (0,)